@@ -0,0 +1,311 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import FastLogCore
+from .format import (
+    SEALED_MAGIC, NONCE_SIZE, BLOCK_HEADER, BLOCK_FINAL, BLOCK_INDEX, INDEX_TRAILER,
+)
+from .stream import FastLogWriter, FastLogReader, READ_CHUNK, _Spool
+
+# Latencies kept for the percentiles in metrics()
+LATENCY_SAMPLES = 1024
+
+def _percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def _aiter(chunks):
+    # Accept both async and plain iterables of byte chunks
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+class _ChunkSource(io.RawIOBase):
+    # Reader source fed on the event loop: fill() awaits chunks until n
+    # bytes are buffered, read() only returns what is buffered. A decode
+    # step on a worker therefore never waits on input (which would hold a
+    # worker and an in-flight slot while the chunks are in transit).
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = _aiter(chunks)
+        self._buf = bytearray()
+        self._pos = 0
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def buffered(self):
+        return len(self._buf) - self._pos
+
+    def peek(self, n):
+        return bytes(self._buf[self._pos:self._pos+n])
+
+    async def fill(self, n):
+        """
+        Buffer at least n bytes if the input has them; True if it did.
+        """
+        while self.buffered() < n and not self.eof:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self.eof = True
+                break
+            if self._pos:
+                del self._buf[:self._pos]
+                self._pos = 0
+            self._buf += chunk
+        return self.buffered() >= n
+
+    async def fill_block(self):
+        # Everything the reader's next sealed block step reads (see
+        # FastLogReader._next_sealed_block); a short input is left for the
+        # reader to report as truncated.
+        need = BLOCK_HEADER.size
+        if not await self.fill(need):
+            return
+        _, clen, field = BLOCK_HEADER.unpack(self.peek(need))
+        need += clen
+        if field & BLOCK_FINAL:
+            if field & BLOCK_INDEX:
+                need += INDEX_TRAILER.size
+            if await self.fill(need + 1):
+                need += len(SEALED_MAGIC) + NONCE_SIZE      # next member
+        await self.fill(need)
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self.buffered()
+        data = bytes(self._buf[self._pos:self._pos+n])
+        self._pos += len(data)
+        return data
+
+# ==========================================================
+# ASYNC CORE
+# ==========================================================
+
+class AsyncFastLogCore:
+    """
+    asyncio front end for FastLogCore. Compression and encryption run on a
+    managed thread pool (LZ4 and AES-GCM release the GIL), so the event
+    loop keeps serving other connections during a long HC encode.
+
+    At most `max_inflight` operations are queued or running in the pool;
+    further callers wait at their `await` (backpressure) instead of piling
+    up work and buffers. metrics() reports queue depth and latencies.
+
+    Every operation checks a FastLogCore (same key and settings) out of a
+    pool, since a core's bandit / SLO state is not shared across threads.
+    """
+
+    def __init__(self, key=None, max_workers=None, max_inflight=None, **core_kwargs):
+        self.core = FastLogCore(key=key, **core_kwargs)
+        self.key = self.core.dcf.key
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Default: one queued operation per worker behind the running one
+        self.max_inflight = max_inflight or 2 * self.max_workers
+
+        self.waiting = 0
+        self.inflight = 0
+        self.completed = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        # Pooled cores count into the same Stats (if any)
+        self._core_kwargs = dict(core_kwargs, stats=self.core.stats)
+        self._cores = [self.core]
+        self._idle = [self.core]
+        self._lock = threading.Lock()
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._pool = None
+        self._wait_times = deque(maxlen=LATENCY_SAMPLES)
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    # ------------------------------------------------------
+    # Executor and core pool
+    # ------------------------------------------------------
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="fastlog-async",
+            )
+        return self._pool
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        core = FastLogCore(key=self.key, **self._core_kwargs)
+        with self._lock:
+            self._cores.append(core)
+        return core
+
+    def _checkin(self, core):
+        with self._lock:
+            self._idle.append(core)
+
+    def _with_core(self, method, *args):
+        core = self._checkout()
+        try:
+            return getattr(core, method)(*args)
+        finally:
+            self._checkin(core)
+
+    async def _run(self, fn, *args):
+        """
+        Run fn(*args) on the pool once an in-flight slot is free.
+        """
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        t1 = time.perf_counter()
+
+        # The slot is returned when the work itself finishes, so a
+        # cancelled await cannot let more than max_inflight jobs run.
+        self.inflight += 1
+        try:
+            fut = self._executor().submit(fn, *args)
+        except BaseException:
+            self.inflight -= 1
+            self._slots.release()
+            raise
+
+        def done(f):
+            self.inflight -= 1
+            self._slots.release()
+            if f.cancelled() or f.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._wait_times.append(t1 - t0)
+            self._latencies.append(time.perf_counter() - t0)
+
+        fut.add_done_callback(lambda f: loop.call_soon_threadsafe(done, f))
+        return await asyncio.wrap_future(fut)
+
+    # ------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------
+    async def encode(self, data, index=False):
+        blob = await self._run(self._with_core, "encode", data, index)
+        self.bytes_in += len(data)
+        self.bytes_out += len(blob)
+        return blob
+
+    async def decode(self, blob):
+        data = await self._run(self._with_core, "decode", blob)
+        self.bytes_in += len(blob)
+        self.bytes_out += len(data)
+        return data
+
+    async def encode_stream(self, chunks, index=False):
+        """
+        Async generator: encode an (async) iterable of byte chunks as one
+        sealed container, yielding its bytes as blocks complete.
+        """
+        core = self._checkout()
+        spool = _Spool()
+        try:
+            writer = FastLogWriter(spool, core=core, index=index)
+            async for chunk in _aiter(chunks):
+                await self._run(writer.write, chunk)
+                self.bytes_in += len(chunk)
+                data = spool.take()
+                if data:
+                    self.bytes_out += len(data)
+                    yield data
+            await self._run(writer.close)
+            data = spool.take()
+            if data:
+                self.bytes_out += len(data)
+                yield data
+        finally:
+            self._checkin(core)
+
+    async def decode_stream(self, chunks, chunk_size=READ_CHUNK):
+        """
+        Async generator: decode a container arriving as an (async) iterable
+        of byte chunks, yielding plaintext as blocks are authenticated.
+        Chunks are awaited on the event loop; a block goes to the pool
+        once all of it has arrived. Legacy (unsealed) containers are
+        buffered whole first.
+        """
+        core = self._checkout()
+        source = _ChunkSource(chunks)
+        try:
+            await source.fill(len(SEALED_MAGIC) + NONCE_SIZE)
+            sealed = source.peek(len(SEALED_MAGIC)) == SEALED_MAGIC
+            if not sealed:
+                await source.fill(sys.maxsize)
+            reader = FastLogReader(source, core=core)
+
+            while True:
+                if sealed:
+                    await source.fill_block()
+                    data = await self._run(reader._read_block)
+                    if data is None:
+                        break
+                else:
+                    data = await self._run(reader.read, chunk_size)
+                    if not data:
+                        break
+                for i in range(0, len(data), chunk_size):
+                    piece = data[i:i+chunk_size]
+                    self.bytes_out += len(piece)
+                    yield piece
+            self.bytes_in += reader.bytes_in
+        finally:
+            self._checkin(core)
+
+    def metrics(self):
+        """
+        Snapshot of queue depth, throughput counters and latencies (seconds,
+        over the last LATENCY_SAMPLES operations).
+        """
+        waits = list(self._wait_times)
+        latencies = list(self._latencies)
+        return {
+            "queue_depth": self.waiting,
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "wait_p50": _percentile(waits, 0.50),
+            "wait_p99": _percentile(waits, 0.99),
+            "latency_p50": _percentile(latencies, 0.50),
+            "latency_p95": _percentile(latencies, 0.95),
+            "latency_p99": _percentile(latencies, 0.99),
+        }
+
+    async def aclose(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+        for core in self._cores:
+            core.warp.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,314 @@
+import bisect
+import mmap
+import threading
+from collections import OrderedDict
+
+from .format import (
+    BLOCK_HEADER, SEALED_MAGIC, NONCE_SIZE, BLOCK_FINAL, BLOCK_INDEX,
+    INDEX_ENTRY, INDEX_TRAILER, INDEX_MAGIC, BLOCK_LINKED, LINK_WINDOW,
+    BLOCK_BLOOM, BLOOM_FILTER,
+)
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# ==========================================================
+# Block LRU (byte budget)
+# ==========================================================
+
+class BlockCache:
+    """
+    LRU of decoded blocks keyed by block number, bounded by total bytes.
+    Safe to fill from several prefetch threads.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, i):
+        return i in self._blocks
+
+    def get(self, i):
+        with self._lock:
+            block = self._blocks.get(i)
+            if block is None:
+                self.misses += 1
+                return None
+            self._blocks.move_to_end(i)
+            self.hits += 1
+            return block
+
+    def put(self, i, block):
+        if len(block) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._blocks.pop(i, None)
+            if old is not None:
+                self.used -= len(old)
+            self._blocks[i] = block
+            self.used += len(block)
+            while self.used > self.max_bytes:
+                _, evicted = self._blocks.popitem(last=False)
+                self.used -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self.used = 0
+
+
+# ==========================================================
+# Seekable archive reader
+# ==========================================================
+
+class FastLogArchive:
+    """
+    Random access into a SEALED FASTLOG file. The file is memory-mapped and
+    read(offset, length) opens and decompresses only the blocks that cover
+    the requested range, keeping recently used blocks in a BlockCache.
+
+    Archives written with index=True are opened from their footer; for
+    others the clear block headers are walked once to build the same table.
+    Sealed containers written back to back (`fastlog follow -o FILE`) are
+    walked member by member and read as their concatenation, like
+    FastLogReader does. `filters` holds the per-block (token Bloom filter,
+    hash count, flags) of archives written with bloom=True (every member,
+    if several), else None.
+    """
+
+    def __init__(self, path, core=None, key=None, cache_bytes=DEFAULT_CACHE_BYTES):
+        if core is None:
+            from .core import FastLogCore
+            core = FastLogCore(key=key)
+        self.core = core
+        self.cache = BlockCache(cache_bytes)
+
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._f.close()
+            raise ValueError(f"Empty FASTLOG archive: {path}")
+        self._view = memoryview(self._mm)
+
+        if self._view[:len(SEALED_MAGIC)] != SEALED_MAGIC:
+            self.close()
+            raise ValueError("Not a sealed FASTLOG archive")
+        self.filters = None
+
+        try:
+            if not self._load_index():
+                self._scan_index()
+        except Exception:
+            self.close()
+            raise
+
+    # ------------------------------------------------------
+    # Block table
+    # ------------------------------------------------------
+    def _open_index(self, nonce, count, at):
+        # Decrypted payload of the index block at `at` (after `count` data
+        # blocks of its member), and the filters it carries, if any
+        view = self._view
+        header = view[at:at+BLOCK_HEADER.size]
+        _, clen, field = BLOCK_HEADER.unpack(header)
+        p = at + BLOCK_HEADER.size
+        entries = self.core.dcf.open_block(nonce, count, header, view[p:p+clen])
+        if not field & BLOCK_BLOOM:
+            return entries, None
+
+        filters = []
+        p = count * INDEX_ENTRY.size
+        for _ in range(count):
+            nbytes, hashes, flags = BLOOM_FILTER.unpack_from(entries, p)
+            p += BLOOM_FILTER.size
+            filters.append((entries[p:p+nbytes], hashes, flags))
+            p += nbytes
+        return entries, filters
+
+    def _load_index(self):
+        # Footer of a single-container file; anything else (no index, or
+        # several members: the footer only covers the last) is scanned.
+        view = self._view
+        if len(view) < INDEX_TRAILER.size:
+            return False
+
+        final_at, count, magic = INDEX_TRAILER.unpack_from(view, len(view) - INDEX_TRAILER.size)
+        if magic != INDEX_MAGIC or final_at + BLOCK_HEADER.size > len(view):
+            return False
+        _, clen, field = BLOCK_HEADER.unpack_from(view, final_at)
+        if not (field & BLOCK_FINAL and field & BLOCK_INDEX):
+            return False
+        if final_at + BLOCK_HEADER.size + clen + INDEX_TRAILER.size != len(view):
+            return False
+
+        nonce = bytes(view[len(SEALED_MAGIC):len(SEALED_MAGIC)+NONCE_SIZE])
+        entries, self.filters = self._open_index(nonce, count, final_at)
+        self._firsts = [0]
+        self._nonces = [nonce]
+
+        self._starts = []
+        self._headers = []
+        for uoff, hoff in INDEX_ENTRY.iter_unpack(entries[:count * INDEX_ENTRY.size]):
+            self._starts.append(uoff)
+            self._headers.append(hoff)
+
+        if self._headers:
+            last_bs = BLOCK_HEADER.unpack_from(view, self._headers[-1])[0]
+            self.size = self._starts[-1] + last_bs
+        else:
+            self.size = 0
+        return True
+
+    def _scan_index(self):
+        view = self._view
+        p = 0
+        uoff = 0
+        self._starts = []
+        self._headers = []
+        self._firsts = []               # first block of each member
+        self._nonces = []
+        filters = []
+
+        while p < len(view):
+            if view[p:p+len(SEALED_MAGIC)] != SEALED_MAGIC:
+                raise ValueError("Trailing data after FASTLOG container")
+            p += len(SEALED_MAGIC)
+            first = len(self._headers)
+            self._firsts.append(first)
+            self._nonces.append(bytes(view[p:p+NONCE_SIZE]))
+            p += NONCE_SIZE
+
+            while True:
+                if p + BLOCK_HEADER.size > len(view):
+                    raise ValueError("Truncated FASTLOG archive")
+                bs, clen, field = BLOCK_HEADER.unpack_from(view, p)
+                if field & BLOCK_FINAL:
+                    break
+                self._starts.append(uoff)
+                self._headers.append(p)
+                uoff += bs
+                p += BLOCK_HEADER.size + clen
+
+            trailer = INDEX_TRAILER.size if field & BLOCK_INDEX else 0
+            if p + BLOCK_HEADER.size + clen + trailer > len(view):
+                raise ValueError("Truncated FASTLOG archive")
+            if filters is not None and field & BLOCK_BLOOM:
+                count = len(self._headers) - first
+                filters += self._open_index(self._nonces[-1], count, p)[1]
+            elif len(self._headers) > first:
+                filters = None          # a member with blocks but no filters
+            p += BLOCK_HEADER.size + clen + trailer
+
+        self.size = uoff
+        self.filters = filters
+
+    # ------------------------------------------------------
+    # Block access
+    # ------------------------------------------------------
+    @property
+    def block_count(self):
+        return len(self._headers)
+
+    def _field(self, i):
+        return BLOCK_HEADER.unpack_from(self._view, self._headers[i])[2]
+
+    def _reset_point(self, i):
+        while i > 0 and self._field(i) & BLOCK_LINKED:
+            i -= 1
+        return i
+
+    def _decode_block(self, i, prefix=None):
+        view = self._view
+        h = self._headers[i]
+        header = view[h:h+BLOCK_HEADER.size]
+        bs, clen, field = BLOCK_HEADER.unpack(header)
+        p = h + BLOCK_HEADER.size
+
+        m = bisect.bisect_right(self._firsts, i) - 1
+        payload = self.core.dcf.open_block(
+            self._nonces[m], i - self._firsts[m], header, view[p:p+clen]
+        )
+        return self.core.warp.decode_block(payload, field, bs, prefix)
+
+    def _decode_through(self, i):
+        # A linked block needs the data before it: replay its reset group
+        # up to i, reusing cached blocks and keeping the last 64 KB.
+        start = self._reset_point(i)
+        history = bytearray()
+        for j in range(start, i + 1):
+            data = self.cache.get(j) if j < i else None
+            if data is None:
+                data = self._decode_block(j, history)
+                self.cache.put(j, data)
+            if j < i:
+                history += memoryview(data)[-LINK_WINDOW:]
+                del history[:-LINK_WINDOW]
+        return data
+
+    def block(self, i):
+        data = self.cache.get(i)
+        if data is None:
+            data = self._decode_through(i)
+        return data
+
+    def _prefetch(self, first, last):
+        # Decode the missing blocks of a multi-block read in parallel, one
+        # task per reset group.
+        warp = self.core.warp
+        missing = [i for i in range(first, last + 1) if i not in self.cache]
+        if warp.threads > 1 and len(missing) > 1:
+            ends = {}
+            for i in missing:
+                ends[self._reset_point(i)] = i
+            list(warp._executor().map(self._decode_through, ends.values()))
+
+    # ------------------------------------------------------
+    # Range reads
+    # ------------------------------------------------------
+    def read(self, offset, length):
+        """
+        Return up to `length` uncompressed bytes starting at `offset`.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must be >= 0")
+
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+
+        first = bisect.bisect_right(self._starts, offset) - 1
+        last = bisect.bisect_right(self._starts, end - 1) - 1
+        self._prefetch(first, last)
+
+        out = bytearray(end - offset)
+        pos = 0
+        for i in range(first, last + 1):
+            data = self.block(i)
+            start = self._starts[i]
+            lo = max(offset, start) - start
+            hi = min(end, start + len(data)) - start
+            out[pos:pos + hi - lo] = memoryview(data)[lo:hi]
+            pos += hi - lo
+
+        return bytes(out)
+
+    def close(self):
+        self.cache.clear()
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
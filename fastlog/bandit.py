@@ -1,5 +1,7 @@
+import json
+import math
+import os
 import random
-import time
 
 # ==========================================================
 # Base Policy Class
@@ -8,12 +10,53 @@ import time
 class BanditPolicy:
     """
     Base class for all bandit strategies.
+
+    Rewards are in [0, 1]: a weighted mix of space saved (1 - compressed /
+    original) and throughput in bytes/s squashed by `speed_ref`, so block
+    sizes are compared per byte rather than per call.
     """
 
+    name = "base"
+
+    # Whether the last choose_block_size() sampled an arm (exploration)
+    # rather than taking the best known one
+    explored = False
+
+    def __init__(self, ratio_weight=0.7, speed_weight=0.3, speed_ref=500e6):
+        self.ratio_weight = ratio_weight
+        self.speed_weight = speed_weight
+        self.speed_ref = speed_ref
+
+    def reward(self, nbytes, compressed, elapsed_ns):
+        saved = max(0.0, 1.0 - compressed / nbytes)
+        speed = nbytes * 1e9 / max(elapsed_ns, 1)
+        return (saved * self.ratio_weight) + (speed / (speed + self.speed_ref) * self.speed_weight)
+
     def choose_block_size(self, candidates, history):
         raise NotImplementedError
 
-    def update_reward(self, block_size, compress_time, ratio):
+    def update_reward(self, block_size, reward):
+        pass
+
+    def needs_feedback(self, candidates, history):
+        """
+        True while the next choice depends on results not yet recorded;
+        the adapter then stops pipelining blocks until they are in.
+        """
+        return len(history) < len(candidates)
+
+    def settled(self):
+        """
+        True once choose_block_size() returns the same size whatever the
+        rewards: the adapter may then plan many blocks ahead.
+        """
+        return False
+
+    # Persisted arm statistics (see BanditStore)
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
         pass
 
 
@@ -26,12 +69,21 @@ class OffBandit(BanditPolicy):
     Bandit disabled. Always returns a fixed block size.
     """
 
+    name = "off"
+
     def __init__(self, default=1024 * 1024):
+        super().__init__()
         self.default = default
 
     def choose_block_size(self, candidates, history):
         return self.default
 
+    def needs_feedback(self, candidates, history):
+        return False
+
+    def settled(self):
+        return True
+
 
 # ==========================================================
 # ONE-SHOT BANDIT (Safe, fixed after first N samples)
@@ -43,65 +95,57 @@ class OneShotBandit(BanditPolicy):
     Then selects the winner for the rest of the stream.
     """
 
+    name = "one"
+
     def __init__(self, ratio_weight=0.7, speed_weight=0.3):
-        self.ratio_weight = ratio_weight
-        self.speed_weight = speed_weight
+        super().__init__(ratio_weight, speed_weight)
         self.selected = None
 
-    def score(self, ratio, speed):
-        return (ratio * self.ratio_weight) + (speed * self.speed_weight)
-
     def choose_block_size(self, candidates, history):
         # Winner already chosen → reuse
+        self.explored = False
         if self.selected is not None:
             return self.selected
 
-        # No history yet → return middle candidate (usually 1MB)
-        if len(history) == 0:
-            return candidates[len(candidates) // 2]
-
-        # Still testing each candidate
-        if len(history) < len(candidates):
-            return candidates[len(history)]
+        # Middle candidate (usually 1MB) first, then the others once each
+        mid = candidates[len(candidates) // 2]
+        order = [mid] + [c for c in candidates if c != mid]
+        if len(history) < len(order):
+            self.explored = True
+            return order[len(history)]
 
         # All candidates evaluated → choose best
-        scored = []
-        for entry in history:
-            bs = entry["block_size"]
-            ratio = entry["ratio"]
-            speed = entry["speed"]
-            scored.append((self.score(ratio, speed), bs))
-
+        scored = [(entry["reward"], entry["block_size"]) for entry in history]
         scored.sort(reverse=True)
 
         self.selected = scored[0][1]
         return self.selected
 
+    def needs_feedback(self, candidates, history):
+        return self.selected is None and len(history) < len(candidates)
+
+    def settled(self):
+        return self.selected is not None
+
+    def get_state(self):
+        return {"selected": self.selected}
+
+    def set_state(self, state):
+        self.selected = state.get("selected")
+
 
 # ==========================================================
-# FULL BANDIT (Adaptive epsilon-greedy)
+# Shared arm statistics (running mean reward per block size)
 # ==========================================================
 
-class FullBandit(BanditPolicy):
-    """
-    Adaptive bandit; learns best block size continuously.
-    """
-
-    def __init__(self, epsilon=0.1, ratio_weight=0.7, speed_weight=0.3):
-        self.epsilon = epsilon
-        self.ratio_weight = ratio_weight
-        self.speed_weight = speed_weight
+class _ArmStats(BanditPolicy):
 
+    def __init__(self, ratio_weight=0.7, speed_weight=0.3):
+        super().__init__(ratio_weight, speed_weight)
         self.values = {}
         self.counts = {}
 
-    def score(self, ratio, speed):
-        return (ratio * self.ratio_weight) + (speed * self.speed_weight)
-
-    def update_reward(self, block_size, compress_time, ratio):
-        speed = 1.0 / compress_time
-        reward = self.score(ratio, speed)
-
+    def update_reward(self, block_size, reward):
         if block_size not in self.values:
             self.values[block_size] = reward
             self.counts[block_size] = 1
@@ -110,8 +154,38 @@ class FullBandit(BanditPolicy):
             self.values[block_size] = (self.values[block_size] * n + reward) / (n + 1)
             self.counts[block_size] = n + 1
 
+    def get_state(self):
+        return {
+            "arms": {
+                str(bs): {"count": self.counts[bs], "value": self.values[bs]}
+                for bs in self.values
+            }
+        }
+
+    def set_state(self, state):
+        for bs, arm in state.get("arms", {}).items():
+            self.counts[int(bs)] = arm["count"]
+            self.values[int(bs)] = arm["value"]
+
+
+# ==========================================================
+# FULL BANDIT (Adaptive epsilon-greedy)
+# ==========================================================
+
+class FullBandit(_ArmStats):
+    """
+    Adaptive bandit; learns best block size continuously.
+    """
+
+    name = "full"
+
+    def __init__(self, epsilon=0.1, ratio_weight=0.7, speed_weight=0.3):
+        super().__init__(ratio_weight, speed_weight)
+        self.epsilon = epsilon
+
     def choose_block_size(self, candidates, history):
         # Random exploration
+        self.explored = True
         if random.random() < self.epsilon:
             return random.choice(candidates)
 
@@ -127,5 +201,139 @@ class FullBandit(BanditPolicy):
         if best is None:
             return candidates[len(candidates) // 2]
 
+        self.explored = False
         return best
 
+
+# ==========================================================
+# UCB1 BANDIT
+# ==========================================================
+
+class UCBBandit(_ArmStats):
+    """
+    UCB1: tries every candidate once, then picks the highest
+    mean + c * sqrt(2 ln N / n) upper confidence bound.
+    """
+
+    name = "ucb"
+
+    def __init__(self, c=1.0, ratio_weight=0.7, speed_weight=0.3):
+        super().__init__(ratio_weight, speed_weight)
+        self.c = c
+
+    def choose_block_size(self, candidates, history):
+        self.explored = True
+        for bs in candidates:
+            if bs not in self.counts:
+                return bs
+
+        total = sum(self.counts[bs] for bs in candidates)
+        choice = max(
+            candidates,
+            key=lambda bs: self.values[bs]
+            + self.c * math.sqrt(2 * math.log(total) / self.counts[bs]),
+        )
+        # The confidence bonus picked an arm other than the best mean
+        self.explored = self.values[choice] < max(self.values[bs] for bs in candidates)
+        return choice
+
+
+# ==========================================================
+# THOMPSON SAMPLING BANDIT
+# ==========================================================
+
+class ThompsonBandit(BanditPolicy):
+    """
+    Thompson sampling with a Beta posterior per candidate. A reward r in
+    [0, 1] counts as r successes and 1 - r failures.
+    """
+
+    name = "thompson"
+
+    def __init__(self, ratio_weight=0.7, speed_weight=0.3):
+        super().__init__(ratio_weight, speed_weight)
+        self.alpha = {}
+        self.beta = {}
+
+    def update_reward(self, block_size, reward):
+        reward = min(1.0, max(0.0, reward))
+        self.alpha[block_size] = self.alpha.get(block_size, 1.0) + reward
+        self.beta[block_size] = self.beta.get(block_size, 1.0) + (1.0 - reward)
+
+    def choose_block_size(self, candidates, history):
+        choice = max(
+            candidates,
+            key=lambda bs: random.betavariate(
+                self.alpha.get(bs, 1.0), self.beta.get(bs, 1.0)
+            ),
+        )
+        # A sample beat the arm with the best posterior mean
+        self.explored = self._mean(choice) < max(self._mean(bs) for bs in candidates)
+        return choice
+
+    def _mean(self, bs):
+        alpha = self.alpha.get(bs, 1.0)
+        return alpha / (alpha + self.beta.get(bs, 1.0))
+
+    def get_state(self):
+        return {
+            "arms": {
+                str(bs): {"alpha": self.alpha[bs], "beta": self.beta[bs]}
+                for bs in self.alpha
+            }
+        }
+
+    def set_state(self, state):
+        for bs, arm in state.get("arms", {}).items():
+            self.alpha[int(bs)] = arm["alpha"]
+            self.beta[int(bs)] = arm["beta"]
+
+
+POLICIES = {
+    "one": OneShotBandit,
+    "full": FullBandit,
+    "ucb": UCBBandit,
+    "thompson": ThompsonBandit,
+    "off": OffBandit,
+}
+
+def make_policy(name):
+    return POLICIES.get(name, OffBandit)()
+
+
+# ==========================================================
+# Persisted arm statistics per data source
+# ==========================================================
+
+class BanditStore:
+    """
+    Saves each policy's learned state as JSON under
+    <state_dir>/<source>.<policy>.json so short-lived processes start tuned.
+    Defaults to $FASTLOG_STATE_DIR or ~/.cache/fastlog/bandit.
+    """
+
+    def __init__(self, state_dir=None):
+        self.state_dir = state_dir or os.environ.get(
+            "FASTLOG_STATE_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "fastlog", "bandit"),
+        )
+
+    def path(self, source, policy):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in source)
+        return os.path.join(self.state_dir, f"{safe}.{policy.name}.json")
+
+    def load(self, source, policy):
+        try:
+            with open(self.path(source, policy)) as f:
+                policy.set_state(json.load(f))
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def save(self, source, policy):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self.path(source, policy)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(policy.get_state(), f)
+        os.replace(tmp, path)
@@ -0,0 +1,228 @@
+import io
+import sys
+import threading
+import time
+from array import array
+
+from .format import BATCH_MAGIC, BATCH_COUNT, EVENT_END
+from .stream import FastLogWriter, _default_core
+
+DEFAULT_BATCH_BYTES = 1024 * 1024
+DEFAULT_BATCH_EVENTS = 10_000
+DEFAULT_BATCH_DELAY = 1.0   # seconds
+DEFAULT_BATCH_BUFFER = 64 * 1024 * 1024     # buffered bytes while the sink fails
+
+# ==========================================================
+# BATCHING ENCODER
+# ==========================================================
+
+class EventBatcher:
+    """
+    Collects log events and encodes them as one sealed FASTLOG container
+    ("frame") instead of one container per event, so the framing (magic,
+    nonce, block headers, GCM tags) is paid once per batch.
+
+    A frame is flushed to `sink(frame_bytes)` when `max_bytes` of events or
+    `max_events` events are buffered, or `max_delay` seconds after the
+    first buffered event. With background=True a daemon thread enforces
+    the deadline even when no new events arrive (and then calls `sink`
+    itself); otherwise call poll().
+
+    If `sink` raises, the events stay buffered and the failure is counted
+    in `sink_errors` (kept in `last_error`). The exception reaches the
+    caller of add() / poll() / flush() / close() (the background thread
+    carries on). Size-triggered flushes then wait until `max_delay`
+    seconds (DEFAULT_BATCH_DELAY if None) have passed, so a down sink
+    does not cost an encode per add(). Once `max_buffer` bytes are
+    buffered, add() raises BufferError.
+    """
+
+    def __init__(self, sink, core=None, max_bytes=DEFAULT_BATCH_BYTES,
+                 max_events=DEFAULT_BATCH_EVENTS, max_delay=DEFAULT_BATCH_DELAY,
+                 max_buffer=DEFAULT_BATCH_BUFFER, background=True, clock=time.monotonic):
+        self.core = _default_core(core)
+        self.sink = sink
+        self.max_bytes = max_bytes
+        self.max_events = max_events
+        self.max_delay = max_delay
+        self.max_buffer = max_buffer
+
+        self.frames = 0
+        self.events_in = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.sink_errors = 0
+        self.last_error = None
+
+        self._clock = clock
+        self._events = bytearray()
+        self._ends = array("I")
+        self._deadline = None
+        self._retry_at = None           # no size-triggered flush before this
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._thread = None
+        if background and max_delay is not None:
+            self._thread = threading.Thread(
+                target=self._run, name="fastlog-batch", daemon=True
+            )
+            self._thread.start()
+
+    # ------------------------------------------------------
+    # Frame encode
+    # ------------------------------------------------------
+    def _flush_locked(self):
+        count = len(self._ends)
+        if not count:
+            return
+
+        ends = self._ends
+        if sys.byteorder != "little":
+            ends = array("I", ends)
+            ends.byteswap()
+
+        out = io.BytesIO()
+        with FastLogWriter(out, core=self.core,
+                           size_hint=len(self._events) + len(ends) * EVENT_END.size) as writer:
+            writer.write(BATCH_MAGIC)
+            writer.write(BATCH_COUNT.pack(count))
+            writer.write(ends)
+            writer.write(self._events)
+        frame = out.getvalue()
+
+        try:
+            self.sink(frame)
+        except Exception as exc:
+            # Keep the events; retry on the deadline, not on every add()
+            self.sink_errors += 1
+            self.last_error = exc
+            delay = DEFAULT_BATCH_DELAY if self.max_delay is None else self.max_delay
+            self._retry_at = self._deadline = self._clock() + delay
+            self._cond.notify()
+            raise
+
+        self._events = bytearray()
+        self._ends = array("I")
+        self._deadline = None
+        self._retry_at = None
+
+        self.frames += 1
+        self.bytes_out += len(frame)
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - self._clock()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                else:
+                    try:
+                        self._flush_locked()
+                    except Exception:
+                        pass            # counted; retried at the new deadline
+
+    # ------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------
+    def add(self, event):
+        """
+        Buffer one event (any bytes-like object).
+        """
+        with self._cond:
+            if self._closed:
+                raise ValueError("add to closed EventBatcher")
+
+            if len(self._events) + len(event) > 0xFFFFFFFF:
+                raise ValueError("EventBatcher frame exceeds 4 GB")
+            if self._events and len(self._events) + len(event) > self.max_buffer:
+                raise BufferError(f"EventBatcher holds {len(self._events)} bytes "
+                                  f"the sink did not take ({self.last_error!r})")
+            self._events += event
+            self._ends.append(len(self._events))
+            self.events_in += 1
+            self.bytes_in += len(event)
+
+            if self._deadline is None and self.max_delay is not None:
+                self._deadline = self._clock() + self.max_delay
+                self._cond.notify()
+
+            if ((len(self._events) >= self.max_bytes
+                    or len(self._ends) >= self.max_events)
+                    and (self._retry_at is None or self._clock() >= self._retry_at)):
+                self._flush_locked()
+
+    def poll(self):
+        """
+        Flush if the oldest buffered event has waited max_delay seconds.
+        """
+        with self._cond:
+            if self._deadline is not None and self._clock() >= self._deadline:
+                self._flush_locked()
+
+    def flush(self):
+        with self._cond:
+            self._flush_locked()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==========================================================
+# FRAME DECODE
+# ==========================================================
+
+def iter_events(payload):
+    """
+    Yield the events of a decoded frame payload as memoryviews into it.
+    """
+    view = memoryview(payload)
+    if view[:len(BATCH_MAGIC)] != BATCH_MAGIC:
+        raise ValueError("Not a FASTLOG event batch")
+
+    p = len(BATCH_MAGIC)
+    (count,) = BATCH_COUNT.unpack_from(view, p)
+    p += BATCH_COUNT.size
+
+    table = view[p:p + count * EVENT_END.size]
+    base = p + count * EVENT_END.size
+    if len(table) != count * EVENT_END.size:
+        raise ValueError("Truncated FASTLOG event batch")
+
+    if sys.byteorder == "little":
+        ends = table.cast("I")
+    else:
+        ends = [end for (end,) in EVENT_END.iter_unpack(table)]
+
+    if count and base + ends[count - 1] != len(view):
+        raise ValueError("Corrupt FASTLOG event batch")
+
+    start = 0
+    for end in ends:
+        if end < start:
+            raise ValueError("Corrupt FASTLOG event batch")
+        yield view[base + start:base + end]
+        start = end
+
+def decode_events(blob, core=None, key=None):
+    """
+    Decode one frame written by EventBatcher → list of event memoryviews.
+    """
+    core = _default_core(core, key=key)
+    return list(iter_events(core.decode(blob)))
@@ -1,6 +1,18 @@
-import time
+import json
 import os
+import platform
+import sys
+import time
+
 from fastlog.core import FastLogCore
+from fastlog.corpus import generate
+
+DEFAULT_WARMUP = 1
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.10        # fraction of the baseline
+SYNTHETIC_SIZE = 8 * 1024 * 1024
+
+STAGES = ("compress", "encrypt", "frame", "decode")
 
 def human(n):
     for unit in ["B", "KB", "MB", "GB"]:
@@ -9,52 +21,165 @@ def human(n):
         n /= 1024
     return f"{n:.2f} TB"
 
-def benchmark(path):
-    core = FastLogCore()
-    data = open(path, "rb").read()
-    size_raw = len(data)
+def synthetic_log(size=SYNTHETIC_SIZE, seed=1):
+    """
+    Deterministic nginx access log (see fastlog.corpus), so runs on
+    different hosts and days measure the same bytes.
+    """
+    return generate("nginx", size, seed)
 
-    print("===== FASTLOG BENCHMARK =====")
-    print("File:", path)
-    print("Raw size:", human(size_raw))
-    print("==============================")
+# ==========================================================
+# Measurement
+# ==========================================================
 
-    # Compress only
-    t0 = time.time()
-    compressed = core.warp.compress(data)
-    t1 = time.time()
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
 
-    cr = len(compressed) / size_raw * 100
-    print(f"Hybrid compression: {human(len(compressed))} ({cr:.2f}% of original)")
-    print(f"Compression time: {(t1 - t0):.4f}s ({size_raw / (t1 - t0) / 1e6:.2f} MB/s)")
+def time_stage(fn, warmup=DEFAULT_WARMUP, repeats=DEFAULT_REPEATS):
+    """
+    Run fn() `warmup` times untimed, then `repeats` times timed.
+    Returns (last result, [elapsed ns per run]).
+    """
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter_ns()
+        result = fn()
+        samples.append(time.perf_counter_ns() - t0)
+    return result, samples
 
-    # Encrypt only
-    t2 = time.time()
-    encrypted, nonce = core.dcf.encrypt(compressed)
-    t3 = time.time()
+def summarize(samples, nbytes, ratio):
+    # MB/s at the median run; `nbytes` is the stage's uncompressed side
+    p50 = _percentile(samples, 0.50)
+    return {
+        "runs": len(samples),
+        "p50_ms": p50 / 1e6,
+        "p95_ms": _percentile(samples, 0.95) / 1e6,
+        "p99_ms": _percentile(samples, 0.99) / 1e6,
+        "mb_s": nbytes / max(p50, 1) * 1e3,
+        "bytes": nbytes,
+        "ratio": ratio,
+    }
 
-    print(f"Encryption time: {(t3 - t2):.4f}s ({len(compressed) / (t3 - t2) / 1e6:.2f} MB/s)")
+def bench_data(data, core=None, warmup=DEFAULT_WARMUP, repeats=DEFAULT_REPEATS):
+    """
+    Per-stage results for one (non-empty) input:
+      compress  FASTLOGv2 container (LZ4 only)
+      encrypt   AES-GCM over that container
+      frame     full sealed encode (compress + seal + framing)
+      decode    full sealed decode (MB/s of decoded output)
+    Ratios are output / input bytes of the stage (decode: of the encode).
+    """
+    core = core or FastLogCore(bandit="off")
+    results = {}
 
-    # Full encode
-    t4 = time.time()
-    blob = core.encode(data)
-    t5 = time.time()
+    container, samples = time_stage(
+        lambda: core.warp.compress_stream(data), warmup, repeats)
+    results["compress"] = summarize(samples, len(data), len(container) / len(data))
 
-    print(f"Full FASTLOG encode: {(t5 - t4):.4f}s ({size_raw / (t5 - t4) / 1e6:.2f} MB/s)")
+    (encrypted, _), samples = time_stage(
+        lambda: core.dcf.encrypt(container), warmup, repeats)
+    results["encrypt"] = summarize(samples, len(container), len(encrypted) / len(container))
 
-    # Full decode
-    t6 = time.time()
-    restored = core.decode(blob)
-    t7 = time.time()
+    blob, samples = time_stage(lambda: core.encode(data), warmup, repeats)
+    results["frame"] = summarize(samples, len(data), len(blob) / len(data))
 
-    print(f"Full FASTLOG decode: {(t7 - t6):.4f}s ({size_raw / (t7 - t6) / 1e6:.2f} MB/s)")
-    print("Match:", restored == data)
+    restored, samples = time_stage(lambda: core.decode(blob), warmup, repeats)
+    if restored != data:
+        raise RuntimeError("Benchmark round trip failed")
+    results["decode"] = summarize(samples, len(data), len(blob) / len(data))
 
+    return results
 
-if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 2:
-        print("Usage: python3 benchmark.py <file>")
-        exit(1)
-    benchmark(sys.argv[1])
+def run_benchmarks(paths=(), size=SYNTHETIC_SIZE, warmup=DEFAULT_WARMUP,
+                   repeats=DEFAULT_REPEATS):
+    """
+    Benchmark each file in `paths` (or the synthetic log if none).
+    Returns a JSON-serialisable report.
+    """
+    inputs = []
+    for path in paths:
+        with open(path, "rb") as f:
+            inputs.append((os.path.basename(path), f.read()))
+    if not inputs:
+        inputs = [(f"synthetic-{size}", synthetic_log(size))]
+
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "warmup": warmup,
+        "repeats": repeats,
+        "results": {name: bench_data(data, warmup=warmup, repeats=repeats)
+                    for name, data in inputs},
+    }
+
+# ==========================================================
+# Baselines
+# ==========================================================
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Regressions of `report` against a saved `baseline` report: a stage
+    slower (p50 MB/s) or compressing worse (ratio) by more than
+    `threshold`. Inputs or stages missing from either side are skipped.
+    """
+    regressions = []
+    for name, stages in report["results"].items():
+        for stage, now in stages.items():
+            before = baseline.get("results", {}).get(name, {}).get(stage)
+            if before is None:
+                continue
+            if now["mb_s"] < before["mb_s"] * (1 - threshold):
+                regressions.append(
+                    f"{name} {stage}: {now['mb_s']:.1f} MB/s < baseline {before['mb_s']:.1f} MB/s")
+            if now["ratio"] > before["ratio"] * (1 + threshold):
+                regressions.append(
+                    f"{name} {stage}: ratio {now['ratio']:.4f} > baseline {before['ratio']:.4f}")
+    return regressions
 
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def format_report(report):
+    lines = []
+    for name, stages in report["results"].items():
+        lines.append(f"== {name} ==")
+        for stage in STAGES:
+            r = stages[stage]
+            lines.append(
+                f"{stage:<9} p50 {r['p50_ms']:9.3f} ms  p95 {r['p95_ms']:9.3f} ms  "
+                f"p99 {r['p99_ms']:9.3f} ms  {r['mb_s']:9.1f} MB/s  ratio {r['ratio']:.4f}")
+    return "\n".join(lines)
+
+def main(path=None, warmup=DEFAULT_WARMUP, repeats=DEFAULT_REPEATS, json_path=None,
+         baseline=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Run the harness, print the table, optionally write JSON and gate on a
+    baseline. Returns the list of regressions (empty when none).
+    """
+    paths = [path] if isinstance(path, str) else list(path or ())
+    report = run_benchmarks(paths, warmup=warmup, repeats=repeats)
+    print(format_report(report))
+
+    if json_path:
+        save_report(report, json_path)
+
+    regressions = []
+    if baseline:
+        regressions = compare(report, load_report(baseline), threshold)
+        for r in regressions:
+            print("REGRESSION:", r)
+    return regressions
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(sys.argv[1:]) else 0)
@@ -0,0 +1,56 @@
+import random
+import time
+from fastlog.core import FastLogCore
+from fastlog.batch import EventBatcher, decode_events
+
+def make_events(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        (f"2024-05-01T12:{i % 60:02d}:{rng.randint(0, 59):02d}Z web-{rng.randint(1, 9)} "
+         f"nginx[{rng.randint(1000, 9999)}]: GET /api/v1/items/{rng.randint(1, 99999)} "
+         f"200 {rng.randint(100, 9999)}\n").encode()
+        for i in range(count)
+    ]
+
+def per_event(core, events):
+    t0 = time.perf_counter()
+    blobs = [core.encode(ev) for ev in events]
+    t1 = time.perf_counter()
+    return {
+        "mode": "per-event encode",
+        "events_per_sec": len(events) / (t1 - t0),
+        "bytes_per_event": sum(len(b) for b in blobs) / len(events),
+        "correct": core.decode(blobs[-1]) == events[-1],
+    }
+
+def batched(core, events, max_events):
+    frames = []
+    batcher = EventBatcher(frames.append, core=core, max_events=max_events,
+                           background=False)
+    t0 = time.perf_counter()
+    for ev in events:
+        batcher.add(ev)
+    batcher.close()
+    t1 = time.perf_counter()
+
+    decoded = [bytes(e) for frame in frames for e in decode_events(frame, core)]
+    return {
+        "mode": f"batch of {max_events}",
+        "events_per_sec": len(events) / (t1 - t0),
+        "bytes_per_event": batcher.bytes_out / len(events),
+        "correct": decoded == events,
+    }
+
+def run_benchmarks(count=20_000):
+    core = FastLogCore()
+    events = make_events(count)
+    results = [per_event(core, events[:min(count, 5000)])]
+    for size in (10, 100, 1000, 10_000):
+        results.append(batched(core, events, size))
+    return results
+
+
+if __name__ == "__main__":
+    for r in run_benchmarks():
+        print(f"{r['mode']:<18} {r['events_per_sec']:12.0f} events/s  "
+              f"{r['bytes_per_event']:8.2f} B/event  ok={r['correct']}")
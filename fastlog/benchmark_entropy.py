@@ -0,0 +1,67 @@
+import os
+import time
+from fastlog.warp_adapter import WarpAdapter
+
+BLOCK = 1024 * 1024
+
+def make_text(size):
+    line = b"2024-01-01T00:00:00Z host-01 sshd[4242]: Accepted publickey for user from 10.0.0.1\n"
+    return (line * (size // len(line) + 1))[:size]
+
+def make_mixed(size, random_share):
+    """
+    Interleave 1 MB text and random blocks so that `random_share` of the
+    blocks are incompressible (encrypted / pre-compressed payloads).
+    """
+    out = bytearray()
+    text = make_text(BLOCK)
+    every = round(1 / random_share) if random_share else 0
+    i = 0
+    while len(out) < size:
+        if every and i % every == 0:
+            out += os.urandom(BLOCK)
+        else:
+            out += text
+        i += 1
+    return bytes(out[:size])
+
+def measure(name, data, threshold):
+    warp = WarpAdapter(bandit="off", entropy_threshold=threshold)
+
+    t0 = time.perf_counter()
+    blob = warp.compress_stream(data)
+    t1 = time.perf_counter()
+    out = warp.decompress_stream(blob)
+    t2 = time.perf_counter()
+
+    return {
+        "name": name,
+        "detector": "on" if threshold is not None else "off",
+        "ratio": len(blob) / len(data) * 100,
+        "encode_speed": len(data) / (t1 - t0) / 1e6,
+        "decode_speed": len(data) / (t2 - t1) / 1e6,
+        "correct": out == data,
+    }
+
+def run_benchmarks(size=64 * 1024 * 1024):
+    corpora = [
+        ("Text only", make_mixed(size, 0)),
+        ("25% random", make_mixed(size, 0.25)),
+        ("50% random", make_mixed(size, 0.5)),
+        ("Random only", os.urandom(size)),
+    ]
+
+    results = []
+    for name, data in corpora:
+        for threshold in (None, 7.5):
+            results.append(measure(name, data, threshold))
+    return results
+
+
+if __name__ == "__main__":
+    for r in run_benchmarks():
+        print(f"{r['name']:<12} detector={r['detector']:<3}  "
+              f"ratio {r['ratio']:6.2f}%  "
+              f"encode {r['encode_speed']:9.2f} MB/s  "
+              f"decode {r['decode_speed']:9.2f} MB/s  "
+              f"ok={r['correct']}")
@@ -0,0 +1,79 @@
+import random
+import tempfile
+import threading
+import time
+
+from fastlog.benchmark_upload import StandInServer
+from fastlog.core import FastLogCore
+from fastlog.spool import Spool
+from fastlog.uploader import Uploader
+
+def make_frames(count, size, seed=1):
+    rng = random.Random(seed)
+    lines = b"".join(
+        (f"2024-05-01T12:{i % 60:02d}:{rng.randint(0, 59):02d}Z web-{rng.randint(1, 9)} "
+         f"nginx[{rng.randint(1000, 9999)}]: GET /api/v1/items/{rng.randint(1, 99999)} "
+         f"200 {rng.randint(100, 9999)}\n").encode()
+        for i in range(size // 60)
+    )
+    return [lines[:size]] * count
+
+def encode_only(core, frames, url):
+    t0 = time.perf_counter()
+    for data in frames:
+        core.encode(data)
+    elapsed = time.perf_counter() - t0
+    return elapsed, elapsed
+
+def direct(core, frames, url):
+    # Encoder blocks on every upload
+    with Uploader() as up:
+        t0 = time.perf_counter()
+        for data in frames:
+            up.to_splunk(core.encode(data), url, "token")
+        elapsed = time.perf_counter() - t0
+    return elapsed, elapsed
+
+def spooled(core, frames, url):
+    # Encoder only appends to the spool; the Uploader drains it meanwhile
+    with tempfile.TemporaryDirectory() as path, Spool(path) as spool:
+        stop = threading.Event()
+        with Uploader(max_concurrency=2) as up:
+            drain = threading.Thread(target=up.drain, args=(spool, url),
+                                     kwargs={"stop": stop, "poll": 0.01})
+            drain.start()
+
+            t0 = time.perf_counter()
+            for data in frames:
+                spool.put(core.encode(data))
+            encoded = time.perf_counter() - t0
+
+            while spool.pending():
+                time.sleep(0.005)
+            delivered = time.perf_counter() - t0
+            stop.set()
+            drain.join()
+    return encoded, delivered
+
+def run_benchmarks(count=100, size=1024 * 1024, delay=0.05):
+    core = FastLogCore(bandit="off")
+    frames = make_frames(count, size)
+    mb = count * size / 1e6
+    server = StandInServer(delay=delay)
+    try:
+        return [
+            (mode, mb / encoded, mb / delivered)
+            for mode, (encoded, delivered) in (
+                ("encode only (no sink)", encode_only(core, frames, server.url)),
+                ("encode + upload inline", direct(core, frames, server.url)),
+                ("encode -> spool -> drain", spooled(core, frames, server.url)),
+            )
+        ]
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    print("sink throttled to one reply per 50 ms per connection")
+    for mode, encode_mbps, delivered_mbps in run_benchmarks():
+        print(f"{mode:<26} encode {encode_mbps:8.1f} MB/s   done {delivered_mbps:8.1f} MB/s")
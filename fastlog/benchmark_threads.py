@@ -0,0 +1,78 @@
+import os
+import time
+from fastlog.warp_adapter import WarpAdapter
+
+def make_compressible(size):
+    line = b"2024-01-01T00:00:00Z host-01 sshd[4242]: Accepted publickey for user from 10.0.0.1\n"
+    return (line * (size // len(line) + 1))[:size]
+
+def thread_counts():
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    n = 2
+    while n <= cpus:
+        counts.append(n)
+        n *= 2
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+def measure(data, threads, repeats=3):
+    # Bandit off → every run uses the same block schedule, so the
+    # containers can be compared byte-for-byte across thread counts.
+    warp = WarpAdapter(bandit="off", threads=threads)
+    best = None
+    blob = None
+
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        blob = warp.compress_stream(data)
+        t1 = time.perf_counter()
+        if best is None or (t1 - t0) < best:
+            best = t1 - t0
+
+    best_dec = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        warp.decompress_stream(blob)
+        t1 = time.perf_counter()
+        if best_dec is None or (t1 - t0) < best_dec:
+            best_dec = t1 - t0
+
+    warp.close()
+    return blob, best, best_dec
+
+def run_benchmarks(size=256 * 1024 * 1024):
+    data = make_compressible(size)
+    results = []
+    reference = None
+
+    for threads in thread_counts():
+        blob, elapsed, dec_elapsed = measure(data, threads)
+        if reference is None:
+            reference = blob
+
+        results.append({
+            "threads": threads,
+            "encode_time": elapsed,
+            "encode_speed": len(data) / elapsed / 1e6,
+            "decode_time": dec_elapsed,
+            "decode_speed": len(data) / dec_elapsed / 1e6,
+            "identical": blob == reference,
+        })
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256 * 1024 * 1024
+    base = None
+    for r in run_benchmarks(size):
+        if base is None:
+            base = r["encode_speed"]
+        print(f"threads={r['threads']:<3} "
+              f"encode {r['encode_speed']:10.2f} MB/s  "
+              f"x{r['encode_speed'] / base:5.2f}  "
+              f"decode {r['decode_speed']:10.2f} MB/s  "
+              f"identical={r['identical']}")
@@ -0,0 +1,119 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from fastlog.core import FastLogCore
+from fastlog.uploader import Uploader
+
+# ==========================================================
+# Local HTTP stand-in for Splunk HEC / Elasticsearch
+# ==========================================================
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(parts), True
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0))), False
+
+    def do_POST(self):
+        body, chunked = self._body()
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            fail = server.fail_next > 0
+            if fail:
+                server.fail_next -= 1
+            else:
+                server.bodies.append(body)
+                server.chunked += chunked
+
+        if server.delay:
+            time.sleep(server.delay)
+
+        status, reply = (503, b"busy") if fail else (200, b'{"text":"Success","code":0}')
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP/1.1 server that accepts POSTs (plain or chunked), records
+    the bodies and client connections, and can answer the next `fail_next`
+    requests with 503 or delay every reply (a slow collector).
+    """
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.delay = delay
+        self.fail_next = 0
+        self.requests = 0
+        self.chunked = 0
+        self.bodies = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/services/collector/raw"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+# ==========================================================
+# Benchmark: one connection per blob vs pooled concurrent uploads
+# ==========================================================
+
+def run_benchmarks(count=200, size=64 * 1024, delay=0.005):
+    core = FastLogCore()
+    line = b"2024-05-01T12:00:00Z web-1 nginx: GET /api/v1/items 200 512\n"
+    blob = core.encode((line * (size // len(line) + 1))[:size])
+    results = []
+
+    server = StandInServer(delay=delay)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(count):
+            requests.post(server.url, data=blob)
+        results.append(("requests.post per blob", count / (time.perf_counter() - t0),
+                        len(server.connections)))
+
+        for concurrency in (1, 4, 16):
+            server.connections.clear()
+            with Uploader(max_concurrency=concurrency) as up:
+                t0 = time.perf_counter()
+                futures = [up.submit_splunk(blob, server.url, "token") for _ in range(count)]
+                for f in futures:
+                    f.result()
+                elapsed = time.perf_counter() - t0
+            results.append((f"pooled, {concurrency} concurrent", count / elapsed,
+                            len(server.connections)))
+    finally:
+        server.close()
+    return results
+
+
+if __name__ == "__main__":
+    for mode, rate, conns in run_benchmarks():
+        print(f"{mode:<24} {rate:8.0f} uploads/s  {conns:4d} connections")
@@ -0,0 +1,167 @@
+import fnmatch
+import glob
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .core import FastLogCore
+from .stream import FastLogWriter, FastLogReader, READ_CHUNK
+
+SUFFIX = ".fastlog"
+
+# ==========================================================
+# Job lists
+# ==========================================================
+
+def collect(inputs, pattern="*"):
+    """
+    (path, relative name) for every file under `inputs`: directories are
+    walked recursively for names matching `pattern`, anything else is
+    taken as a glob. Relative names keep the layout below a directory.
+    """
+    found = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in fnmatch.filter(names, pattern):
+                    path = os.path.join(root, name)
+                    found[path] = os.path.relpath(path, item)
+        else:
+            for path in glob.glob(item, recursive=True):
+                if os.path.isfile(path):
+                    found[path] = os.path.basename(path)
+    return list(found.items())
+
+def plan(files, output_dir, suffix=SUFFIX, decode=False):
+    """
+    (src, dst, size) jobs, largest first, so the long files start while
+    the small ones fill the gaps at the end. Raises ValueError, before
+    anything runs, when two inputs would be written to the same output
+    (e.g. `a/app.log` and `b/app.log` from a glob or two directories).
+    """
+    jobs = []
+    sources = {}
+    for path, rel in files:
+        if decode:
+            rel = rel[:-len(suffix)] if rel.endswith(suffix) else rel + ".out"
+        else:
+            rel += suffix
+        dst = os.path.join(output_dir, rel) if output_dir is not None else None
+        if dst is not None:
+            other = sources.setdefault(os.path.normpath(dst), path)
+            if other != path:
+                raise ValueError(f"{other} and {path} would both be written to {dst}")
+        jobs.append((path, dst, os.path.getsize(path)))
+    jobs.sort(key=lambda job: -job[2])
+    return jobs
+
+# ==========================================================
+# Worker side (one FastLogCore per process)
+# ==========================================================
+
+_core = None
+
+def _init_worker(key, core_kwargs):
+    global _core
+    _core = FastLogCore(key=key, **core_kwargs)
+
+def _atomic_copy(src_file, dst, wrap):
+    # Write next to `dst` and rename over it only once complete, so a
+    # crashed or killed run never leaves a truncated output behind.
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = f"{dst}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, "wb") as out:
+            nbytes = wrap(src_file, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return nbytes
+
+def _encode_into(src_file, out, index, bloom):
+    with FastLogWriter(out, core=_core, index=index, bloom=bloom) as writer:
+        shutil.copyfileobj(src_file, writer, READ_CHUNK)
+    return writer.bytes_out
+
+def _decode_into(src_file, out):
+    reader = FastLogReader(src_file, core=_core)
+    total = 0
+    while True:
+        chunk = reader.read(READ_CHUNK)
+        if not chunk:
+            return total
+        if out is not None:
+            out.write(chunk)
+        total += len(chunk)
+
+def _run_job(op, src, dst, index=False, bloom=False):
+    t0 = time.perf_counter()
+    try:
+        with open(src, "rb") as f:
+            if op == "encode":
+                out_bytes = _atomic_copy(f, dst, lambda s, o: _encode_into(s, o, index, bloom))
+            elif dst is None:
+                out_bytes = _decode_into(f, None)       # verify only
+            else:
+                out_bytes = _atomic_copy(f, dst, _decode_into)
+        error = None
+    except Exception as e:
+        out_bytes = 0
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "src": src,
+        "dst": dst,
+        "bytes_in": os.path.getsize(src),
+        "bytes_out": out_bytes,
+        "seconds": time.perf_counter() - t0,
+        "error": error,
+    }
+
+# ==========================================================
+# Pool
+# ==========================================================
+
+def run_jobs(op, jobs, key=None, workers=None, index=False, bloom=False, **core_kwargs):
+    """
+    Run `op` ("encode", "decode" or "verify") over (src, dst, size) jobs
+    on a process pool (one worker per core by default), yielding each
+    file's result dict as it finishes. A failing file is reported in its
+    result ("error") and does not stop the others.
+    """
+    if key is None:
+        # Each worker would otherwise seal with its own random key
+        raise ValueError("Bulk encode / decode needs an explicit key")
+    if op == "verify":
+        op = "decode"
+        jobs = [(src, None, size) for src, _, size in jobs]
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(key, core_kwargs)) as pool:
+        futures = [pool.submit(_run_job, op, src, dst, index, bloom) for src, dst, _ in jobs]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+def summarize(results, seconds, op="encode"):
+    """
+    Aggregate of per-file results over `seconds` of wall time. MB/s is
+    measured on the uncompressed side.
+    """
+    ok = [r for r in results if r["error"] is None]
+    bytes_in = sum(r["bytes_in"] for r in ok)
+    bytes_out = sum(r["bytes_out"] for r in ok)
+    raw = bytes_in if op == "encode" else bytes_out
+    return {
+        "files": len(results),
+        "failed": len(results) - len(ok),
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "seconds": seconds,
+        "mb_s": raw / max(seconds, 1e-9) / 1e6,
+        "worker_seconds": sum(r["seconds"] for r in results),
+    }
@@ -1,21 +1,38 @@
 import argparse
+import contextlib
+import shutil
+import sys
 import time
 import os
+import mmap
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
 from rich import box
 
 from fastlog.core import FastLogCore
-from fastlog.benchmark import benchmark as run_benchmark
+from fastlog.dcf_adapter import load_key
+from fastlog.dictionary import DictionaryStore, train_dictionary, DEFAULT_DICT_SIZE
+from fastlog.warp_adapter import DEFAULT_RESET_INTERVAL
+from fastlog.stream import FastLogWriter, FastLogReader, READ_CHUNK
+from fastlog.follow import Follower, DEFAULT_FOLLOW_BYTES, DEFAULT_FOLLOW_DELAY, DEFAULT_POLL_INTERVAL
+from fastlog.spool import Spool
+from fastlog.archive import FastLogArchive
+from fastlog.search import Searcher
+from fastlog.columnar import ColumnarWriter, ColumnarReader
+from fastlog.dedup import DedupWriter, ChunkStore, decode_dedup_file
+from fastlog.format import COLUMNAR_MAGIC, DEDUP_MAGIC
+from fastlog import benchmark, sweep, bulk
+from fastlog.corpus import CORPUS_TYPES
 
 console = Console()
+err_console = Console(stderr=True)
 
 # ============================================================
 # Helper: Pretty table for stats
 # ============================================================
 
-def show_stats(title, rows):
+def show_stats(title, rows, target=None):
     table = Table(
         title=title,
         box=box.ROUNDED,
@@ -29,83 +46,399 @@ def show_stats(title, rows):
     for k, v in rows.items():
         table.add_row(k, v)
 
-    console.print(table)
+    (target or console).print(table)
 
 
 # ============================================================
-# Encode operation
+# Helper: "-" → stdin / stdout (status output moves to stderr)
 # ============================================================
 
-def run_encode(input_path, output_path, bandit_mode):
-    core = FastLogCore(bandit=bandit_mode)
+def open_input(path):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin.buffer)
+    return open(path, "rb")
+
+def open_output(path):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdout.buffer)
+    return open(path, "w+b")         # readable: dedup decode reads copies back
+
+def status_console(output_path):
+    return err_console if output_path == "-" else console
+
+def read_key(key_file, create=False):
+    return load_key(key_file, create=create) if key_file else None
+
+
+# ============================================================
+# Encode operation
+# ============================================================
 
-    with open(input_path, "rb") as f:
-        data = f.read()
+def run_encode(input_path, output_path, bandit_mode, key_file=None, threads=1, index=False,
+               target_mbps=None, source=None, dictionary=None, dict_dir=None,
+               linked=False, reset_interval=DEFAULT_RESET_INTERVAL, level=9, block_size=None,
+               bloom=False, columnar=False, templates=False, dedup=False, chunk_dir=None):
+    core = FastLogCore(
+        bandit=bandit_mode, threads=threads, key=read_key(key_file, create=True),
+        target_mbps=target_mbps, source=source,
+        dictionary=dictionary, dict_dir=dict_dir,
+        linked=linked, reset_interval=reset_interval,
+        level=level, block_size=block_size,
+    )
+    ui = status_console(output_path)
 
-    console.print(f"[cyan]Encoding [white]{input_path}[/white] → [green]{output_path}[/green][/cyan]")
+    ui.print(f"[cyan]Encoding [white]{input_path}[/white] → [green]{output_path}[/green][/cyan]")
 
     with Progress(
         SpinnerColumn(),
         "[progress.description]{task.description}",
         TimeElapsedColumn(),
-        console=console,
+        console=ui,
         transient=True,
     ) as progress:
 
         task = progress.add_task("[bold green]Compressing & Encrypting...", total=None)
 
         t0 = time.time()
-        blob = core.encode(data)
+        with open_input(input_path) as src, open_output(output_path) as dst:
+            if columnar or templates:
+                writer = ColumnarWriter(dst, core=core, mode="text" if templates else "json")
+            elif dedup or chunk_dir:
+                store = ChunkStore(chunk_dir, core) if chunk_dir else None
+                writer = DedupWriter(dst, core=core, store=store)
+            else:
+                writer = FastLogWriter(dst, core=core, index=index, bloom=bloom)
+            with writer:
+                shutil.copyfileobj(src, writer, READ_CHUNK)
         t1 = time.time()
 
-    with open(output_path, "wb") as f:
-        f.write(blob)
-
-    show_stats("FASTLOGv2 Encode Stats", {
-        "Input Size": f"{len(data)/1024/1024:.2f} MB",
-        "Output Size": f"{len(blob)/1024/1024:.2f} MB",
+    rows = {
+        "Input Size": f"{writer.bytes_in/1024/1024:.2f} MB",
+        "Output Size": f"{writer.bytes_out/1024/1024:.2f} MB",
         "Elapsed Time": f"{t1-t0:.4f}s",
-        "Throughput": f"{len(data)/(t1-t0)/1e6:.2f} MB/s",
-        "Bandit Mode": bandit_mode,
-    })
+        "Throughput": f"{writer.bytes_in/(t1-t0)/1e6:.2f} MB/s",
+        "Bandit Mode": "off" if block_size else bandit_mode,
+    }
+    if isinstance(writer, DedupWriter):
+        rows["Duplicate Chunks"] = (
+            f"{writer.duplicates}/{writer.chunks} "
+            f"({writer.duplicate_bytes/1024/1024:.2f} MB, {writer.store_hits} from store)"
+        )
+    show_stats("FASTLOGv2 Encode Stats", rows, ui)
 
 
 # ============================================================
 # Decode operation
 # ============================================================
 
-def run_decode(input_path, output_path):
-    core = FastLogCore()
-
-    with open(input_path, "rb") as f:
-        blob = f.read()
+def run_decode(input_path, output_path, key_file=None, dict_dir=None, fields=None,
+               chunk_dir=None):
+    core = FastLogCore(key=read_key(key_file), dict_dir=dict_dir)
+    ui = status_console(output_path)
 
-    console.print(f"[cyan]Decoding [white]{input_path}[/white] → [green]{output_path}[/green][/cyan]")
+    ui.print(f"[cyan]Decoding [white]{input_path}[/white] → [green]{output_path}[/green][/cyan]")
 
     with Progress(
         SpinnerColumn(),
         "[progress.description]{task.description}",
         TimeElapsedColumn(),
-        console=console,
+        console=ui,
         transient=True,
     ) as progress:
 
         task = progress.add_task("[bold blue]Decrypting & Decompressing...", total=None)
 
         t0 = time.time()
-        raw = core.decode(blob)
+        with open_input(input_path) as src, open_output(output_path) as dst:
+            magic = src.peek(len(COLUMNAR_MAGIC))[:len(COLUMNAR_MAGIC)]
+            if magic == COLUMNAR_MAGIC:
+                # Columnar: the directory is at the end → whole file
+                if input_path == "-":
+                    blob = src.read()
+                else:
+                    blob = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+                reader = ColumnarReader(blob, core=core)
+                for data in reader.iter_groups(fields):
+                    dst.write(data)
+                bytes_out = reader.bytes_out
+            elif fields is not None:
+                err_console.print("[red]--fields needs a columnar file (`fastlog encode --columnar`)")
+                sys.exit(1)
+            elif magic == DEDUP_MAGIC:
+                # Copies are read back from the output file; to stdout the
+                # whole output is kept in memory instead
+                store = ChunkStore(chunk_dir, core) if chunk_dir else None
+                bytes_out = decode_dedup_file(src, dst, core=core, store=store)
+            else:
+                reader = FastLogReader(src, core=core)
+                for block in reader.iter_blocks():
+                    dst.write(block)
+                bytes_out = reader.bytes_out
         t1 = time.time()
 
-    with open(output_path, "wb") as f:
-        f.write(raw)
-
     show_stats("FASTLOGv2 Decode Stats", {
-        "Output Size": f"{len(raw)/1024/1024:.2f} MB",
+        "Output Size": f"{bytes_out/1024/1024:.2f} MB",
+        "Elapsed Time": f"{t1-t0:.4f}s",
+        "Throughput": f"{bytes_out/(t1-t0)/1e6:.2f} MB/s",
+    }, ui)
+
+
+# ============================================================
+# Grep operation
+# ============================================================
+
+def run_grep(pattern, paths, key_file=None, fixed=False, ignore_case=False, word=False,
+             byte_offset=False, count=False, threads=None, stats=False):
+    core = FastLogCore(key=read_key(key_file))
+    threads = threads or os.cpu_count() or 1
+    out = sys.stdout.buffer
+    found = 0
+    rows = {}
+
+    t0 = time.time()
+    for path in paths:
+        prefix = path.encode() + b":" if len(paths) > 1 else b""
+        with FastLogArchive(path, core=core) as arc:
+            searcher = Searcher(arc, pattern, fixed, ignore_case, word, threads)
+            n = 0
+            for offset, line in searcher:
+                n += 1
+                if not count:
+                    at = b"%d:" % offset if byte_offset else b""
+                    out.write(prefix + at + line + b"\n")
+            if count:
+                out.write(prefix + b"%d\n" % n)
+            found += n
+            rows[path] = f"{searcher.decoded}/{searcher.blocks} blocks decoded, {n} matches"
+    out.flush()
+    t1 = time.time()
+
+    if stats:
+        rows["Elapsed Time"] = f"{t1-t0:.4f}s"
+        show_stats("FASTLOGv2 Grep Stats", rows, err_console)
+    if not found:
+        sys.exit(1)
+
+
+# ============================================================
+# Train operation
+# ============================================================
+
+def run_train(input_paths, dict_size=DEFAULT_DICT_SIZE, dict_dir=None, output_path=None):
+    # Every line of every sample file is one training event
+    samples = []
+    for path in input_paths:
+        with open_input(path) as src:
+            samples.extend(src.read().splitlines(keepends=True))
+
+    t0 = time.time()
+    data = train_dictionary(samples, dict_size=dict_size)
+    t1 = time.time()
+
+    store = DictionaryStore(dict_dir)
+    ident = store.add(data)
+    if output_path:
+        with open(output_path, "wb") as f:
+            f.write(data)
+
+    show_stats("FASTLOG Dictionary", {
+        "Samples": str(len(samples)),
+        "Dictionary Size": f"{len(data)} bytes",
+        "Dictionary ID": f"{ident:08x}",
+        "Stored At": store.path(ident),
+        "Elapsed Time": f"{t1-t0:.4f}s",
+    })
+
+
+# ============================================================
+# Benchmark operation
+# ============================================================
+
+def run_bench(paths, warmup=benchmark.DEFAULT_WARMUP, repeats=benchmark.DEFAULT_REPEATS,
+              size=benchmark.SYNTHETIC_SIZE, json_path=None, baseline=None,
+              threshold=benchmark.DEFAULT_THRESHOLD):
+    report = benchmark.run_benchmarks(paths, size=size, warmup=warmup, repeats=repeats)
+
+    for name, stages in report["results"].items():
+        table = Table(title=f"FASTLOG Benchmark: {name}", box=box.ROUNDED,
+                      style="cyan", title_style="bold yellow")
+        for column in ("Stage", "p50 ms", "p95 ms", "p99 ms", "MB/s", "Ratio"):
+            table.add_column(column, style="magenta" if column == "Stage" else "white")
+        for stage in benchmark.STAGES:
+            r = stages[stage]
+            table.add_row(stage, f"{r['p50_ms']:.3f}", f"{r['p95_ms']:.3f}",
+                          f"{r['p99_ms']:.3f}", f"{r['mb_s']:.1f}", f"{r['ratio']:.4f}")
+        console.print(table)
+
+    if json_path:
+        benchmark.save_report(report, json_path)
+
+    if baseline:
+        regressions = benchmark.compare(report, benchmark.load_report(baseline), threshold)
+        for r in regressions:
+            console.print(f"[red]REGRESSION[/red] {r}")
+        if regressions:
+            sys.exit(1)
+        console.print(f"[green]No regression beyond {threshold:.0%} of {baseline}")
+
+
+# ============================================================
+# Follow (tail) operation
+# ============================================================
+
+def run_follow(path, output_path=None, spool_dir=None, key_file=None, checkpoint=None,
+               max_bytes=DEFAULT_FOLLOW_BYTES, max_delay=DEFAULT_FOLLOW_DELAY,
+               poll_interval=DEFAULT_POLL_INTERVAL, from_end=False, once=False):
+    core = FastLogCore(key=read_key(key_file, create=True))
+
+    with contextlib.ExitStack() as stack:
+        if spool_dir is not None:
+            spool = stack.enter_context(Spool(spool_dir))
+
+            def sink(frame):
+                spool.put(frame)
+                spool.flush()       # durable before the checkpoint moves
+        else:
+            out = stack.enter_context(open(output_path, "ab"))
+
+            def sink(frame):
+                out.write(frame)
+                out.flush()
+                os.fsync(out.fileno())
+
+        follower = stack.enter_context(Follower(
+            path, sink, core=core, checkpoint=checkpoint, max_bytes=max_bytes,
+            max_delay=max_delay, poll_interval=poll_interval, from_end=from_end,
+        ))
+        console.print(f"[cyan]Following [white]{path}[/white] → "
+                      f"[green]{spool_dir or output_path}[/green] (Ctrl-C to stop)[/cyan]")
+
+        t0 = time.time()
+        try:
+            if once:
+                follower.poll()
+            else:
+                follower.run()
+        except KeyboardInterrupt:
+            pass
+        follower.flush()
+        t1 = time.time()
+
+    show_stats("FASTLOGv2 Follow Stats", {
+        "Input Size": f"{follower.bytes_in/1024/1024:.2f} MB",
+        "Output Size": f"{follower.bytes_out/1024/1024:.2f} MB",
+        "Frames": str(follower.frames),
+        "Rotations": str(follower.rotations),
+        "Truncations": str(follower.truncations),
         "Elapsed Time": f"{t1-t0:.4f}s",
-        "Throughput": f"{len(raw)/(t1-t0)/1e6:.2f} MB/s",
     })
 
 
+# ============================================================
+# Bulk (directory / glob) operations
+# ============================================================
+
+def run_bulk(op, inputs, output_dir=None, key_file=None, workers=None, pattern=None,
+             quiet=False, **core_kwargs):
+    decode = op != "encode"
+    pattern = pattern or ("*" + bulk.SUFFIX if decode else "*")
+    try:
+        jobs = bulk.plan(bulk.collect(inputs, pattern), output_dir, decode=decode)
+    except ValueError as e:
+        console.print(f"[red]{e}")
+        sys.exit(1)
+    if not jobs:
+        console.print("[red]No input files found.")
+        sys.exit(1)
+
+    key = read_key(key_file, create=op == "encode")
+    total = sum(size for _, _, size in jobs)
+    console.print(f"[cyan]{op.capitalize()} [white]{len(jobs)}[/white] files "
+                  f"({total/1024/1024:.2f} MB) on {workers or os.cpu_count()} processes[/cyan]")
+
+    results = []
+    t0 = time.time()
+    with Progress(
+        SpinnerColumn(),
+        "[progress.description]{task.description}",
+        "{task.completed}/{task.total}",
+        TimeElapsedColumn(),
+        console=console,
+        transient=True,
+    ) as progress:
+        task = progress.add_task(f"[bold green]{op.capitalize()}...", total=len(jobs))
+        for r in bulk.run_jobs(op, jobs, key=key, workers=workers, **core_kwargs):
+            results.append(r)
+            progress.advance(task)
+            if r["error"] is not None:
+                progress.console.print(f"[red]FAILED[/red] {r['src']}: {r['error']}")
+            elif not quiet:
+                progress.console.print(
+                    f"[green]OK[/green] {r['src']} {r['bytes_in']/1024/1024:.2f} MB → "
+                    f"{r['bytes_out']/1024/1024:.2f} MB in {r['seconds']:.3f}s")
+    summary = bulk.summarize(results, time.time() - t0, op)
+
+    show_stats(f"FASTLOGv2 Bulk {op.capitalize()} Stats", {
+        "Files": str(summary["files"]),
+        "Failed": str(summary["failed"]),
+        "Input Size": f"{summary['bytes_in']/1024/1024:.2f} MB",
+        "Output Size": f"{summary['bytes_out']/1024/1024:.2f} MB",
+        "Elapsed Time": f"{summary['seconds']:.4f}s",
+        "Throughput": f"{summary['mb_s']:.2f} MB/s",
+        "Worker Time": f"{summary['worker_seconds']:.4f}s",
+    })
+    if summary["failed"]:
+        sys.exit(1)
+
+
+# ============================================================
+# Config sweep
+# ============================================================
+
+def run_sweep(kinds, size=sweep.SWEEP_SIZE, seed=1, levels=sweep.SWEEP_LEVELS,
+              min_mbps=None, json_path=None, top=5):
+    with Progress(
+        SpinnerColumn(),
+        "[progress.description]{task.description}",
+        TimeElapsedColumn(),
+        console=console,
+        transient=True,
+    ) as progress:
+        task = progress.add_task("[bold green]Sweeping...", total=None)
+
+        def step(kind, config):
+            bandit, bs, level = config
+            progress.update(task, description=f"[bold green]{kind}: {bandit} "
+                                              f"{bs or 'auto'} level {level}")
+
+        report = sweep.run_sweep(kinds, size=size, seed=seed, levels=levels,
+                                 min_mbps=min_mbps, progress=step)
+
+    for kind, rows in report["results"].items():
+        table = Table(title=f"FASTLOG Sweep: {kind}", box=box.ROUNDED,
+                      style="cyan", title_style="bold yellow")
+        for column in ("Bandit", "Block", "Level", "Ratio", "Encode MB/s", "Decode MB/s", "Score"):
+            table.add_column(column, style="magenta" if column == "Bandit" else "white")
+        for r in sorted(rows, key=lambda r: -r["score"])[:top]:
+            table.add_row(r["bandit"], str(r["block_size"] or "auto"), str(r["level"]),
+                          f"{r['ratio']:.4f}", f"{r['mb_s']:.1f}", f"{r['decode_mb_s']:.1f}",
+                          f"{r['score']:.4f}")
+        console.print(table)
+
+    table = Table(title="Recommended configuration", box=box.ROUNDED,
+                  style="cyan", title_style="bold yellow")
+    table.add_column("Corpus", style="magenta")
+    table.add_column("fastlog encode", style="green")
+    table.add_column("Ratio", style="white")
+    table.add_column("Encode MB/s", style="white")
+    for kind, r in report["recommended"].items():
+        table.add_row(kind, sweep.config_flags(r), f"{r['ratio']:.4f}", f"{r['mb_s']:.1f}")
+    console.print(table)
+
+    if json_path:
+        benchmark.save_report(report, json_path)
+
+
 # ============================================================
 # CLI
 # ============================================================
@@ -117,30 +450,178 @@ def main():
 
     # Encode
     enc = sub.add_parser("encode")
-    enc.add_argument("input")
-    enc.add_argument("output")
-    enc.add_argument("--bandit", choices=["one", "full", "off"], default="one")
+    enc.add_argument("input", help="input file, or - for stdin")
+    enc.add_argument("output", help="output file, or - for stdout")
+    enc.add_argument("--bandit", choices=["one", "full", "ucb", "thompson", "off"],
+                     default="one")
+    enc.add_argument("--threads", type=int, default=1, help="compression workers (0 = one per core)")
+    enc.add_argument("--key-file", help="32-byte AES key (created if missing)")
+    enc.add_argument("--index", action="store_true", help="append a block index for random access")
+    enc.add_argument("--target-mbps", type=float, help="pick LZ4 levels per block to sustain this rate")
+    enc.add_argument("--source", help="data source name; bandit state is kept per source across runs")
+    enc.add_argument("--dict", type=lambda v: int(v, 16), help="dictionary ID (hex) from `fastlog train`")
+    enc.add_argument("--dict-dir", help="dictionary store directory")
+    enc.add_argument("--linked", action="store_true",
+                     help="let each block reference the previous 64 KB (better ratio on small blocks)")
+    enc.add_argument("--reset-interval", type=int, default=DEFAULT_RESET_INTERVAL,
+                     help="bytes between independent reset blocks in --linked mode")
+    enc.add_argument("--level", type=int, default=9,
+                     help="LZ4 HC level (1-12), or <= 0 for LZ4 fast with acceleration -level")
+    enc.add_argument("--block-size", type=int, help="fixed block size in bytes (disables the bandit)")
+    enc.add_argument("--bloom", action="store_true",
+                     help="store a token Bloom filter per block so `fastlog grep` can skip blocks")
+    enc.add_argument("--columnar", action="store_true",
+                     help="JSON lines: store each field as its own column (decode --fields reads a subset)")
+    enc.add_argument("--templates", action="store_true",
+                     help="free-text logs: store lines as mined templates plus variable columns")
+    enc.add_argument("--dedup", action="store_true",
+                     help="store repeated content-defined chunks once, as references "
+                          "(decoding to stdout keeps the whole output in memory)")
+    enc.add_argument("--chunk-dir",
+                     help="shared chunk store: dedup across every archive encoded with it (implies --dedup)")
 
     # Decode
     dec = sub.add_parser("decode")
-    dec.add_argument("input")
-    dec.add_argument("output")
+    dec.add_argument("input", help="input file, or - for stdin")
+    dec.add_argument("output", help="output file, or - for stdout")
+    dec.add_argument("--key-file", help="32-byte AES key used to encode")
+    dec.add_argument("--dict-dir", help="dictionary store directory")
+    dec.add_argument("--fields", type=lambda v: v.split(","),
+                     help="columnar files: only these comma-separated key paths, one JSON object per line")
+    dec.add_argument("--chunk-dir", help="chunk store the archive was encoded with (--chunk-dir)")
+
+    # Grep
+    grep = sub.add_parser("grep")
+    grep.add_argument("pattern", help="regular expression (or a literal with -F)")
+    grep.add_argument("files", nargs="+", help="sealed FASTLOG files")
+    grep.add_argument("-F", "--fixed-strings", action="store_true", help="pattern is a literal")
+    grep.add_argument("-i", "--ignore-case", action="store_true")
+    grep.add_argument("-w", "--word-regexp", action="store_true", help="match whole words only")
+    grep.add_argument("-b", "--byte-offset", action="store_true",
+                      help="prefix lines with their uncompressed byte offset")
+    grep.add_argument("-c", "--count", action="store_true", help="print match counts only")
+    grep.add_argument("--key-file", help="32-byte AES key used to encode")
+    grep.add_argument("--threads", type=int, help="decode / scan workers (default: one per core)")
+    grep.add_argument("--stats", action="store_true", help="print blocks decoded / skipped to stderr")
+
+    # Train
+    train = sub.add_parser("train")
+    train.add_argument("samples", nargs="+", help="sample log files (one event per line), or -")
+    train.add_argument("--size", type=int, default=DEFAULT_DICT_SIZE, help="dictionary size in bytes")
+    train.add_argument("--dict-dir", help="dictionary store directory")
+    train.add_argument("--output", help="also write the dictionary to this file")
 
     # Benchmark
     bench = sub.add_parser("bench")
-    bench.add_argument("file")
+    bench.add_argument("files", nargs="*", help="inputs (default: synthetic log)")
+    bench.add_argument("--warmup", type=int, default=benchmark.DEFAULT_WARMUP)
+    bench.add_argument("--repeats", type=int, default=benchmark.DEFAULT_REPEATS)
+    bench.add_argument("--size", type=int, default=benchmark.SYNTHETIC_SIZE,
+                       help="synthetic input size in bytes")
+    bench.add_argument("--json", help="write the results to this JSON file")
+    bench.add_argument("--baseline", help="JSON results to compare against; exit 1 on regression")
+    bench.add_argument("--threshold", type=float, default=benchmark.DEFAULT_THRESHOLD,
+                       help="allowed slowdown / ratio growth vs the baseline (fraction)")
+
+    # Follow
+    fol = sub.add_parser("follow")
+    fol.add_argument("input", help="log file to tail (may be rotated or truncated)")
+    dest = fol.add_mutually_exclusive_group(required=True)
+    dest.add_argument("-o", "--output", help="append sealed frames to this file (`fastlog decode` and `fastlog grep` read it)")
+    dest.add_argument("--spool", help="put sealed frames into this spool directory")
+    fol.add_argument("--key-file", required=True, help="32-byte AES key (created if missing)")
+    fol.add_argument("--checkpoint", help="resume position file (written after every frame)")
+    fol.add_argument("--max-bytes", type=int, default=DEFAULT_FOLLOW_BYTES, help="frame size")
+    fol.add_argument("--max-delay", type=float, default=DEFAULT_FOLLOW_DELAY,
+                     help="seconds before buffered bytes are flushed")
+    fol.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL, help="poll interval (seconds)")
+    fol.add_argument("--from-end", action="store_true", help="without a checkpoint, skip existing content")
+    fol.add_argument("--once", action="store_true", help="encode what is there, then exit")
+
+    # Bulk encode / decode
+    enc_dir = sub.add_parser("encode-dir")
+    enc_dir.add_argument("inputs", nargs="+", help="directories (walked recursively) or globs")
+    enc_dir.add_argument("-o", "--output-dir", required=True,
+                         help="outputs as <relative path>.fastlog, written atomically")
+    enc_dir.add_argument("--key-file", required=True, help="32-byte AES key (created if missing)")
+    enc_dir.add_argument("--workers", type=int, help="processes (default: one per core)")
+    enc_dir.add_argument("--pattern", help="file name pattern inside directories (default: *)")
+    enc_dir.add_argument("--bandit", choices=["one", "full", "ucb", "thompson", "off"],
+                         default="one")
+    enc_dir.add_argument("--level", type=int, default=9)
+    enc_dir.add_argument("--block-size", type=int, help="fixed block size in bytes")
+    enc_dir.add_argument("--index", action="store_true", help="append a block index to every output")
+    enc_dir.add_argument("--bloom", action="store_true", help="store token Bloom filters for `fastlog grep`")
+    enc_dir.add_argument("--quiet", action="store_true", help="no per-file lines")
+
+    dec_dir = sub.add_parser("decode-dir")
+    dec_dir.add_argument("inputs", nargs="+", help="directories (walked recursively) or globs")
+    out = dec_dir.add_mutually_exclusive_group(required=True)
+    out.add_argument("-o", "--output-dir", help="decoded files, .fastlog suffix removed")
+    out.add_argument("--verify", action="store_true",
+                     help="authenticate and decode every file without writing it")
+    dec_dir.add_argument("--key-file", required=True, help="32-byte AES key used to encode")
+    dec_dir.add_argument("--workers", type=int, help="processes (default: one per core)")
+    dec_dir.add_argument("--pattern", help="file name pattern inside directories (default: *.fastlog)")
+    dec_dir.add_argument("--dict-dir", help="dictionary store directory")
+    dec_dir.add_argument("--quiet", action="store_true", help="no per-file lines")
+
+    # Sweep
+    sw = sub.add_parser("sweep")
+    sw.add_argument("--corpus", nargs="+", choices=list(CORPUS_TYPES), default=list(CORPUS_TYPES),
+                    help="generated log types to sweep")
+    sw.add_argument("--size", type=int, default=sweep.SWEEP_SIZE, help="corpus size per type in bytes")
+    sw.add_argument("--seed", type=int, default=1)
+    sw.add_argument("--levels", type=int, nargs="+", default=list(sweep.SWEEP_LEVELS))
+    sw.add_argument("--min-mbps", type=float,
+                    help="recommend the best ratio encoding at least this fast (default: bandit score)")
+    sw.add_argument("--top", type=int, default=5, help="configurations shown per corpus")
+    sw.add_argument("--json", help="write all results to this JSON file")
 
     args = parser.parse_args()
 
     if args.cmd == "encode":
-        run_encode(args.input, args.output, args.bandit)
+        run_encode(args.input, args.output, args.bandit, args.key_file, args.threads, args.index,
+                   args.target_mbps, args.source, args.dict, args.dict_dir,
+                   args.linked, args.reset_interval, args.level, args.block_size, args.bloom,
+                   args.columnar, args.templates, args.dedup, args.chunk_dir)
+
+    elif args.cmd == "grep":
+        run_grep(args.pattern, args.files, args.key_file, args.fixed_strings, args.ignore_case,
+                 args.word_regexp, args.byte_offset, args.count, args.threads, args.stats)
 
     elif args.cmd == "decode":
-        run_decode(args.input, args.output)
+        run_decode(args.input, args.output, args.key_file, args.dict_dir, args.fields,
+                   args.chunk_dir)
+
+    elif args.cmd == "train":
+        run_train(args.samples, args.size, args.dict_dir, args.output)
 
     elif args.cmd == "bench":
-        run_benchmark(args.file)
+        run_bench(args.files, args.warmup, args.repeats, args.size,
+                  args.json, args.baseline, args.threshold)
+
+    elif args.cmd == "follow":
+        run_follow(args.input, args.output, args.spool, args.key_file, args.checkpoint,
+                   args.max_bytes, args.max_delay, args.poll, args.from_end, args.once)
+
+    elif args.cmd == "encode-dir":
+        run_bulk("encode", args.inputs, args.output_dir, args.key_file, args.workers,
+                 args.pattern, args.quiet, index=args.index, bloom=args.bloom, bandit=args.bandit,
+                 level=args.level, block_size=args.block_size)
+
+    elif args.cmd == "decode-dir":
+        run_bulk("verify" if args.verify else "decode", args.inputs, args.output_dir,
+                 args.key_file, args.workers, args.pattern, args.quiet,
+                 dict_dir=args.dict_dir)
+
+    elif args.cmd == "sweep":
+        run_sweep(args.corpus, args.size, args.seed, args.levels,
+                  args.min_mbps, args.json, args.top)
 
     else:
-        console.print("[red]No command provided. Use encode, decode, or bench.")
+        console.print("[red]No command provided. Use encode, decode, grep, follow, encode-dir, decode-dir, train, bench or sweep.")
+
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+import io
+import json
+import re
+import struct
+from array import array
+from collections import Counter
+
+import warphybrid
+
+from .format import (
+    BLOCK_HEADER, NONCE_SIZE, TAG_SIZE, BLOCK_FINAL, BLOCK_INDEX, INDEX_TRAILER,
+    COLUMNAR_MAGIC, COLUMN_MAGIC, COLUMN_TEXT, COLUMN_INT, COLUMN_FIXED,
+)
+from .stream import _default_core
+from .templates import TemplateMiner
+
+ROW_GROUP_BYTES = 4 * 1024 * 1024      # input bytes per row group
+MAX_TEMPLATES = 4096                   # distinct line shapes; later ones are stored raw
+RAW = 0                                # template / column of lines kept whole
+MAX_DIGITS = 18                        # longest digit run stored as an integer
+MODES = ("json", "text")
+
+# Key (string + colon) in a line shape (see warphybrid.json_split)
+_KEY = re.compile(rb'"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\r]*:')
+
+# ==========================================================
+# Line templates
+# ==========================================================
+
+class _Template:
+    """
+    One line shape: the text between values (keys, punctuation, spacing)
+    as a %-format, and the column of each value slot.
+    """
+
+    def __init__(self, fmt, columns):
+        self.fmt = fmt                  # bytes %-format, one %b per value
+        self.columns = columns          # column ID per value slot
+
+    def to_json(self):
+        return [self.fmt.decode("latin-1"), self.columns]
+
+    @classmethod
+    def from_json(cls, item):
+        fmt, columns = item
+        return cls(fmt.encode("latin-1"), columns)
+
+def _paths(shape):
+    # Dotted key path of every value slot, from the keys and the brackets
+    # around it ("http": {"status": 200} → http.status; array items belong
+    # to the array's key). Only picks columns: any answer round-trips.
+    stack = []              # (path component, key to restore) per open bracket
+    key = None
+    paths = []
+
+    def walk(text):
+        nonlocal key
+        for c in text:
+            if c == 0x7B:                       # {
+                stack.append((key, key))
+                key = None
+            elif c == 0x5B:                     # [
+                stack.append((None, key))
+            elif c in (0x7D, 0x5D) and stack:   # } ]
+                key = stack.pop()[1]
+
+    pieces = shape.split(b"\n")
+    for n, piece in enumerate(pieces):
+        pos = 0
+        for m in _KEY.finditer(piece):
+            walk(piece[pos:m.start()])
+            key = m.group(1)
+            pos = m.end()
+        walk(piece[pos:])
+        if n < len(pieces) - 1:
+            parts = [part for part, _ in stack if part is not None]
+            if key is not None:
+                parts.append(key)
+            paths.append(b".".join(parts).decode("latin-1"))
+    return paths
+
+def _raw_template():
+    return _Template(b"%b", [RAW])
+
+def _escape(text):
+    return text.replace(b"%", b"%%").replace(b"\n", b"%b")
+
+# A shape's plan maps its values onto its template's slots, which take
+# them in order: per slot (format, first value, value count), format
+# None for a slot that is just one value. No plan: one slot per value.
+
+def _columns(values, n, lines, plan):
+    # Slot columns of `lines` lines of one shape, from their values (n
+    # per line, line after line): whole columns at a time, so only slots
+    # with text around their values are formatted line by line.
+    if plan is None:
+        return [values[j::n] for j in range(n)]
+    columns = []
+    for fmt, first, m in plan:
+        if fmt is None:
+            columns.append(values[first::n])
+        elif m == 0:
+            columns.append([fmt % ()] * lines)
+        elif m == 1:
+            columns.append(list(map(fmt.__mod__, values[first::n])))
+        else:
+            parts = [values[first + k::n] for k in range(m)]
+            columns.append(list(map(fmt.__mod__, zip(*parts))))
+    return columns
+
+# ==========================================================
+# Column encodings
+# ==========================================================
+
+def _pack_column(values):
+    # (data, kind, struct code, digits) of a column block: integers when
+    # every value is a short run of digits that formats back exactly.
+    packed = warphybrid.digit_column(values, MAX_DIGITS)
+    if packed is None:
+        return b"\n".join(values), COLUMN_TEXT, None, 0
+    data, code, width, fixed = packed
+    return data, COLUMN_FIXED if fixed else COLUMN_INT, code, width
+
+def _unpack_column(data, kind, code, digits):
+    if kind == COLUMN_TEXT:
+        return data.split(b"\n")
+    ints = struct.unpack(f"<{len(data) // struct.calcsize(code)}{code}", data)
+    if kind == COLUMN_FIXED:
+        return [b"%0*d" % (digits, v) for v in ints]
+    return [b"%d" % v for v in ints]
+
+# ==========================================================
+# Encoder
+# ==========================================================
+
+class ColumnarWriter(io.RawIOBase):
+    """
+    File-like encoder for newline-delimited JSON. Each line is split into
+    its template (keys, punctuation, spacing) and values; values go to one
+    column per key path, and every ROW_GROUP_BYTES of input the shape and
+    column streams of the group are compressed and sealed as blocks of a
+    COLUMNAR container (see format.py), on the core's worker threads.
+    Columns of plain integers are stored in binary.
+
+    With mode="text" the lines are free text (syslog, Windows events, ...):
+    the variables are the word runs holding a digit, and line shapes are
+    clustered into templates by a TemplateMiner, the tokens that differ
+    between the shapes of a cluster becoming variables too. Columns are
+    then named "<cluster>.<token>[.<n>]".
+
+    Decoding restores the input byte for byte. Lines that are not JSON
+    objects (in json mode), or arrive after MAX_TEMPLATES templates, are
+    kept whole.
+    """
+
+    def __init__(self, fileobj, core=None, row_group_bytes=ROW_GROUP_BYTES, mode="json"):
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"Unknown columnar mode: {mode!r}")
+        self.core = _default_core(core)
+        self.row_group_bytes = row_group_bytes
+        self.mode = mode
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rows = 0
+
+        self._fp = fileobj
+        self._warp = self.core.warp
+        self._dcf = self.core.dcf
+        self._pending = bytearray()
+        self._index = 0
+
+        self._fields = [None]                   # column ID → key path (RAW has none)
+        self._field_ids = {}
+        self._templates = [_raw_template()]
+        self._shapes = {}                       # line shape → (template ID, values, plan)
+        self._groups = []
+        if mode == "text":
+            self._group = warphybrid.text_group
+            self._miner = TemplateMiner()
+            self._cluster_templates = {}        # (cluster, version) → template ID
+        else:
+            self._group = warphybrid.json_group
+
+        self._shape = []
+        self._rows = {}                         # template ID → values per slot
+        self._group_bytes = 0
+
+        self._nonce = self._dcf.new_nonce()
+        self._write_raw(COLUMNAR_MAGIC)
+        self._write_raw(self._nonce)
+
+    def writable(self):
+        return True
+
+    def _write_raw(self, data):
+        self._fp.write(data)
+        self.bytes_out += len(data)
+
+    # ------------------------------------------------------
+    # Lines
+    # ------------------------------------------------------
+    def _new_template(self, fmt, names):
+        if len(self._templates) >= MAX_TEMPLATES:
+            return None
+        columns = []
+        for name in names:
+            c = self._field_ids.get(name)
+            if c is None:
+                c = self._field_ids[name] = len(self._fields)
+                self._fields.append(name)
+            columns.append(c)
+        self._templates.append(_Template(fmt, columns))
+        return len(self._templates) - 1
+
+    def _text_template(self, cluster):
+        # Literal tokens keep their placeholders as slots; a wildcard
+        # token is one slot.
+        key = (cluster.id, cluster.version)
+        if key in self._cluster_templates:
+            return self._cluster_templates[key]
+        fmt, names = [], []
+        for i, token in enumerate(cluster.tokens):
+            if i:
+                fmt.append(cluster.separators[i - 1])
+            if token is None:
+                fmt.append(b"%b")
+                names.append(f"{cluster.id}.{i}")
+            else:
+                fmt.append(_escape(token))
+                names += [f"{cluster.id}.{i}.{k}" for k in range(token.count(b"\n"))]
+        t = self._cluster_templates[key] = self._new_template(b"".join(fmt), names)
+        return t
+
+    def _new_shape(self, shape):
+        n = shape.count(b"\n")
+        if self.mode == "json":
+            t = self._new_template(_escape(shape), _paths(shape))
+            plan = None
+        else:
+            cluster, tokens = self._miner.add(shape)
+            t = self._text_template(cluster)
+            plan = []
+            first = 0
+            for token, literal in zip(tokens, cluster.tokens):
+                m = token.count(b"\n")
+                if literal is not None:
+                    if m:
+                        plan += [(None, first + k, 1) for k in range(m)]
+                elif token == b"\n":
+                    plan.append((None, first, 1))
+                else:
+                    plan.append((_escape(token), first, m))
+                first += m
+            if all(fmt is None for fmt, _, _ in plan):
+                plan = None
+        if t is None:
+            # Out of templates: keep the line whole
+            return RAW, n, [(_escape(shape), 0, n)]
+        return t, n, plan
+
+    def _add_lines(self, data):
+        # warphybrid groups the lines by shape, so the values are mapped
+        # onto template slots once per distinct shape (see _columns). The
+        # lines of a template then join its columns in line order: merged
+        # by warphybrid.interleave when several shapes share the template.
+        shapes, counts, rows, values = self._group(data)
+        rows = memoryview(rows).cast("I")
+        known = self._shapes
+        templates = []
+        places = []                             # shape → position in its batch
+        batches = {}                            # template ID → [columns per shape]
+        for s, shape in enumerate(shapes):
+            if shape is None:
+                t, n, plan = RAW, 1, None
+            else:
+                entry = known.get(shape)
+                if entry is None:
+                    entry = known[shape] = self._new_shape(shape)
+                t, n, plan = entry
+            batch = batches.setdefault(t, [])
+            templates.append(t)
+            places.append(len(batch))
+            batch.append(_columns(values[s], n, counts[s], plan))
+        self._shape.extend(map(templates.__getitem__, rows))
+
+        orders = {t: array("I") for t, batch in batches.items() if len(batch) > 1}
+        if orders:
+            for s in rows:
+                order = orders.get(templates[s])
+                if order is not None:
+                    order.append(places[s])
+
+        for t, batch in batches.items():
+            slots = self._rows.get(t)
+            if slots is None:
+                slots = self._rows[t] = [[] for _ in self._templates[t].columns]
+            if len(batch) == 1:
+                for slot, column in zip(slots, batch[0]):
+                    slot += column
+                continue
+            for j, slot in enumerate(slots):
+                slot += warphybrid.interleave(orders[t], [columns[j] for columns in batch])
+        self._group_bytes += len(data)
+
+    # ------------------------------------------------------
+    # Row groups
+    # ------------------------------------------------------
+    def _seal_block(self, index, data):
+        # Runs on a worker thread when threads > 1
+        warp = self._warp
+        dst = bytearray(warp.block_bound(len(data)))
+        n, field, _ = warp._compress_block(data, dst, 0, warp._next_level())
+        header = BLOCK_HEADER.pack(len(data), n + TAG_SIZE, field)
+        with memoryview(dst) as view:
+            return header, self._dcf.seal_block(self._nonce, index, header, view[:n])
+
+    def _flush_group(self):
+        if not self._shape:
+            return
+        # Per template (in ID order) and value slot, the slot's values of
+        # every line; a column is those runs concatenated, in that order.
+        columns = {}
+        for t in sorted(self._rows):
+            for c, values in zip(self._templates[t].columns, self._rows[t]):
+                columns.setdefault(c, []).extend(values)
+
+        blocks = [(-1, struct.pack(f"<{len(self._shape)}H", *self._shape), COLUMN_TEXT, None, 0)]
+        blocks += [(c, *_pack_column(columns[c])) for c in sorted(columns)]
+
+        first = self._index
+        self._index += len(blocks)
+        jobs = [(first + i, block[1]) for i, block in enumerate(blocks)]
+        if self._warp.threads > 1 and len(jobs) > 1:
+            sealed = list(self._warp._executor().map(lambda job: self._seal_block(*job), jobs))
+        else:
+            sealed = [self._seal_block(*job) for job in jobs]
+
+        offsets = []
+        for (c, _, kind, code, digits), (header, payload) in zip(blocks, sealed):
+            if kind == COLUMN_TEXT:
+                offsets.append([c, self.bytes_out])
+            else:
+                offsets.append([c, self.bytes_out, kind, code, digits])
+            self._write_raw(header)
+            self._write_raw(payload)
+        self._groups.append({"rows": len(self._shape), "blocks": offsets})
+
+        self.rows += len(self._shape)
+        self._shape = []
+        self._rows = {}
+        self._group_bytes = 0
+
+    # ------------------------------------------------------
+    # File API
+    # ------------------------------------------------------
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed ColumnarWriter")
+        n = len(data)
+        self._pending += data
+        while True:
+            # Whole lines up to the end of the row group (or one line past
+            # it, when a single line is longer than what is left)
+            room = max(self.row_group_bytes - self._group_bytes, 1)
+            end = self._pending.rfind(b"\n", 0, room)
+            if end < 0:
+                end = self._pending.find(b"\n", room)
+                if end < 0:
+                    break
+            chunk = bytes(self._pending[:end + 1])
+            del self._pending[:end + 1]
+            self._add_lines(chunk)
+            if self._group_bytes >= self.row_group_bytes:
+                self._flush_group()
+        self.bytes_in += n
+        return n
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            newline = not self._pending
+            if self._pending:
+                self._add_lines(bytes(self._pending))
+                self._pending.clear()
+            self._flush_group()
+
+            directory = json.dumps({
+                "version": 1,
+                "mode": self.mode,
+                "rows": self.rows,
+                "newline": newline,
+                "fields": self._fields,
+                "templates": [tpl.to_json() for tpl in self._templates],
+                "groups": self._groups,
+            }, separators=(",", ":")).encode()
+
+            final_at = self.bytes_out
+            header = BLOCK_HEADER.pack(0, len(directory) + TAG_SIZE, BLOCK_FINAL | BLOCK_INDEX)
+            self._write_raw(header)
+            self._write_raw(self._dcf.seal_block(self._nonce, self._index, header, directory))
+            self._write_raw(INDEX_TRAILER.pack(final_at, self._index, COLUMN_MAGIC))
+            if hasattr(self._fp, "flush"):
+                self._fp.flush()
+        finally:
+            super().close()
+
+# ==========================================================
+# Decoder
+# ==========================================================
+
+def _projection(tpl, wanted, names):
+    # (format, slot order) of a template's projected line: requested
+    # fields in request order, repeated slots (array items) as an array.
+    by_field = {}
+    for slot, c in enumerate(tpl.columns):
+        if c in wanted:
+            by_field.setdefault(c, []).append(slot)
+    parts = []
+    order = []
+    for c in wanted:
+        slots = by_field.get(c)
+        if not slots:
+            continue
+        name = b'"' + names[c].encode("latin-1").replace(b"%", b"%%") + b'":'
+        if len(slots) == 1:
+            parts.append(name + b"%b")
+        else:
+            parts.append(name + b"[" + b",".join([b"%b"] * len(slots)) + b"]")
+        order += slots
+    return b"{" + b",".join(parts) + b"}", order
+
+class ColumnarReader:
+    """
+    Decoder for a COLUMNAR container held in memory (bytes, mmap, ...).
+    `fields` lists the key paths (column names in text mode) found in the
+    lines. read() restores the
+    encoded bytes; read(fields=[...]) decodes only the shape blocks and the
+    requested columns and returns one JSON object per line with just
+    those fields (in the requested order).
+    """
+
+    def __init__(self, blob, core=None, key=None):
+        self.core = _default_core(core, key=key)
+        view = memoryview(blob)
+        if view[:len(COLUMNAR_MAGIC)] != COLUMNAR_MAGIC:
+            raise ValueError("Not a columnar FASTLOG container")
+        p = len(COLUMNAR_MAGIC)
+        self._nonce = bytes(view[p:p+NONCE_SIZE])
+        self._view = view
+
+        final_at, count, magic = INDEX_TRAILER.unpack_from(view, len(view) - INDEX_TRAILER.size)
+        if magic != COLUMN_MAGIC:
+            raise ValueError("Invalid columnar FASTLOG trailer")
+        header = view[final_at:final_at+BLOCK_HEADER.size]
+        _, clen, field = BLOCK_HEADER.unpack(header)
+        if not (field & BLOCK_FINAL and field & BLOCK_INDEX):
+            raise ValueError("Invalid columnar FASTLOG directory")
+        p = final_at + BLOCK_HEADER.size
+        directory = json.loads(self.core.dcf.open_block(self._nonce, count, header, view[p:p+clen]))
+
+        self.rows = directory["rows"]
+        self.mode = directory.get("mode", "json")
+        self.bytes_out = 0
+        self._newline = directory["newline"]
+        self._names = directory["fields"]
+        self._templates = [_Template.from_json(item) for item in directory["templates"]]
+        self._groups = directory["groups"]
+        self.fields = [name for name in self._names if name is not None]
+
+        # Blocks are numbered in file order for their nonces
+        self._numbers = {}
+        n = 0
+        for group in self._groups:
+            for entry in group["blocks"]:
+                self._numbers[entry[1]] = n
+                n += 1
+
+    def _open(self, hoff):
+        view = self._view
+        header = view[hoff:hoff+BLOCK_HEADER.size]
+        bs, clen, field = BLOCK_HEADER.unpack(header)
+        p = hoff + BLOCK_HEADER.size
+        payload = self.core.dcf.open_block(self._nonce, self._numbers[hoff], header, view[p:p+clen])
+        return self.core.warp.decode_block(payload, field, bs)
+
+    def _decode_blocks(self, hoffs):
+        warp = self.core.warp
+        if warp.threads > 1 and len(hoffs) > 1:
+            return list(warp._executor().map(self._open, hoffs))
+        return [self._open(h) for h in hoffs]
+
+    def _group_lines(self, group, wanted):
+        blocks = [entry for entry in group["blocks"]
+                  if entry[0] == -1 or wanted is None or entry[0] in wanted]
+        decoded = self._decode_blocks([entry[1] for entry in blocks])
+        shape = struct.unpack(f"<{group['rows']}H", decoded[0])
+        columns = {}
+        for entry, data in zip(blocks[1:], decoded[1:]):
+            kind, code, digits = entry[2:] if len(entry) > 2 else (COLUMN_TEXT, None, 0)
+            columns[entry[0]] = _unpack_column(data, kind, code, digits)
+        cursors = dict.fromkeys(columns, 0)
+
+        # Same (template, slot) order the writer laid the columns out in
+        lines = {}
+        for t, n in sorted(Counter(shape).items()):
+            tpl = self._templates[t]
+            slots = []
+            for c in tpl.columns:
+                if c in cursors:
+                    pos = cursors[c]
+                    slots.append(columns[c][pos:pos+n])
+                    cursors[c] = pos + n
+                else:
+                    slots.append(None)
+            if wanted is None:
+                fmt, order = tpl.fmt, range(len(slots))
+            else:
+                fmt, order = _projection(tpl, wanted, self._names)
+            if order:
+                lines[t] = iter([fmt % row for row in zip(*[slots[k] for k in order])])
+            else:
+                lines[t] = iter([fmt % ()] * n)
+        return map(next, map(lines.__getitem__, shape))
+
+    def iter_groups(self, fields=None):
+        """
+        Decoded bytes per row group (see read()).
+        """
+        wanted = None
+        if fields is not None:
+            ids = {name: c for c, name in enumerate(self._names) if name is not None}
+            wanted = [ids[f] for f in fields if f in ids]
+        last = len(self._groups) - 1
+        for g, group in enumerate(self._groups):
+            data = b"\n".join(self._group_lines(group, wanted))
+            if g < last or self._newline or wanted is not None:
+                data += b"\n"
+            self.bytes_out += len(data)
+            yield data
+
+    def read(self, fields=None):
+        return b"".join(self.iter_groups(fields))
+
+
+def encode_columnar(data, core=None, row_group_bytes=ROW_GROUP_BYTES, mode="json"):
+    out = io.BytesIO()
+    with ColumnarWriter(out, core=core, row_group_bytes=row_group_bytes, mode=mode) as writer:
+        writer.write(data)
+    return out.getvalue()
+
+def decode_columnar(blob, core=None, fields=None):
+    return ColumnarReader(blob, core=core).read(fields)
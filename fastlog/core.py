@@ -1,19 +1,129 @@
-from .warp_adapter import WarpAdapter
+import io
+import time
+
+from .warp_adapter import WarpAdapter, DEFAULT_RESET_INTERVAL
 from .dcf_adapter import DCFAdapter
+from .format import (
+    BLOCK_HEADER, SEALED_MAGIC, NONCE_SIZE, BLOCK_FINAL,
+    BLOCK_INDEX, INDEX_TRAILER, LINK_WINDOW, BLOCK_STORED, field_level,
+    COLUMNAR_MAGIC, DEDUP_MAGIC,
+)
+from .stats import Stats
 
 class FastLogCore:
-    def __init__(self, bandit="one"):
-        self.warp = WarpAdapter(bandit=bandit)
-        self.dcf = DCFAdapter()
+    def __init__(self, bandit="one", threads=1, key=None,
+                 target_mbps=None, latency_budget=None, source=None, state_dir=None,
+                 dictionary=None, dict_dir=None, linked=False,
+                 reset_interval=DEFAULT_RESET_INTERVAL, level=9, block_size=None,
+                 stats=None):
+        self.warp = WarpAdapter(
+            bandit=bandit, level=level, threads=threads, block_size=block_size,
+            target_mbps=target_mbps, latency_budget=latency_budget,
+            source=source, state_dir=state_dir,
+            dictionary=dictionary, dict_dir=dict_dir,
+            linked=linked, reset_interval=reset_interval,
+        )
+        self.dcf = DCFAdapter(key)
+
+        # Opt-in instrumentation (fastlog.stats): True for a Stats of this
+        # core, or a Stats shared with other cores. last_stats holds the
+        # CallStats of the latest encode / decode.
+        self.stats = Stats() if stats is True else (stats or None)
+        self.last_stats = None
 
-    def encode(self, data: bytes) -> bytes:
-        cstream = self.warp.compress_stream(data)
-        enc, nonce = self.dcf.encrypt(cstream)
-        return nonce + enc
+    def encode(self, data: bytes, index=False, bloom=False) -> bytes:
+        from .stream import FastLogWriter
+
+        out = io.BytesIO()
+        with FastLogWriter(out, core=self, index=index, size_hint=len(data),
+                           bloom=bloom) as writer:
+            writer.write(data)
+        return out.getvalue()
 
     def decode(self, blob: bytes) -> bytes:
+        if blob[:len(SEALED_MAGIC)] == SEALED_MAGIC:
+            return self._decode_sealed(blob)
+        if blob[:len(COLUMNAR_MAGIC)] == COLUMNAR_MAGIC:
+            from .columnar import decode_columnar
+            return decode_columnar(blob, core=self)
+        if blob[:len(DEDUP_MAGIC)] == DEDUP_MAGIC:
+            from .dedup import decode_dedup
+            return decode_dedup(blob, core=self)
+
+        # Legacy: nonce + AES-GCM(FASTLOGv2 container)
         nonce = blob[:12]
         enc = blob[12:]
         dec = self.dcf.decrypt(enc, nonce)
         return self.warp.decompress_stream(dec)
 
+    # ======================================================
+    # SEALED container decode
+    # ======================================================
+    def _sealed_table(self, view):
+        p = len(SEALED_MAGIC)
+        nonce = view[p:p+NONCE_SIZE]
+        p += NONCE_SIZE
+
+        table = []
+        dst = 0
+
+        while True:
+            if p + BLOCK_HEADER.size > len(view):
+                raise ValueError("Truncated FASTLOG container")
+            bs, clen, field = BLOCK_HEADER.unpack_from(view, p)
+            table.append((p, p + BLOCK_HEADER.size, clen, dst, bs, field))
+            p += BLOCK_HEADER.size + clen
+            dst += bs
+            if field & BLOCK_FINAL:
+                if field & BLOCK_INDEX:
+                    p += INDEX_TRAILER.size
+                break
+
+        if p != len(view):
+            raise ValueError("Truncated or trailing data in FASTLOG container")
+
+        return nonce, table, dst
+
+    def _decode_sealed(self, blob):
+        stats = None
+        if self.stats is not None:
+            stats = self.stats.start("decode")
+            t0 = time.perf_counter_ns()
+
+        view = memoryview(blob)
+        nonce, table, total = self._sealed_table(view)
+        out = bytearray(total)
+
+        if stats is not None:
+            stats.add("frame", time.perf_counter_ns() - t0)
+            stats.alloc(total)
+
+        def run(i, first):
+            h, src, clen, dst, bs, field = table[i]
+            if stats is not None:
+                t0 = time.perf_counter_ns()
+            payload = self.dcf.open_block(
+                nonce, i, view[h:h+BLOCK_HEADER.size], view[src:src+clen]
+            )
+            if stats is not None:
+                t1 = time.perf_counter_ns()
+                stats.add("decrypt", t1 - t0)
+            if not bs:
+                return
+            start = max(table[first][3], dst - LINK_WINDOW)
+            with memoryview(out) as mv:
+                n = self.warp.decode_block_into(payload, field, out, dst, bs, mv[start:dst])
+            if n != bs:
+                raise RuntimeError("Block decompress failed")
+            if stats is not None:
+                stats.add("decompress", time.perf_counter_ns() - t1)
+                stats.block(bs, field_level(field), field & BLOCK_STORED)
+
+        self.warp._map_groups([entry[5] for entry in table], run)
+
+        if stats is not None:
+            stats.bytes_in = len(blob)
+            stats.bytes_out = total
+            self.stats.finish(stats)
+            self.last_stats = stats
+        return out
@@ -0,0 +1,233 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+# Default corpus start time, so the same seed gives the same bytes
+EPOCH = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# ==========================================================
+# Shared vocabulary
+# ==========================================================
+
+HOSTS = [f"{role}-{i:02d}" for role in ("web", "api", "db", "cache", "auth") for i in range(1, 9)]
+USERS = ["root", "admin", "deploy", "svc-backup", "jenkins", "alice", "bob", "carol",
+         "dave", "erin", "frank", "grace", "heidi", "ivan", "judy", "mallory"]
+SERVICES = ["checkout", "cart", "search", "auth", "payments", "inventory", "profile", "gateway"]
+PATHS = ["/", "/index.html", "/login", "/logout", "/api/v1/items", "/api/v1/items/{id}",
+         "/api/v1/users/{id}", "/api/v1/orders/{id}", "/api/v2/search?q={word}",
+         "/static/app.{hex}.js", "/static/style.{hex}.css", "/favicon.ico", "/healthz",
+         "/metrics", "/cart/add?sku={id}", "/images/{id}.jpg"]
+WORDS = ["error", "timeout", "shoes", "laptop", "coffee", "book", "phone", "chair",
+         "camera", "socks", "lamp", "desk", "watch", "bag", "pen", "cup"]
+AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "curl/8.5.0",
+    "python-requests/2.31.0",
+    "Googlebot/2.1 (+http://www.google.com/bot.html)",
+    "kube-probe/1.29",
+]
+STATUS = (200, 200, 200, 200, 200, 200, 204, 301, 302, 304, 304, 400, 401, 403, 404, 404, 500, 502, 503)
+
+class _Source:
+    """
+    Seeded random source with the skewed picks real logs show: a few
+    hosts, users and URLs make up most lines (Zipf-like weights), and
+    timestamps only move forward.
+    """
+
+    def __init__(self, seed, rate=200.0):
+        self.rng = random.Random(seed)
+        self.now = EPOCH
+        self.rate = rate            # mean events per second
+        self._weights = {}
+
+    def tick(self):
+        self.now += timedelta(seconds=self.rng.expovariate(self.rate))
+        return self.now
+
+    def pick(self, items):
+        weights = self._weights.get(len(items))
+        if weights is None:
+            weights = self._weights[len(items)] = [1.0 / (i + 1) for i in range(len(items))]
+        return self.rng.choices(items, weights)[0]
+
+    def ip(self, internal=False):
+        rng = self.rng
+        if internal:
+            return f"10.{rng.randint(0, 3)}.{rng.randint(0, 15)}.{rng.randint(1, 254)}"
+        # Clients come back: most addresses are drawn from a small pool
+        if rng.random() < 0.8:
+            n = int(rng.paretovariate(1.2)) % 4096
+            return f"{(n * 97) % 223 + 1}.{(n * 31) % 256}.{(n * 7) % 256}.{n % 254 + 1}"
+        return f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+    def hex(self, digits):
+        return f"{self.rng.getrandbits(4 * digits):0{digits}x}"
+
+    def path(self):
+        path = self.pick(PATHS)
+        return path.format(id=int(self.rng.paretovariate(0.8)) % 100000,
+                           word=self.pick(WORDS), hex=self.hex(8))
+
+# ==========================================================
+# Line formats
+# ==========================================================
+
+def syslog_line(src):
+    # RFC 3164: <PRI>Mmm dd hh:mm:ss host program[pid]: message
+    rng = src.rng
+    t = src.tick()
+    host = src.pick(HOSTS)
+    kind = rng.random()
+    if kind < 0.35:
+        prog, pri = "sshd", 38
+        user = src.pick(USERS)
+        if rng.random() < 0.7:
+            msg = (f"Accepted publickey for {user} from {src.ip()} port {rng.randint(1024, 65535)} "
+                   f"ssh2: ED25519 SHA256:{src.hex(16)}")
+        else:
+            msg = (f"Failed password for invalid user {user} from {src.ip()} "
+                   f"port {rng.randint(1024, 65535)} ssh2")
+    elif kind < 0.55:
+        prog, pri = "CRON", 78
+        msg = f"({src.pick(USERS)}) CMD (/usr/local/bin/{src.pick(SERVICES)}-job.sh >/dev/null 2>&1)"
+    elif kind < 0.75:
+        prog, pri = "systemd", 30
+        msg = f"{rng.choice(('Started', 'Stopping', 'Stopped'))} {src.pick(SERVICES)}.service."
+    elif kind < 0.9:
+        prog, pri = "kernel", 4
+        msg = (f"[{(t - EPOCH).total_seconds() + 86400:.6f}] TCP: request_sock_TCP: "
+               f"Possible SYN flooding on port {rng.choice((80, 443, 8080))}. Sending cookies.")
+    else:
+        prog, pri = "sudo", 86
+        msg = (f"{src.pick(USERS)} : TTY=pts/{rng.randint(0, 9)} ; PWD=/home/{src.pick(USERS)} ; "
+               f"USER=root ; COMMAND=/usr/bin/systemctl restart {src.pick(SERVICES)}")
+    pid = "" if prog == "kernel" else f"[{rng.randint(300, 65000)}]"
+    return (f"<{pri}>{MONTHS[t.month - 1]} {t.day:2d} {t:%H:%M:%S} {host} "
+            f"{prog}{pid}: {msg}\n")
+
+def json_line(src):
+    # Structured application log, one JSON object per line
+    rng = src.rng
+    t = src.tick()
+    status = src.pick(STATUS)
+    level = "error" if status >= 500 else "warn" if status >= 400 else "info"
+    return (
+        f'{{"ts":"{t:%Y-%m-%dT%H:%M:%S}.{t.microsecond // 1000:03d}Z","level":"{level}",'
+        f'"service":"{src.pick(SERVICES)}","host":"{src.pick(HOSTS)}",'
+        f'"trace_id":"{src.hex(32)}","span_id":"{src.hex(16)}",'
+        f'"method":"{rng.choice(("GET", "GET", "GET", "POST", "PUT", "DELETE"))}",'
+        f'"path":"{src.path()}","status":{status},'
+        f'"latency_ms":{rng.lognormvariate(3, 1):.2f},'
+        f'"user_id":{int(rng.paretovariate(1.0)) % 50000},'
+        f'"msg":"request {"failed" if status >= 400 else "completed"}"}}\n'
+    )
+
+CEF_EVENTS = [
+    (100, "Allowed connection", 2, "allow"),
+    (101, "Blocked connection", 5, "deny"),
+    (200, "Port scan detected", 7, "alert"),
+    (300, "Malware signature match", 9, "quarantine"),
+    (400, "Policy violation", 4, "alert"),
+]
+
+def cef_line(src):
+    # ArcSight CEF over syslog
+    rng = src.rng
+    t = src.tick()
+    sig, name, severity, act = src.pick(CEF_EVENTS)
+    millis = int((t - datetime(1970, 1, 1, tzinfo=timezone.utc)).total_seconds() * 1000)
+    return (
+        f"{MONTHS[t.month - 1]} {t.day:2d} {t:%H:%M:%S} fw-{rng.randint(1, 3):02d} "
+        f"CEF:0|Acme|NGFW|9.1.3|{sig}|{name}|{severity}|"
+        f"rt={millis} src={src.ip()} spt={rng.randint(1024, 65535)} "
+        f"dst={src.ip(internal=True)} dpt={rng.choice((22, 53, 80, 443, 443, 443, 3389, 8443))} "
+        f"proto={rng.choice(('TCP', 'TCP', 'TCP', 'UDP'))} act={act} "
+        f"suser={src.pick(USERS)} cs1Label=Rule cs1=rule-{src.pick(list(range(1, 41)))} "
+        f"cn1Label=Bytes cn1={int(rng.lognormvariate(7, 2))}\n"
+    )
+
+def nginx_line(src):
+    # nginx "combined" access log
+    rng = src.rng
+    t = src.tick()
+    method = rng.choice(("GET", "GET", "GET", "GET", "POST", "HEAD"))
+    status = src.pick(STATUS)
+    size = 0 if status in (204, 304) else int(rng.lognormvariate(8, 1.5))
+    referer = "-" if rng.random() < 0.4 else f"https://shop.example.com{src.path()}"
+    return (
+        f'{src.ip()} - - [{t.day:02d}/{MONTHS[t.month - 1]}/{t:%Y:%H:%M:%S} +0000] '
+        f'"{method} {src.path()} HTTP/1.1" {status} {size} "{referer}" "{src.pick(AGENTS)}"\n'
+    )
+
+WINDOWS_EVENTS = [
+    (4624, "An account was successfully logged on."),
+    (4634, "An account was logged off."),
+    (4625, "An account failed to log on."),
+    (4672, "Special privileges assigned to new logon."),
+    (4688, "A new process has been created."),
+    (4720, "A user account was created."),
+]
+LOGON_TYPES = (3, 3, 3, 2, 10, 5)
+
+def windows_line(src):
+    # Security event log as forwarded by NXLog / Snare (tab separated)
+    rng = src.rng
+    t = src.tick()
+    event_id, text = src.pick(WINDOWS_EVENTS)
+    user = src.pick(USERS)
+    host = src.pick(HOSTS).upper()
+    return (
+        f"{t:%Y-%m-%d %H:%M:%S}\t{host}.corp.example.com\tMicrosoft-Windows-Security-Auditing\t"
+        f"{event_id}\t{'Failure' if event_id == 4625 else 'Success'} Audit\t{text}\t"
+        f"Subject: Security ID: S-1-5-21-{3000000000 + USERS.index(user)}-{1000 + USERS.index(user)}"
+        f"  Account Name: {user}  Account Domain: CORP  Logon ID: 0x{src.hex(6).upper()}\t"
+        f"Logon Type: {rng.choice(LOGON_TYPES)}\t"
+        f"Process Name: C:\\Windows\\System32\\{rng.choice(('svchost.exe', 'lsass.exe', 'winlogon.exe', 'powershell.exe'))}\t"
+        f"Source Network Address: {src.ip(internal=True)}  Source Port: {rng.randint(49152, 65535)}\n"
+    )
+
+CORPUS_TYPES = {
+    "syslog": syslog_line,
+    "json": json_line,
+    "cef": cef_line,
+    "nginx": nginx_line,
+    "windows": windows_line,
+}
+
+# ==========================================================
+# Public API
+# ==========================================================
+
+def iter_lines(kind, seed=1):
+    """
+    Endless, deterministic stream of `kind` log lines (bytes).
+    """
+    line = CORPUS_TYPES[kind]
+    src = _Source(seed)
+    while True:
+        yield line(src).encode()
+
+def generate(kind, size, seed=1):
+    """
+    Exactly `size` bytes of `kind` logs (the last line may be cut).
+    The same (kind, size, seed) gives the same bytes on every host.
+    """
+    if kind not in CORPUS_TYPES:
+        raise ValueError(f"Unknown corpus type {kind!r} (one of {', '.join(CORPUS_TYPES)})")
+    lines = []
+    total = 0
+    for line in iter_lines(kind, seed):
+        if total >= size:
+            break
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)[:size]
@@ -1,6 +1,26 @@
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import os
 
+def load_key(path, create=False):
+    """
+    Read a raw 32-byte AES-256 key from `path`. With create=True a missing
+    key file is generated (mode 0600) so encode/decode runs can share it.
+    """
+    if create and not os.path.exists(path):
+        key = AESGCM.generate_key(bit_length=256)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    with open(path, "rb") as f:
+        key = f.read()
+
+    if len(key) != 32:
+        raise ValueError(f"Invalid key file {path}: expected 32 bytes")
+    return key
+
 class DCFAdapter:
     def __init__(self, key: bytes = None):
         self.key = key or AESGCM.generate_key(bit_length=256)
@@ -15,3 +35,26 @@ class DCFAdapter:
     def decrypt(self, ciphertext: bytes, nonce: bytes) -> bytes:
         return self.cipher.decrypt(nonce, ciphertext, None)
 
+    # ------------------------------------------------------
+    # Per-block sealing (see SEALED container in format.py)
+    # ------------------------------------------------------
+    def new_nonce(self) -> bytes:
+        return os.urandom(12)
+
+    def block_nonce(self, base_nonce: bytes, index: int) -> bytes:
+        # XOR the block index into the low 64 bits (TLS 1.3 style)
+        counter = int.from_bytes(base_nonce[4:], "big") ^ index
+        return bytes(base_nonce[:4]) + counter.to_bytes(8, "big")
+
+    def seal_block(self, base_nonce, index, header, payload) -> bytes:
+        return self.cipher.encrypt(self.block_nonce(base_nonce, index), payload, header)
+
+    def open_block(self, base_nonce, index, header, sealed) -> bytes:
+        return self.cipher.decrypt(self.block_nonce(base_nonce, index), sealed, header)
+
+    # ------------------------------------------------------
+    # Incremental AES-GCM for legacy nonce + encrypt() blobs
+    # ------------------------------------------------------
+    def decryptor(self, nonce: bytes):
+        # Plaintext from update() is unauthenticated until finalize_with_tag()
+        return Cipher(algorithms.AES(self.key), modes.GCM(nonce)).decryptor()
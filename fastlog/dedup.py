@@ -0,0 +1,288 @@
+import hashlib
+import io
+import os
+from collections import OrderedDict
+
+import warphybrid
+
+from .format import (
+    DEDUP_MAGIC, DEDUP_RECORD, DEDUP_OFFSET, DEDUP_LITERAL, DEDUP_COPY, DEDUP_CHUNK,
+    FINGERPRINT_SIZE,
+)
+from .stream import FastLogReader, FastLogWriter, READ_CHUNK, _default_core, _read_exact
+
+MIN_CHUNK = 1024
+AVG_CHUNK = 4096
+MAX_CHUNK = 32 * 1024
+DEFAULT_INDEX_BYTES = 64 * 1024 * 1024      # fingerprint table memory cap
+INDEX_ENTRY_BYTES = 192                     # CPython cost of one table entry (measured)
+
+def fingerprint(chunk, key):
+    """
+    Keyed 128-bit chunk fingerprint: equal chunks match only under the
+    same key, so fingerprints cannot confirm guessed plaintext.
+    """
+    return hashlib.blake2b(chunk, digest_size=FINGERPRINT_SIZE, key=key,
+                           person=b"fastlog-chunk").digest()
+
+# ==========================================================
+# Shared chunk store
+# ==========================================================
+
+class ChunkStore:
+    """
+    Directory of chunks shared by dedup archives, named by fingerprint
+    (<fp[:2]>/<fp>.chunk). Each chunk is kept as a sealed FASTLOG
+    container under the core's key, so the store reveals no more than
+    the archives do. Archives that refer to a chunk need it to decode,
+    so nothing is ever removed. Defaults to $FASTLOG_CHUNK_DIR or
+    ~/.cache/fastlog/chunks.
+    """
+
+    def __init__(self, chunk_dir=None, core=None):
+        self.chunk_dir = chunk_dir or os.environ.get(
+            "FASTLOG_CHUNK_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "fastlog", "chunks"),
+        )
+        self.core = _default_core(core)
+
+    def path(self, fp):
+        name = fp.hex()
+        return os.path.join(self.chunk_dir, name[:2], f"{name}.chunk")
+
+    def __contains__(self, fp):
+        return os.path.exists(self.path(fp))
+
+    def add(self, fp, chunk):
+        path = self.path(fp)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self.core.encode(chunk))
+            os.replace(tmp, path)
+
+    def load(self, fp):
+        try:
+            with open(self.path(fp), "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            raise KeyError(f"Unknown FASTLOG chunk {fp.hex()}") from None
+        chunk = bytes(self.core.decode(blob))
+        if fingerprint(chunk, self.core.dcf.key) != fp:
+            raise ValueError(f"Corrupt FASTLOG chunk {fp.hex()}")
+        return chunk
+
+# ==========================================================
+# Encoder
+# ==========================================================
+
+class DedupWriter(io.RawIOBase):
+    """
+    File-like encoder that stores repeated content once. Input is cut into
+    content-defined chunks (warphybrid.cdc_chunks, so an insertion only
+    moves the cut points around it); a chunk whose fingerprint is in the
+    table becomes a reference to its first copy, the rest go out as
+    literals. The record stream is then compressed and sealed by a
+    FastLogWriter behind DEDUP_MAGIC (see format.py).
+
+    The fingerprint table is an LRU capped at `max_index_bytes`: the
+    least recently seen chunks are forgotten first (`evictions`). With a
+    ChunkStore, chunks found there become references to it, and new ones
+    are added, so repeats across archives sharing the store are stored
+    once too.
+    """
+
+    def __init__(self, fileobj, core=None, store=None, min_size=MIN_CHUNK,
+                 avg_size=AVG_CHUNK, max_size=MAX_CHUNK, max_index_bytes=DEFAULT_INDEX_BYTES):
+        super().__init__()
+        if not 0 < min_size <= avg_size <= max_size:
+            raise ValueError("Chunk sizes need 0 < min_size <= avg_size <= max_size")
+        self.core = _default_core(core)
+        self.store = store
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.bytes_in = 0
+        self.chunks = 0
+        self.duplicates = 0
+        self.duplicate_bytes = 0
+        self.store_hits = 0
+        self.evictions = 0
+
+        self._key = self.core.dcf.key
+        self._table = OrderedDict()             # fingerprint → offset of first copy
+        self._max_entries = max(1, max_index_bytes // INDEX_ENTRY_BYTES)
+        self._offset = 0                        # decoded offset of the next chunk
+        self._pending = bytearray()
+        self._literal = bytearray()
+
+        fileobj.write(DEDUP_MAGIC)
+        self._inner = FastLogWriter(fileobj, core=self.core)
+
+    @property
+    def bytes_out(self):
+        return len(DEDUP_MAGIC) + self._inner.bytes_out
+
+    def writable(self):
+        return True
+
+    # ------------------------------------------------------
+    # Records
+    # ------------------------------------------------------
+    def _flush_literal(self):
+        if self._literal:
+            self._inner.write(DEDUP_RECORD.pack(DEDUP_LITERAL, len(self._literal)))
+            self._inner.write(self._literal)
+            self._literal.clear()
+
+    def _reference(self, record, n):
+        self._flush_literal()
+        self._inner.write(record)
+        self.duplicates += 1
+        self.duplicate_bytes += n
+
+    def _add_chunk(self, chunk):
+        n = len(chunk)
+        fp = fingerprint(chunk, self._key)
+        table = self._table
+        at = table.get(fp)
+        if at is not None:
+            table.move_to_end(fp)
+            self._reference(DEDUP_RECORD.pack(DEDUP_COPY, n) + DEDUP_OFFSET.pack(at), n)
+        elif self.store is not None and fp in self.store:
+            self.store_hits += 1
+            self._reference(DEDUP_RECORD.pack(DEDUP_CHUNK, n) + fp, n)
+        else:
+            table[fp] = self._offset
+            if len(table) > self._max_entries:
+                table.popitem(last=False)
+                self.evictions += 1
+            if self.store is not None:
+                self.store.add(fp, chunk)
+            self._literal += chunk
+            if len(self._literal) >= READ_CHUNK:
+                self._flush_literal()
+        self.chunks += 1
+        self._offset += n
+
+    def _chunk(self, final):
+        ends = warphybrid.cdc_chunks(self._pending, self.min_size, self.avg_size, self.max_size)
+        if not final:
+            ends = ends[:-1]        # may end only because the buffer does
+        start = 0
+        for end in ends:
+            self._add_chunk(bytes(self._pending[start:end]))
+            start = end
+        del self._pending[:start]
+
+    # ------------------------------------------------------
+    # File API
+    # ------------------------------------------------------
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed DedupWriter")
+        n = len(data)
+        self._pending += data
+        self.bytes_in += n
+        if len(self._pending) >= self.max_size * 2:
+            self._chunk(final=False)
+        return n
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._chunk(final=True)
+            self._flush_literal()
+            self._inner.close()
+        finally:
+            super().close()
+
+# ==========================================================
+# Decoder
+# ==========================================================
+
+def decode_dedup_file(src, dst, core=None, store=None):
+    """
+    Decode the DEDUP container read from file `src` into file `dst`,
+    streaming; returns the decoded size. Copies are read back from `dst`
+    when it is seekable and readable (e.g. opened "w+b"); otherwise the
+    decoded output is also kept in memory to resolve them. `store`
+    resolves chunk references (a default ChunkStore if needed and not
+    given).
+    """
+    core = _default_core(core)
+    if _read_exact(src, len(DEDUP_MAGIC)) != DEDUP_MAGIC:
+        raise ValueError("Not a dedup FASTLOG container")
+    records = io.BufferedReader(FastLogReader(src, core=core), READ_CHUNK)
+    history = None if dst.seekable() and dst.readable() else bytearray()
+
+    size = 0
+    loaded = {}
+    while True:
+        head = records.read(DEDUP_RECORD.size)
+        if not head:
+            return size
+        if len(head) < DEDUP_RECORD.size:
+            raise ValueError("Truncated dedup record")
+        kind, n = DEDUP_RECORD.unpack(head)
+
+        if kind == DEDUP_LITERAL:
+            pieces = _literal(records, n)
+        elif kind == DEDUP_COPY:
+            (at,) = DEDUP_OFFSET.unpack(_read_exact(records, DEDUP_OFFSET.size))
+            if at + n > size:
+                raise ValueError("Dedup reference past the decoded data")
+            pieces = _copy(dst, history, at, n, size)
+        elif kind == DEDUP_CHUNK:
+            fp = _read_exact(records, FINGERPRINT_SIZE)
+            chunk = loaded.get(fp)
+            if chunk is None:
+                if store is None:
+                    store = ChunkStore(core=core)
+                chunk = loaded[fp] = store.load(fp)
+            if len(chunk) != n:
+                raise ValueError(f"FASTLOG chunk {fp.hex()} has the wrong length")
+            pieces = (chunk,)
+        else:
+            raise ValueError(f"Unknown dedup record kind {kind}")
+
+        for piece in pieces:
+            dst.write(piece)
+            if history is not None:
+                history += piece
+            size += len(piece)
+
+def _literal(records, n):
+    while n:
+        piece = records.read(min(n, READ_CHUNK))
+        if not piece:
+            raise ValueError("Truncated dedup literal")
+        n -= len(piece)
+        yield piece
+
+def _copy(dst, history, at, n, end):
+    if history is not None:
+        yield history[at:at+n]
+        return
+    for p in range(at, at + n, READ_CHUNK):
+        dst.seek(p)
+        piece = _read_exact(dst, min(at + n - p, READ_CHUNK))
+        dst.seek(end + p - at)
+        yield piece
+
+def decode_dedup(blob, core=None, store=None):
+    """
+    Decoded bytes of a DEDUP container (see decode_dedup_file).
+    """
+    out = io.BytesIO()
+    decode_dedup_file(io.BytesIO(blob), out, core, store)
+    return out.getvalue()
+
+
+def encode_dedup(data, core=None, store=None, **kwargs):
+    out = io.BytesIO()
+    with DedupWriter(out, core=core, store=store, **kwargs) as writer:
+        writer.write(data)
+    return out.getvalue()
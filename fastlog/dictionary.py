@@ -0,0 +1,138 @@
+import hashlib
+import os
+from collections import Counter
+
+import warphybrid
+
+# LZ4 matches reach back at most 64 KB, so larger dictionaries buy nothing.
+DEFAULT_DICT_SIZE = 64 * 1024
+SEGMENT_SIZE = 64
+DMER_SIZE = 8
+
+# Training cost grows with the sample size; ~16x the dictionary is plenty
+# to find the recurring fragments of a log source.
+MAX_TRAINING_BYTES = 1024 * 1024
+
+# ==========================================================
+# Training
+# ==========================================================
+
+def _limit_samples(samples, max_bytes):
+    total = sum(len(s) for s in samples)
+    if total <= max_bytes:
+        return samples
+    # Evenly spaced subset keeps training deterministic.
+    keep = max(1, len(samples) * max_bytes // total)
+    stride = len(samples) / keep
+    return [samples[int(i * stride)] for i in range(keep)]
+
+def train_dictionary(samples, dict_size=DEFAULT_DICT_SIZE,
+                     segment_size=SEGMENT_SIZE, dmer_size=DMER_SIZE):
+    """
+    Build an LZ4 dictionary from sample events (an iterable of bytes, one
+    log line / event each).
+
+    The candidate segments are split into one epoch per dictionary slot;
+    each epoch contributes its segment whose `dmer_size`-byte substrings
+    are shared by the most samples, and those substrings then stop
+    counting. Best segments go last, where the LZ4 window reaches them.
+    """
+    samples = [bytes(s) for s in samples if len(s) >= dmer_size]
+    samples = _limit_samples(samples, MAX_TRAINING_BYTES)
+    if not samples:
+        raise ValueError("No samples long enough to train a dictionary")
+
+    # In how many samples each d-mer occurs
+    freq = Counter()
+    for s in samples:
+        freq.update({s[i:i+dmer_size] for i in range(len(s) - dmer_size + 1)})
+
+    step = max(segment_size // 2, 1)
+    segments = [
+        s[i:i+segment_size]
+        for s in samples
+        for i in range(0, max(len(s) - segment_size, 0) + 1, step)
+    ]
+
+    slots = max(1, dict_size // segment_size)
+    per_epoch = max(1, len(segments) // slots)
+    chosen = []
+
+    for e in range(0, len(segments), per_epoch):
+        best, best_score = None, 0
+        for seg in segments[e:e+per_epoch]:
+            dmers = {seg[i:i+dmer_size] for i in range(len(seg) - dmer_size + 1)}
+            score = sum(freq[d] for d in dmers if freq[d] > 1)
+            if score > best_score:
+                best, best_score = seg, score
+
+        if best is not None:
+            chosen.append((best_score, best))
+            for i in range(len(best) - dmer_size + 1):
+                freq[best[i:i+dmer_size]] = 0
+
+    if not chosen:
+        raise ValueError("Samples share no content to build a dictionary from")
+
+    chosen.sort(key=lambda c: c[0])
+    return b"".join(seg for _, seg in chosen)[-dict_size:]
+
+def dict_id(data):
+    """
+    Content-derived 32-bit dictionary ID (never 0).
+    """
+    return int.from_bytes(hashlib.sha256(data).digest()[:4], "little") or 1
+
+
+# ==========================================================
+# Local dictionary store
+# ==========================================================
+
+class DictionaryStore:
+    """
+    Directory of trained dictionaries named by ID (<id:08x>.dict), so a
+    decoder can find the dictionary a block was written with.
+    Defaults to $FASTLOG_DICT_DIR or ~/.cache/fastlog/dicts.
+    """
+
+    def __init__(self, dict_dir=None):
+        self.dict_dir = dict_dir or os.environ.get(
+            "FASTLOG_DICT_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "fastlog", "dicts"),
+        )
+        self._loaded = {}
+
+    def path(self, ident):
+        return os.path.join(self.dict_dir, f"{ident:08x}.dict")
+
+    def add(self, data):
+        data = bytes(data)
+        ident = dict_id(data)
+        path = self.path(ident)
+        if not os.path.exists(path):
+            os.makedirs(self.dict_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return ident
+
+    def load(self, ident):
+        try:
+            with open(self.path(ident), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise KeyError(f"Unknown FASTLOG dictionary {ident:08x}") from None
+        if dict_id(data) != ident:
+            raise ValueError(f"Corrupt FASTLOG dictionary {ident:08x}")
+        return data
+
+    def get(self, ident):
+        """
+        Prepared warphybrid.Dictionary for `ident`, loaded once per store.
+        """
+        prepared = self._loaded.get(ident)
+        if prepared is None:
+            prepared = warphybrid.Dictionary(self.load(ident))
+            self._loaded[ident] = prepared
+        return prepared
@@ -0,0 +1,239 @@
+import json
+import os
+import time
+
+from .stream import READ_CHUNK, _default_core
+
+DEFAULT_FOLLOW_BYTES = 1024 * 1024
+DEFAULT_FOLLOW_DELAY = 1.0      # seconds
+DEFAULT_POLL_INTERVAL = 0.2     # seconds
+
+def _identity(st):
+    return (st.st_dev, st.st_ino)
+
+# ==========================================================
+# TAIL / FOLLOW ENCODER
+# ==========================================================
+
+class Follower:
+    """
+    Tails a growing log file and encodes the new bytes as sealed FASTLOG
+    frames, passed to `sink(frame_bytes)`. The writing process never waits
+    on compression; frames are cut at the last newline once `max_bytes`
+    are buffered, or `max_delay` seconds after the first unflushed byte,
+    which bounds the end-to-end latency.
+
+    Rotation (the path now names another inode) is handled by reading the
+    old file to its end before switching; truncation (the file is shorter
+    than the read offset) restarts at 0. The decoded frames, in order,
+    are the bytes of the followed file(s); a file of appended frames reads
+    as one stream with FastLogReader and FastLogArchive (`fastlog decode`,
+    `fastlog grep`).
+
+    With `checkpoint` (a file path) the position after the last frame
+    handed to the sink is saved once the sink returns, so a restarted
+    Follower resumes there, also when the file was rotated meanwhile
+    (the old inode is looked up next to `path`). A crash between the sink
+    and the checkpoint repeats at most one frame.
+    """
+
+    def __init__(self, path, sink, core=None, checkpoint=None,
+                 max_bytes=DEFAULT_FOLLOW_BYTES, max_delay=DEFAULT_FOLLOW_DELAY,
+                 poll_interval=DEFAULT_POLL_INTERVAL, from_end=False,
+                 clock=time.monotonic):
+        self.path = path
+        self.sink = sink
+        self.core = _default_core(core)
+        self.checkpoint = checkpoint
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rotations = 0
+        self.truncations = 0
+
+        self._clock = clock
+        self._buf = bytearray()
+        self._deadline = None
+        self._fp = None
+        self._ident = None
+        self.offset = 0                 # next byte of the current file to read
+
+        saved = self._load_checkpoint()
+        if saved is not None:
+            self._resume(*saved)
+        if self._fp is None:
+            self._open_current(from_end)
+
+    # ------------------------------------------------------
+    # Files and checkpoint
+    # ------------------------------------------------------
+    def _open(self, path, offset):
+        fp = open(path, "rb")
+        st = os.fstat(fp.fileno())
+        if st.st_size < offset:
+            offset = 0          # truncated while we were not watching
+        fp.seek(offset)
+        if self._fp is not None:
+            self._fp.close()
+        self._fp, self._ident, self.offset = fp, _identity(st), offset
+
+    def _open_current(self, from_end=False):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return False
+        self._open(self.path, size if from_end else 0)
+        return True
+
+    def _resume(self, ident, offset):
+        try:
+            if _identity(os.stat(self.path)) == ident:
+                self._open(self.path, offset)
+                return
+        except FileNotFoundError:
+            pass
+        # Rotated while stopped: finish the old file first, if it is still
+        # next to the log (app.log.1, app.log-20240501, ...)
+        directory = os.path.dirname(self.path) or "."
+        base = os.path.basename(self.path)
+        for name in sorted(os.listdir(directory)):
+            candidate = os.path.join(directory, name)
+            if name.startswith(base) and candidate != self.path:
+                try:
+                    if _identity(os.stat(candidate)) == ident:
+                        self._open(candidate, offset)
+                        return
+                except FileNotFoundError:
+                    continue
+
+    def _load_checkpoint(self):
+        if self.checkpoint is None:
+            return None
+        try:
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return (state["dev"], state["ino"]), state["offset"]
+
+    def _save_checkpoint(self):
+        if self.checkpoint is None or self._ident is None:
+            return
+        tmp = self.checkpoint + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "path": self.path,
+                "dev": self._ident[0],
+                "ino": self._ident[1],
+                "offset": self.offset - len(self._buf),
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint)
+
+    # ------------------------------------------------------
+    # Frames
+    # ------------------------------------------------------
+    def _emit(self, n):
+        frame = self.core.encode(bytes(self._buf[:n]))
+        del self._buf[:n]
+        self._deadline = None if not self._buf else self._clock() + self.max_delay
+        self.sink(frame)
+        self.frames += 1
+        self.bytes_out += len(frame)
+        self._save_checkpoint()
+
+    def _cut(self):
+        # Largest whole-line prefix of the first max_bytes, if any
+        cut = self._buf.rfind(b"\n", 0, self.max_bytes) + 1
+        return cut or self.max_bytes
+
+    def flush(self):
+        """
+        Encode everything read so far.
+        """
+        while self._buf:
+            self._emit(self._cut() if len(self._buf) > self.max_bytes else len(self._buf))
+
+    def _read_available(self):
+        while True:
+            data = self._fp.read(READ_CHUNK)
+            if not data:
+                return
+            if not self._buf:
+                self._deadline = self._clock() + self.max_delay
+            self._buf += data
+            self.offset += len(data)
+            self.bytes_in += len(data)
+            while len(self._buf) >= self.max_bytes:
+                self._emit(self._cut())
+
+    # ------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------
+    def poll(self):
+        """
+        Read what was appended, handle rotation / truncation and flush
+        frames that are due. Returns the number of frames emitted.
+        """
+        frames = self.frames
+        if self._fp is None and not self._open_current():
+            return 0
+
+        self._read_available()
+
+        try:
+            current = _identity(os.stat(self.path))
+        except FileNotFoundError:
+            current = None          # moved away, new file not created yet
+
+        if current is not None and current != self._ident:
+            # Rotated: finish the old file (it may have grown between the
+            # read above and the rename); frames never span two files, so
+            # the checkpoint always names one inode.
+            self._read_available()
+            self.flush()
+            self.rotations += 1
+            self._open(self.path, 0)
+            self._read_available()
+        elif os.fstat(self._fp.fileno()).st_size < self.offset:
+            self.flush()
+            self.truncations += 1
+            self._fp.seek(0)
+            self.offset = 0
+            self._read_available()
+
+        if self._deadline is not None and self._clock() >= self._deadline:
+            self.flush()
+        return self.frames - frames
+
+    def run(self, stop=None):
+        """
+        Poll every `poll_interval` seconds until `stop` (a threading.Event)
+        is set, then flush.
+        """
+        try:
+            while stop is None or not stop.is_set():
+                self.poll()
+                if stop is None:
+                    time.sleep(self.poll_interval)
+                else:
+                    stop.wait(self.poll_interval)
+        finally:
+            self.flush()
+
+    def close(self):
+        self.flush()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -12,3 +12,135 @@ BLOCK_HEADER = struct.Struct("<III")    # block_size, compressed_size, level
 # Block_size = original uncompressed size
 # Compressed_size = compressed size of block
 
+# Streamed containers (FastLogWriter) do not know the block count up front:
+# they write STREAM_BLOCK_COUNT and close the block list with END_BLOCK.
+STREAM_BLOCK_COUNT = 0xFFFFFFFFFFFFFFFF
+END_BLOCK = BLOCK_HEADER.pack(0, 0, 0)
+
+# ================================
+# SEALED CONTAINER (per-block AES-GCM)
+# ================================
+#
+# SEALED_MAGIC | base nonce (12B) | blocks...
+# block = BLOCK_HEADER | AES-GCM(compressed block) incl. 16B tag
+#
+# Each block is sealed with nonce = base nonce XOR block index and its
+# BLOCK_HEADER as associated data, so blocks verify on their own and
+# cannot be reordered. The stream ends with an empty BLOCK_FINAL block,
+# which makes truncation detectable.
+
+SEALED_MAGIC = b"FASTLOGE"
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+# The level field holds the compression level in its low byte (signed:
+# >0 = LZ4 HC level, <=0 = LZ4 fast with acceleration -level) and
+# per-block flags above it.
+LEVEL_MASK = 0xFF
+BLOCK_FINAL = 0x100
+
+def field_level(field):
+    level = field & LEVEL_MASK
+    return level - 0x100 if level & 0x80 else level
+
+# Optional block index (FastLogWriter(index=True)): the BLOCK_FINAL block
+# also carries BLOCK_INDEX, its sealed payload is one INDEX_ENTRY per data
+# block, and INDEX_TRAILER follows it so readers can find it from the end.
+BLOCK_INDEX = 0x200
+INDEX_ENTRY = struct.Struct("<QQ")       # uncompressed offset, header offset
+INDEX_TRAILER = struct.Struct("<QQ8s")   # final header offset, block count, magic
+INDEX_MAGIC = b"FLINDEX1"
+
+# Incompressible block stored as-is (no LZ4 on encode or decode).
+BLOCK_STORED = 0x400
+
+# Block compressed against a preset dictionary: the (sealed) payload starts
+# with the dictionary ID, which decoders resolve in a DictionaryStore.
+BLOCK_DICT = 0x800
+DICT_ID = struct.Struct("<I")
+
+# Linked block: compressed with up to LINK_WINDOW bytes of the data before
+# it as LZ4 history, back to the last block without the flag (a reset
+# point). Decoders start at a reset point, so reset groups decode in
+# parallel and random access only replays one group.
+BLOCK_LINKED = 0x1000
+LINK_WINDOW = 64 * 1024
+
+# Token Bloom filters (FastLogWriter(bloom=True)): the index block also
+# carries BLOCK_BLOOM and its payload continues after the INDEX_ENTRY
+# table with one BLOOM_FILTER header + filter bits per data block. Tokens
+# are runs of [A-Za-z0-9_], ASCII-lowercased; a token cut by a block
+# boundary is added whole to the block it ends in. BLOOM_NEWLINE marks
+# blocks containing a line end, which bounds the blocks a line can span.
+# Sealed with the index, so the filters leak nothing about the plaintext.
+BLOCK_BLOOM = 0x2000
+BLOOM_FILTER = struct.Struct("<IBB")     # filter bytes, hash count, flags
+BLOOM_NEWLINE = 0x01
+BLOOM_LEAD = 256                         # longest token carried across blocks
+
+# ================================
+# COLUMNAR CONTAINER (JSON lines / templated text, fastlog.columnar)
+# ================================
+#
+# COLUMNAR_MAGIC | base nonce (12B) | row groups... | directory block | INDEX_TRAILER
+#
+# Blocks are sealed like SEALED container blocks. A row group is a shape
+# block (template ID per line, little-endian u16) followed by one block
+# per field column: that field's raw values, newline-separated
+# (COLUMN_TEXT), or, when they are all decimal digits, little-endian
+# integers of one struct code (COLUMN_INT; COLUMN_FIXED when every value
+# has the same number of digits, leading zeros included).
+# The BLOCK_FINAL | BLOCK_INDEX block holds the JSON directory (fields,
+# line templates, header offset and kind of every block); INDEX_TRAILER,
+# with COLUMN_MAGIC, points at it from the end of the file.
+
+COLUMNAR_MAGIC = b"FASTLOGJ"
+COLUMN_MAGIC = b"FLCOLS01"
+
+COLUMN_TEXT = 0
+COLUMN_INT = 1
+COLUMN_FIXED = 2
+
+# ================================
+# DEDUP CONTAINER (content-defined chunking, fastlog.dedup)
+# ================================
+#
+# DEDUP_MAGIC | SEALED container of a record stream
+#
+# Each record is DEDUP_RECORD (kind, length) followed by:
+#   DEDUP_LITERAL  `length` bytes of data
+#   DEDUP_COPY     DEDUP_OFFSET: the bytes at that offset of the decoded
+#                  output (an earlier chunk of the same file)
+#   DEDUP_CHUNK    FINGERPRINT_SIZE bytes: a chunk of a ChunkStore
+# Decoded output is the records' bytes in order.
+
+DEDUP_MAGIC = b"FASTLOGC"
+DEDUP_RECORD = struct.Struct("<BI")      # kind, length
+DEDUP_OFFSET = struct.Struct("<Q")
+DEDUP_LITERAL = 0
+DEDUP_COPY = 1
+DEDUP_CHUNK = 2
+FINGERPRINT_SIZE = 16
+
+# ================================
+# EVENT BATCH (EventBatcher frame payload)
+# ================================
+#
+# BATCH_MAGIC | event count (u32) | end offset of each event (u32 each) | events
+# Offsets are relative to the first event byte, so events are sliced out
+# of the decoded frame without copying.
+
+BATCH_MAGIC = b"FLBATCH1"
+BATCH_COUNT = struct.Struct("<I")
+EVENT_END = struct.Struct("<I")
+
+# ================================
+# SPOOL (disk queue between encoder and Uploader)
+# ================================
+#
+# A spool directory holds append-only segment files <seq:016x>.seg of
+# records SPOOL_RECORD | frame, plus an "ack" file with the position of the
+# first frame not yet acknowledged by the sink.
+
+SPOOL_RECORD = struct.Struct("<II")     # frame length, crc32(frame)
+SPOOL_ACK = struct.Struct("<QQ")        # segment, offset
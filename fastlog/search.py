@@ -0,0 +1,195 @@
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import warphybrid
+
+from .archive import FastLogArchive
+from .format import BLOOM_NEWLINE, BLOOM_LEAD
+
+_TOKEN = re.compile(rb"[A-Za-z0-9_]+")
+_REGEX_CHARS = set(".^$*+?{}[]\\|()")
+
+# ==========================================================
+# Pattern → required tokens
+# ==========================================================
+
+def compile_pattern(pattern, fixed=False, ignore_case=False, word=False):
+    """
+    Byte regex with grep semantics for one line: -F (fixed), -i, -w.
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode("utf-8", "surrogateescape")
+    if fixed:
+        pattern = re.escape(pattern)
+    if word:
+        pattern = rb"\b(?:" + pattern + rb")\b"
+    return re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+
+def required_tokens(pattern, fixed=False, word=False):
+    """
+    Tokens (see format.BLOCK_BLOOM) every matching line must contain, for
+    the Bloom filter skip. Only literal patterns have any: their word runs
+    that are whole tokens, i.e. not at an open end of the literal (-w
+    closes both ends). Tokens a filter cannot hold exactly are left out.
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode("utf-8", "surrogateescape")
+    if not fixed and _REGEX_CHARS.intersection(pattern.decode("latin-1")):
+        return []
+    tokens = []
+    for m in _TOKEN.finditer(pattern):
+        if not word and (m.start() == 0 or m.end() == len(pattern)):
+            continue
+        token = m.group().lower()
+        if len(token) <= BLOOM_LEAD and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+# ==========================================================
+# Block selection
+# ==========================================================
+
+def candidate_blocks(filters, tokens):
+    """
+    Blocks to decode, given the archive's Bloom filters. A line starting
+    in block j ends in the first later block with a newline (k), so its
+    tokens all sit in the filters of j..k: j is a candidate when their
+    union may hold every token, and then j..k are decoded. Returns None
+    when nothing can be skipped.
+    """
+    if filters is None or not tokens:
+        return None
+    full = (1 << len(tokens)) - 1
+    present = []
+    for bits, hashes, _ in filters:
+        mask = 0
+        for t, token in enumerate(tokens):
+            if warphybrid.bloom_contains(bits, token, hashes):
+                mask |= 1 << t
+        present.append(mask)
+
+    n = len(filters)
+    decode = set()
+    nxt = n - 1             # first block after j with a newline
+    for j in range(n - 1, -1, -1):
+        k = min(nxt, n - 1)
+        mask = 0
+        for b in range(j, k + 1):
+            mask |= present[b]
+        if mask == full:
+            decode.update(range(j, k + 1))
+        if filters[j][2] & BLOOM_NEWLINE:
+            nxt = j
+    return decode
+
+# ==========================================================
+# Search
+# ==========================================================
+
+class Searcher:
+    """
+    grep over a sealed FASTLOG archive. Blocks are decoded and scanned on
+    `threads` workers, ahead of the caller by a bounded window, and lines
+    that cross block boundaries are stitched together in order, so matches
+    come out as (offset, line) exactly as grep on the decoded file would
+    report them. Archives written with bloom=True skip blocks whose
+    filters rule out a literal pattern; `blocks`, `decoded` and `skipped`
+    count what a search did.
+    """
+
+    def __init__(self, archive, pattern, fixed=False, ignore_case=False, word=False,
+                 threads=1):
+        self.archive = archive
+        self.regex = compile_pattern(pattern, fixed, ignore_case, word)
+        self.tokens = required_tokens(pattern, fixed, word)
+        self.threads = max(1, threads)
+        self.blocks = archive.block_count
+        self.decoded = 0
+        self.skipped = 0
+
+    def _scan(self, i):
+        # Runs on a worker: (head, hits, tail offset, tail) of block i, where
+        # head is the bytes up to the first newline (all of them if none),
+        # hits the matching whole lines after it, as (block offset, line),
+        # and tail the unfinished last line.
+        data = self.archive.block(i)
+        first = data.find(b"\n")
+        if first < 0:
+            return bytes(data), [], 0, None
+        last = data.rfind(b"\n")
+
+        hits = []
+        search = self.regex.search
+        pos = first + 1
+        while pos <= last:
+            m = search(data, pos, last)
+            if m is None:
+                break
+            start = data.rfind(b"\n", 0, m.start()) + 1
+            end = data.find(b"\n", m.start())
+            if end < 0 or end > last:
+                end = last
+            line = data[start:end]
+            # A regex match may run across newlines: verify per line
+            if m.end() <= end or search(line):
+                hits.append((start, bytes(line)))
+            pos = end + 1
+        return bytes(data[:first]), hits, last + 1, bytes(data[last + 1:])
+
+    def _results(self, blocks):
+        if self.threads <= 1:
+            for i in blocks:
+                yield i, self._scan(i)
+            return
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            window = deque()
+            for i in blocks:
+                if len(window) >= self.threads * 2:
+                    j, fut = window.popleft()
+                    yield j, fut.result()
+                window.append((i, pool.submit(self._scan, i)))
+            while window:
+                j, fut = window.popleft()
+                yield j, fut.result()
+
+    def __iter__(self):
+        arc = self.archive
+        decode = candidate_blocks(arc.filters, self.tokens)
+        if decode is None:
+            blocks = range(self.blocks)
+        else:
+            blocks = sorted(decode)
+        self.decoded = len(blocks)
+        self.skipped = self.blocks - self.decoded
+
+        starts = arc._starts
+        search = self.regex.search
+        carry, carry_at = bytearray(), 0        # unfinished line, None if unknown
+        prev = -1
+        for i, (head, hits, tail_at, tail) in self._results(blocks):
+            if i != prev + 1:
+                carry = None                    # started in a skipped block
+            prev = i
+            if tail is None:
+                if carry is not None:
+                    carry += head
+                continue
+            if carry is not None:
+                carry += head
+                if search(carry):
+                    yield carry_at, bytes(carry)
+            for off, line in hits:
+                yield starts[i] + off, line
+            carry, carry_at = bytearray(tail), starts[i] + tail_at
+        if carry and prev == self.blocks - 1 and search(carry):
+            yield carry_at, bytes(carry)
+
+
+def search(path, pattern, core=None, key=None, **kwargs):
+    """
+    (offset, line) of every line of the archive at `path` matching
+    `pattern`; keyword arguments as for Searcher.
+    """
+    with FastLogArchive(path, core=core, key=key) as arc:
+        yield from Searcher(arc, pattern, **kwargs)
@@ -0,0 +1,98 @@
+import time
+
+# ==========================================================
+# LEVEL LADDER
+# ==========================================================
+#
+# Best ratio first, fastest last. Positive values are LZ4 HC levels,
+# negative values are LZ4 fast with acceleration -level (see warphybrid.h).
+
+LEVEL_LADDER = [12, 9, 6, 4, 3, -1, -2, -4, -8, -16, -32, -64]
+
+
+# ==========================================================
+# THROUGHPUT SLO CONTROLLER
+# ==========================================================
+
+class ThroughputSLO:
+    """
+    Picks the compression level for each block so an encode keeps up with
+    a target rate. It tracks an EWMA of measured bytes/s per level, stays on
+    the best-ratio level that meets the target, steps to a faster level as
+    soon as a block misses it, and steps back up when the slower level is
+    known (or periodically re-probed) to be fast enough.
+
+    target_mbps     sustained rate to hold (MB/s, all workers together)
+    latency_budget  seconds allowed for one compress_stream() call; the
+                    required rate is recomputed from the bytes and time left
+    """
+
+    def __init__(self, target_mbps=None, latency_budget=None, max_level=9,
+                 threads=1, alpha=0.3, headroom=1.1, probe_every=32):
+        self.target_mbps = target_mbps
+        self.latency_budget = latency_budget
+        self.threads = max(1, threads)
+        self.alpha = alpha
+        self.headroom = headroom
+        self.probe_every = probe_every
+
+        self.ladder = [lvl for lvl in LEVEL_LADDER if lvl <= max_level]
+        self.rung = 0
+        self.speeds = {}
+        self.blocks = 0
+
+        self.remaining = None
+        self.deadline = None
+
+    def start(self, total_bytes=None):
+        """
+        Begin an encode of `total_bytes` (None when streaming).
+        """
+        self.remaining = total_bytes
+        self.deadline = None
+        if self.latency_budget is not None and total_bytes is not None:
+            self.deadline = time.perf_counter() + self.latency_budget
+
+    def target(self):
+        """
+        Required bytes/s for one worker, or None when unconstrained.
+        """
+        rate = self.target_mbps * 1e6 if self.target_mbps else 0.0
+
+        if self.deadline is not None and self.remaining:
+            left = self.deadline - time.perf_counter()
+            need = self.remaining / left if left > 0 else float("inf")
+            rate = max(rate, need)
+
+        return rate / self.threads if rate else None
+
+    def choose(self):
+        return self.ladder[self.rung]
+
+    def update(self, level, block_len, elapsed):
+        if self.remaining is not None:
+            self.remaining = max(0, self.remaining - block_len)
+
+        speed = block_len / max(elapsed, 1e-9)
+        old = self.speeds.get(level)
+        self.speeds[level] = speed if old is None else (
+            self.alpha * speed + (1 - self.alpha) * old
+        )
+        self.blocks += 1
+
+        target = self.target()
+        if target is None:
+            return
+
+        if self.speeds.get(self.choose(), speed) < target:
+            if self.rung < len(self.ladder) - 1:
+                self.rung += 1
+            return
+
+        if self.rung > 0:
+            slower = self.speeds.get(self.ladder[self.rung - 1])
+            if slower is not None and slower >= target * self.headroom:
+                self.rung -= 1
+            elif self.blocks % self.probe_every == 0:
+                # Data changes; give the better-ratio level another try.
+                self.rung -= 1
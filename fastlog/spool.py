@@ -0,0 +1,365 @@
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from .format import SPOOL_RECORD, SPOOL_ACK
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_SPOOL_BYTES = 1024 * 1024 * 1024
+DEFAULT_SYNC_EVERY = 64         # records per fsync
+DEFAULT_SYNC_INTERVAL = 0.2     # seconds
+
+SEGMENT_SUFFIX = ".seg"
+ACK_FILE = "ack"
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# ==========================================================
+# DISK SPOOL
+# ==========================================================
+
+class Spool:
+    """
+    Persistent FIFO of encoded frames between an encoder and the Uploader,
+    so encoding does not wait on the sink and a restart loses nothing.
+
+    put() appends a frame to the current segment file; appends are
+    fsynced every `sync_every` records or `sync_interval` seconds (and on
+    flush() / close()). The interval is checked by put(), ack() and a
+    waiting get(), so the last frames before an idle period are synced
+    too, as long as a consumer waits in get() (an Uploader does); with no
+    call at all they are synced on the next call or flush(). When the
+    spool holds `max_bytes`, put() blocks until acknowledged segments are
+    deleted (TimeoutError after `timeout`).
+
+    get() returns (position, frame) in order; ack(position) confirms a
+    frame, in any order — the persisted acknowledgement only advances past
+    a frame once every frame before it is acknowledged. After a restart,
+    or rewind(), delivery resumes at the first unacknowledged frame (at
+    least once).
+    """
+
+    def __init__(self, path, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 max_bytes=DEFAULT_SPOOL_BYTES, sync_every=DEFAULT_SYNC_EVERY,
+                 sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self.frames_in = 0
+        self.frames_acked = 0
+        self.syncs = 0
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._acks_unsaved = 0
+        self._delivered = OrderedDict()     # start → [end, acked]
+        self._reader = None                 # (seq, file)
+
+        os.makedirs(path, exist_ok=True)
+        self._segments = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)], 16)
+            for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX)
+        )
+        if not self._segments:
+            self._segments = [0]
+            open(self._segment_path(0), "ab").close()
+
+        self._recover_tail()
+        self._size = sum(os.path.getsize(self._segment_path(s)) for s in self._segments)
+        self._ack = self._load_ack()
+        self._read = self._ack
+
+        self._wseq = self._segments[-1]
+        self._wfile = open(self._segment_path(self._wseq), "ab")
+        self._woff = self._wfile.tell()
+
+    # ------------------------------------------------------
+    # Files
+    # ------------------------------------------------------
+    def _segment_path(self, seq):
+        return os.path.join(self.path, f"{seq:016x}{SEGMENT_SUFFIX}")
+
+    def _recover_tail(self):
+        # A crash may leave a torn record at the end of the last segment;
+        # earlier segments were fsynced before the next one was started.
+        path = self._segment_path(self._segments[-1])
+        good = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(SPOOL_RECORD.size)
+                if len(header) < SPOOL_RECORD.size:
+                    break
+                length, crc = SPOOL_RECORD.unpack(header)
+                frame = f.read(length)
+                if len(frame) < length or zlib.crc32(frame) != crc:
+                    break
+                good = f.tell()
+        if good != os.path.getsize(path):
+            os.truncate(path, good)
+
+    def _load_ack(self):
+        try:
+            with open(os.path.join(self.path, ACK_FILE), "rb") as f:
+                data = f.read(SPOOL_ACK.size)
+        except FileNotFoundError:
+            data = b""
+        if len(data) != SPOOL_ACK.size:
+            return (self._segments[0], 0)
+        seq, offset = SPOOL_ACK.unpack(data)
+        if seq < self._segments[0]:
+            return (self._segments[0], 0)
+        # Never past the recovered data (older spools saved acks before
+        # the frames they covered were synced)
+        last = self._segments[-1]
+        size = os.path.getsize(self._segment_path(last))
+        if seq > last:
+            return (last, size)
+        if seq == last:
+            return (seq, min(offset, size))
+        return (seq, offset)
+
+    def _save_ack(self):
+        # The frames an ack covers must be on disk before the ack is
+        self._sync_locked()
+        path = os.path.join(self.path, ACK_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(SPOOL_ACK.pack(*self._ack))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._acks_unsaved = 0
+
+        # Segments entirely before the acknowledged position are done
+        freed = False
+        while self._segments[0] < self._ack[0]:
+            seq = self._segments.pop(0)
+            if self._reader is not None and self._reader[0] == seq:
+                self._reader[1].close()
+                self._reader = None
+            path = self._segment_path(seq)
+            self._size -= os.path.getsize(path)
+            os.remove(path)
+            freed = True
+        if freed:
+            self._cond.notify_all()
+
+    def _sync_locked(self):
+        if self._unsynced:
+            os.fsync(self._wfile.fileno())
+            self.syncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _sync_due_locked(self):
+        if self._unsynced and time.monotonic() - self._last_sync >= self.sync_interval:
+            self._sync_locked()
+
+    def _segment_end(self, seq):
+        if seq == self._wseq:
+            return self._woff
+        return os.path.getsize(self._segment_path(seq))
+
+    def _skip_acked_segment(self):
+        # An acknowledgement at the end of a sealed segment moves on to the
+        # next one, so the segment can be deleted. True if it moved.
+        seq, offset = self._ack
+        if seq == self._wseq or offset < self._segment_end(seq):
+            return False
+        self._ack = (self._segments[self._segments.index(seq) + 1], 0)
+        return True
+
+    def _roll_locked(self):
+        # Seal the full segment before any frame lands in the next one
+        self._sync_locked()
+        self._wfile.close()
+        self._wseq += 1
+        self._segments.append(self._wseq)
+        self._wfile = open(self._segment_path(self._wseq), "ab")
+        self._woff = 0
+        _fsync_dir(self.path)
+        if self._skip_acked_segment():
+            self._save_ack()
+
+    # ------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------
+    def put(self, frame, timeout=None):
+        """
+        Append one frame (any bytes-like object).
+        """
+        record = SPOOL_RECORD.size + len(frame)
+        if record > self.max_bytes:
+            raise ValueError("Frame larger than the spool")
+
+        with self._cond:
+            if self._closed:
+                raise ValueError("put to closed Spool")
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._size + record > self.max_bytes:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("FASTLOG spool full")
+                # Only sealed segments can be freed
+                if self._woff:
+                    self._roll_locked()
+                    continue
+                self._cond.wait(remaining)
+                if self._closed:
+                    raise ValueError("put to closed Spool")
+
+            if self._woff and self._woff + record > self.segment_bytes:
+                self._roll_locked()
+
+            self._wfile.write(SPOOL_RECORD.pack(len(frame), zlib.crc32(frame)))
+            self._wfile.write(frame)
+            self._wfile.flush()
+            self._woff += record
+            self._size += record
+            self.frames_in += 1
+
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync_locked()
+            else:
+                self._sync_due_locked()
+            self._cond.notify_all()
+
+    __call__ = put      # usable as an EventBatcher sink
+
+    def flush(self):
+        with self._cond:
+            self._sync_locked()
+            if self._acks_unsaved:
+                self._save_ack()
+
+    # ------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------
+    def _readable_locked(self):
+        # Move the read cursor past fully read segments
+        if self._read < self._ack:
+            self._read = self._ack
+        while True:
+            seq, offset = self._read
+            if offset < self._segment_end(seq):
+                return True
+            if seq == self._wseq:
+                return False
+            self._read = (self._segments[self._segments.index(seq) + 1], 0)
+
+    def get(self, timeout=None):
+        """
+        Next undelivered (position, frame), or None if nothing arrives within
+        `timeout` seconds (or the spool is closed).
+        """
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._readable_locked():
+                self._sync_due_locked()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if self._closed or (remaining is not None and remaining <= 0):
+                    return None
+                if self._unsynced:
+                    # Wake up to sync the appends of an idle producer
+                    wait = self._last_sync + self.sync_interval - time.monotonic()
+                    remaining = wait if remaining is None else min(remaining, wait)
+                self._cond.wait(max(remaining, 0) if remaining is not None else None)
+
+            seq, offset = self._read
+            if self._reader is None or self._reader[0] != seq:
+                if self._reader is not None:
+                    self._reader[1].close()
+                self._reader = (seq, open(self._segment_path(seq), "rb"))
+            f = self._reader[1]
+            f.seek(offset)
+            length, crc = SPOOL_RECORD.unpack(f.read(SPOOL_RECORD.size))
+            frame = f.read(length)
+            if len(frame) != length or zlib.crc32(frame) != crc:
+                raise ValueError(f"Corrupt FASTLOG spool segment {seq:016x}")
+
+            end = (seq, offset + SPOOL_RECORD.size + length)
+            self._read = end
+            self._delivered[(seq, offset)] = [end, False]
+            return (seq, offset), frame
+
+    def ack(self, position):
+        """
+        Confirm that the frame at `position` (from get()) reached the sink.
+        """
+        with self._cond:
+            self._sync_due_locked()
+            entry = self._delivered.get(position)
+            if entry is None:
+                return
+            entry[1] = True
+            self.frames_acked += 1
+
+            advanced = False
+            while self._delivered:
+                start, (end, acked) = next(iter(self._delivered.items()))
+                if not acked:
+                    break
+                del self._delivered[start]
+                self._ack = end
+                self._acks_unsaved += 1
+                advanced = True
+
+            if advanced and (self._skip_acked_segment()
+                             or self._acks_unsaved >= self.sync_every
+                             or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._save_ack()
+
+    def rewind(self):
+        """
+        Deliver again from the first unacknowledged frame.
+        """
+        with self._cond:
+            self._delivered.clear()
+            self._read = self._ack
+
+    def pending(self):
+        """
+        Bytes of frames not yet acknowledged.
+        """
+        with self._cond:
+            total = 0
+            for seq in self._segments:
+                size = self._segment_end(seq)
+                if seq == self._ack[0]:
+                    size -= self._ack[1]
+                if seq >= self._ack[0]:
+                    total += size
+            return total
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._sync_locked()
+            self._save_ack()
+            self._wfile.close()
+            if self._reader is not None:
+                self._reader[1].close()
+                self._reader = None
+            self._closed = True
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+
+# Stage timers (nanoseconds). With threads > 1 the compress / encrypt
+# stages of an encode are summed over the workers, so they can add up to
+# more than the wall time of the call.
+ENCODE_STAGES = ("compress", "encrypt", "frame", "bandit")
+DECODE_STAGES = ("decrypt", "decompress", "frame")
+
+OPS = {"encode": ENCODE_STAGES, "decode": DECODE_STAGES}
+
+def size_bucket(size):
+    """
+    Smallest power of two >= `size`. Block sizes are counted per bucket:
+    short tail blocks and explicit block_size values would otherwise give
+    a metric label per distinct size.
+    """
+    return 1 << max(size - 1, 0).bit_length()
+
+# ==========================================================
+# One call
+# ==========================================================
+
+class CallStats:
+    """
+    Counters for one encode or decode call (FastLogCore.encode / decode,
+    or one FastLogWriter / FastLogReader). Stage methods may be called
+    from worker threads.
+    """
+
+    def __init__(self, op):
+        self.op = op
+        self.ns = dict.fromkeys(OPS[op], 0)
+        self.wall_ns = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.blocks = 0
+        self.stored = 0
+        self.block_sizes = {}       # size_bucket(uncompressed size) → blocks
+        self.levels = {}            # header level → blocks
+        self.explore = 0            # bandit choices that sampled an arm
+        self.exploit = 0            # bandit choices of the best arm
+        self.alloc_bytes = 0        # buffers allocated by the codec
+
+        self._t0 = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def add(self, stage, ns):
+        with self._lock:
+            self.ns[stage] += ns
+
+    def block(self, size, level, stored=False):
+        with self._lock:
+            self.blocks += 1
+            size = size_bucket(size)
+            self.block_sizes[size] = self.block_sizes.get(size, 0) + 1
+            if stored:
+                self.stored += 1
+            else:
+                self.levels[level] = self.levels.get(level, 0) + 1
+
+    def choice(self, explored):
+        if explored:
+            self.explore += 1
+        else:
+            self.exploit += 1
+
+    def alloc(self, nbytes):
+        with self._lock:
+            self.alloc_bytes += nbytes
+
+    def to_dict(self):
+        return {
+            "op": self.op,
+            "ns": dict(self.ns),
+            "wall_ns": self.wall_ns,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "blocks": self.blocks,
+            "stored": self.stored,
+            "block_sizes": dict(self.block_sizes),
+            "levels": dict(self.levels),
+            "explore": self.explore,
+            "exploit": self.exploit,
+            "alloc_bytes": self.alloc_bytes,
+        }
+
+# ==========================================================
+# Cumulative counters + hooks
+# ==========================================================
+
+def _merge(into, counts):
+    for key, n in counts.items():
+        into[key] = into.get(key, 0) + n
+
+class Stats:
+    """
+    Opt-in instrumentation: FastLogCore(stats=True), or share one Stats
+    between cores with FastLogCore(stats=stats). Without it the codec
+    only checks `core.stats is None` per block.
+
+    Every finished call is added to the cumulative counters (per op) and
+    passed to each hook, hook(call_stats), on the thread that finished it.
+    Export with to_json() or to_prometheus().
+    """
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+        self._totals = {op: self._empty(op) for op in OPS}
+
+    @staticmethod
+    def _empty(op):
+        return {
+            "calls": 0, "ns": dict.fromkeys(OPS[op], 0), "wall_ns": 0,
+            "bytes_in": 0, "bytes_out": 0, "blocks": 0, "stored": 0,
+            "block_sizes": {}, "levels": {}, "explore": 0, "exploit": 0,
+            "alloc_bytes": 0,
+        }
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def start(self, op):
+        return CallStats(op)
+
+    def finish(self, call):
+        call.wall_ns = time.perf_counter_ns() - call._t0
+        with self._lock:
+            t = self._totals[call.op]
+            t["calls"] += 1
+            _merge(t["ns"], call.ns)
+            _merge(t["block_sizes"], call.block_sizes)
+            _merge(t["levels"], call.levels)
+            for key in ("wall_ns", "bytes_in", "bytes_out", "blocks", "stored",
+                        "explore", "exploit", "alloc_bytes"):
+                t[key] += getattr(call, key)
+        for hook in list(self.hooks):
+            hook(call)
+
+    def reset(self):
+        with self._lock:
+            self._totals = {op: self._empty(op) for op in OPS}
+
+    # ------------------------------------------------------
+    # Export
+    # ------------------------------------------------------
+    def to_dict(self):
+        with self._lock:
+            return {
+                op: {key: dict(v) if isinstance(v, dict) else v for key, v in t.items()}
+                for op, t in self._totals.items()
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix="fastlog"):
+        """
+        Cumulative counters in the Prometheus text exposition format.
+        """
+        totals = self.to_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in samples:
+                label = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{prefix}_{name}{{{label}}} {value}")
+
+        ops = list(totals.items())
+        metric("calls_total", "Finished encode / decode calls.",
+               [((("op", op),), t["calls"]) for op, t in ops])
+        metric("stage_seconds_total", "Time spent per codec stage.",
+               [((("op", op), ("stage", s)), ns / 1e9) for op, t in ops for s, ns in t["ns"].items()])
+        metric("wall_seconds_total", "Wall time of finished calls.",
+               [((("op", op),), t["wall_ns"] / 1e9) for op, t in ops])
+        metric("bytes_in_total", "Bytes consumed.",
+               [((("op", op),), t["bytes_in"]) for op, t in ops])
+        metric("bytes_out_total", "Bytes produced.",
+               [((("op", op),), t["bytes_out"]) for op, t in ops])
+        metric("blocks_total", "Data blocks processed.",
+               [((("op", op),), t["blocks"]) for op, t in ops])
+        metric("stored_blocks_total", "Blocks kept uncompressed.",
+               [((("op", op),), t["stored"]) for op, t in ops])
+        metric("block_size_blocks_total", "Blocks per uncompressed block size, rounded up to a power of two.",
+               [((("op", op), ("size", size)), n)
+                for op, t in ops for size, n in sorted(t["block_sizes"].items())])
+        metric("level_blocks_total", "Compressed blocks per LZ4 level.",
+               [((("op", op), ("level", level)), n)
+                for op, t in ops for level, n in sorted(t["levels"].items())])
+        metric("bandit_choices_total", "Block size choices by the bandit.",
+               [((("kind", "explore"),), totals["encode"]["explore"]),
+                ((("kind", "exploit"),), totals["encode"]["exploit"])])
+        metric("alloc_bytes_total", "Bytes of buffers allocated by the codec.",
+               [((("op", op),), t["alloc_bytes"]) for op, t in ops])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,634 @@
+import io
+import re
+import time
+from collections import deque
+
+import warphybrid
+
+from .format import (
+    MAGIC, HEADER_STRUCT, BLOCK_HEADER, STREAM_BLOCK_COUNT,
+    SEALED_MAGIC, NONCE_SIZE, TAG_SIZE, BLOCK_FINAL,
+    BLOCK_INDEX, INDEX_ENTRY, INDEX_TRAILER, INDEX_MAGIC,
+    BLOCK_LINKED, LINK_WINDOW, BLOCK_STORED, field_level,
+    BLOCK_BLOOM, BLOOM_FILTER, BLOOM_NEWLINE, BLOOM_LEAD,
+)
+
+READ_CHUNK = 1024 * 1024
+DEFAULT_BLOOM_BITS = 10         # filter bits per distinct token (~1% false positives)
+
+_TOKEN_TAIL = re.compile(rb"[A-Za-z0-9_]*\Z")
+_NEWLINE = re.compile(rb"\n")
+
+def bloom_hashes(bits_per_token):
+    # Optimal hash count k = m/n · ln 2
+    return max(1, min(16, round(bits_per_token * 0.693)))
+
+def _default_core(core, **kwargs):
+    if core is not None:
+        return core
+    from .core import FastLogCore
+    return FastLogCore(**kwargs)
+
+def _read_exact(fp, n):
+    buf = fp.read(n)
+    while len(buf) < n:
+        chunk = fp.read(n - len(buf))
+        if not chunk:
+            raise ValueError("Truncated FASTLOG stream")
+        buf += chunk
+    return buf
+
+# ==========================================================
+# STREAMING ENCODER
+# ==========================================================
+
+class FastLogWriter(io.RawIOBase):
+    """
+    File-like FASTLOG encoder. Bytes passed to write() are cut into blocks,
+    compressed, sealed and written to `fileobj` as soon as each block is
+    complete, so memory stays at a few blocks regardless of input size.
+
+    Output is a SEALED container (see format.py): every block carries its
+    own AES-GCM tag, so compression and encryption of a block both run on
+    the worker threads. index=True appends a block index so the result
+    can be opened with FastLogArchive for random access. bloom=True (implies
+    index) also stores a token Bloom filter per block, built on the workers,
+    which lets `fastlog grep` skip blocks. `size_hint` (total input bytes,
+    if known) lets a latency-budget SLO pace the encode.
+    """
+
+    def __init__(self, fileobj, core=None, bandit="one", threads=1, index=False,
+                 size_hint=None, bloom=False, bloom_bits=DEFAULT_BLOOM_BITS):
+        super().__init__()
+        self.core = _default_core(core, bandit=bandit, threads=threads)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        self._fp = fileobj
+        self._warp = self.core.warp
+        self._dcf = self.core.dcf
+        self._history = []
+        self._bs = None
+        self._pending = bytearray()
+        self._inflight = deque()
+        self._slots = []
+        self._index = 0
+        self._entries = bytearray() if index or bloom else None
+        self._filters = [] if bloom else None
+        self._bloom_bits = bloom_bits
+        self._bloom_hashes = bloom_hashes(bloom_bits)
+        self._lead = b""
+        self._uoffset = 0
+        self._group_bytes = 0
+        self._tail = bytearray()
+        self._linker = None
+        if self._warp.linked and self._warp.threads <= 1:
+            self._linker = warphybrid.Linker()
+
+        if self._warp.slo is not None:
+            self._warp.slo.start(size_hint)
+
+        # Per-call counters when the core is instrumented (fastlog.stats)
+        self.stats = None
+        if self.core.stats is not None:
+            self.stats = self.core.stats.start("encode")
+
+        self._nonce = self._dcf.new_nonce()
+        self._write_raw(SEALED_MAGIC)
+        self._write_raw(self._nonce)
+
+    def writable(self):
+        return True
+
+    # ------------------------------------------------------
+    # Output
+    # ------------------------------------------------------
+    def _write_raw(self, data):
+        self._fp.write(data)
+        self.bytes_out += len(data)
+
+    def _seal(self, index, block_len, payload, field):
+        header = BLOCK_HEADER.pack(block_len, len(payload) + TAG_SIZE, field)
+        return header, self._dcf.seal_block(self._nonce, index, header, payload)
+
+    def _work(self, index, block, dst, level, prefix, lead=None):
+        # Runs on a worker thread when threads > 1
+        bloom = None
+        if lead is not None:
+            bits = warphybrid.bloom_build(block, lead, self._bloom_bits, self._bloom_hashes)
+            bloom = (bits, BLOOM_NEWLINE if _NEWLINE.search(block) else 0)
+        result = self._warp._compress_block(block, dst, 0, level, prefix, self._linker)
+        n, field, elapsed_ns = result
+        stats = self.stats
+        if stats is not None:
+            t0 = time.perf_counter_ns()
+        with memoryview(dst) as view:
+            sealed = self._seal(index, len(block), view[:n], field)
+        if stats is not None:
+            stats.add("compress", elapsed_ns)
+            stats.add("encrypt", time.perf_counter_ns() - t0)
+            stats.alloc(len(sealed[1]))
+        return result, sealed, bloom
+
+    def _bloom_lead(self, block):
+        # Start of a token cut by the previous block boundary (None when
+        # no filters are kept); the next lead is this block's last word.
+        if self._filters is None:
+            return None
+        lead = self._lead
+        tail = _TOKEN_TAIL.search(bytes(block[-BLOOM_LEAD:])).group()
+        if len(tail) == len(block):
+            tail = (lead + tail)[-BLOOM_LEAD:]
+        self._lead = tail
+        return lead
+
+    # ------------------------------------------------------
+    # Block pipeline
+    # ------------------------------------------------------
+    def _slot(self, i, block_len, copy=True):
+        # (input copy, compressed output) reused per in-flight slot
+        size = self._warp.block_bound(block_len)
+        while len(self._slots) <= i:
+            self._slots.append((bytearray(0), bytearray(0)))
+        src, dst = self._slots[i]
+        if copy and len(src) < block_len:
+            src = bytearray(block_len)
+            if self.stats is not None:
+                self.stats.alloc(block_len)
+        if len(dst) < size:
+            dst = bytearray(size)
+            if self.stats is not None:
+                self.stats.alloc(size)
+        self._slots[i] = (src, dst)
+        return src, dst
+
+    def _link(self, block):
+        # History for the next block (None at a reset point). Inline, the
+        # Linker keeps it; workers get a copy of the last 64 KB, since the
+        # caller may reuse its buffer after write(). A stored block is
+        # never linked, so decoders start a group there (see _relink).
+        warp = self._warp
+        if warp._starts_group(self._group_bytes):
+            self._group_bytes = 0
+            self._tail.clear()
+            prefix = None
+        elif self._linker is not None:
+            prefix = self._tail
+        else:
+            prefix = bytes(self._tail)
+
+        self._group_bytes += len(block)
+        if warp.linked and self._linker is None:
+            self._tail += block[-LINK_WINDOW:]
+            del self._tail[:-LINK_WINDOW]
+        return prefix
+
+    def _next_size(self):
+        if self._bs is None:
+            # While the bandit samples candidates it needs every result
+            # before choosing again (same schedule as compress_stream).
+            if self._warp.policy.needs_feedback(self._warp.candidates, self._history):
+                self._drain()
+            if self.stats is not None:
+                t0 = time.perf_counter_ns()
+            self._bs = self._warp.policy.choose_block_size(
+                self._warp.candidates, self._history
+            )
+            if self.stats is not None:
+                self.stats.add("bandit", time.perf_counter_ns() - t0)
+                self.stats.choice(self._warp.policy.explored)
+        return self._bs
+
+    def _finish_block(self, bs, outcome):
+        result, (header, sealed), bloom = outcome
+        block_len = BLOCK_HEADER.unpack(header)[0]
+        stats = self.stats
+        if stats is not None:
+            t0 = time.perf_counter_ns()
+        self._warp._record(self._history, bs, result, block_len)
+        if stats is not None:
+            t1 = time.perf_counter_ns()
+            stats.add("bandit", t1 - t0)
+        if self._entries is not None:
+            self._entries += INDEX_ENTRY.pack(self._uoffset, self.bytes_out)
+            self._uoffset += block_len
+        if self._filters is not None:
+            self._filters.append(bloom)
+        self._write_raw(header)
+        self._write_raw(sealed)
+        if stats is not None:
+            stats.add("frame", time.perf_counter_ns() - t1)
+            field = result[1]
+            stats.block(block_len, field_level(field), field & BLOCK_STORED)
+
+    def _relink(self):
+        # A block came out stored: the next one starts a reset group, and
+        # blocks already submitted are redone against it.
+        self._group_bytes = 0
+        self._tail.clear()
+        pool = self._warp._executor() if self._inflight else None
+        for job in self._inflight:
+            job[1].result()
+            index, block, dst, level, _, lead = job[2]
+            job[2] = (index, block, dst, level, self._link(block), lead)
+            job[1] = pool.submit(self._work, *job[2])
+
+    def _collect(self):
+        bs, fut, _ = self._inflight.popleft()
+        outcome = fut.result()
+        self._finish_block(bs, outcome)
+        if outcome[0][1] & BLOCK_STORED and self._warp.linked:
+            self._relink()
+
+    def _drain(self):
+        while self._inflight:
+            self._collect()
+
+    def _submit(self, block):
+        bs, self._bs = self._bs, None
+        index = self._index
+        self._index += 1
+        warp = self._warp
+        lead = self._bloom_lead(block)
+
+        if warp.threads <= 1:
+            _, dst = self._slot(0, len(block), copy=False)
+            prefix = self._link(block)
+            outcome = self._work(index, block, dst, warp._next_level(), prefix, lead)
+            self._finish_block(bs, outcome)
+            if outcome[0][1] & BLOCK_STORED and warp.linked:
+                self._relink()
+            return
+
+        window = warp.threads * 2
+        while len(self._inflight) >= window:
+            self._collect()
+        prefix = self._link(block)           # after _collect: it may relink
+
+        # The caller may reuse its buffer once write() returns → copy.
+        src, dst = self._slot(index % window, len(block))
+        src[:len(block)] = block
+
+        with memoryview(src) as view:
+            args = (index, view[:len(block)], dst, warp._next_level(), prefix, lead)
+        self._inflight.append([bs, warp._executor().submit(self._work, *args), args])
+
+    # ------------------------------------------------------
+    # File API
+    # ------------------------------------------------------
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed FastLogWriter")
+
+        with memoryview(data) as mv:
+            view = mv.cast("B")
+            total = len(view)
+            pos = 0
+
+            if self._pending:
+                need = self._next_size() - len(self._pending)
+                self._pending += view[:need]
+                pos = min(need, total)
+                if len(self._pending) == self._bs:
+                    with memoryview(self._pending) as block:
+                        self._submit(block)
+                    self._pending.clear()
+
+            # Full blocks are compressed straight from the caller's buffer.
+            while not self._pending and total - pos >= self._next_size():
+                bs = self._bs
+                self._submit(view[pos:pos+bs])
+                pos += bs
+
+            if pos < total:
+                self._pending += view[pos:]
+
+        self.bytes_in += total
+        return total
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._pending:
+                self._next_size()
+                with memoryview(self._pending) as block:
+                    self._submit(block)
+                self._pending.clear()
+
+            self._drain()
+            if self.stats is not None:
+                t0 = time.perf_counter_ns()
+            final_at = self.bytes_out
+            if self._entries is None:
+                header, sealed = self._seal(self._index, 0, b"", BLOCK_FINAL)
+            elif self._filters is None:
+                header, sealed = self._seal(
+                    self._index, 0, self._entries, BLOCK_FINAL | BLOCK_INDEX
+                )
+            else:
+                for bits, flags in self._filters:
+                    self._entries += BLOOM_FILTER.pack(len(bits), self._bloom_hashes, flags)
+                    self._entries += bits
+                header, sealed = self._seal(
+                    self._index, 0, self._entries, BLOCK_FINAL | BLOCK_INDEX | BLOCK_BLOOM
+                )
+            self._write_raw(header)
+            self._write_raw(sealed)
+
+            if self._entries is not None:
+                self._write_raw(INDEX_TRAILER.pack(final_at, self._index, INDEX_MAGIC))
+
+            if hasattr(self._fp, "flush"):
+                self._fp.flush()
+            self._warp.save_state()
+
+            if self.stats is not None:
+                self.stats.add("frame", time.perf_counter_ns() - t0)
+                self.stats.bytes_in = self.bytes_in
+                self.stats.bytes_out = self.bytes_out
+                self.core.stats.finish(self.stats)
+                self.core.last_stats = self.stats
+        finally:
+            super().close()
+
+
+class _Spool(io.RawIOBase):
+    # Writer target whose bytes are taken out after each write()
+    def __init__(self):
+        super().__init__()
+        self._buf = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buf += data
+        return len(data)
+
+    def take(self):
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+def iter_encode(chunks, core=None, index=False):
+    """
+    Encode an iterable of byte chunks as one sealed container, yielding its
+    bytes as blocks complete (e.g. a streaming upload body), so neither the
+    input nor the container is held whole in memory.
+    """
+    spool = _Spool()
+    with FastLogWriter(spool, core=core, index=index) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+            data = spool.take()
+            if data:
+                yield data
+    data = spool.take()
+    if data:
+        yield data
+
+
+# ==========================================================
+# STREAMING DECODER
+# ==========================================================
+
+class FastLogReader(io.RawIOBase):
+    """
+    File-like FASTLOG decoder. SEALED containers are read one block at a
+    time and every block is authenticated before any of it is returned.
+    Sealed containers written back to back decode as their concatenation.
+
+    Legacy nonce + AES-GCM(container) blobs are still accepted; for those
+    the single GCM tag is only checked when the end is reached, and a
+    tampered stream raises InvalidTag there.
+    """
+
+    def __init__(self, fileobj, core=None, key=None, chunk_size=READ_CHUNK):
+        super().__init__()
+        self.core = _default_core(core, key=key)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        self._fp = fileobj
+        self._chunk_size = chunk_size
+        self._done = False
+        self._index = 0
+
+        # Sealed containers only: legacy blobs are one AES-GCM stream
+        self.stats = None
+
+        self._out = bytearray()
+        self._olen = 0
+        self._opos = 0
+        self._history = bytearray()
+
+        head = self._read_exact(len(SEALED_MAGIC))
+        self._sealed = head == SEALED_MAGIC
+
+        if self._sealed:
+            self._nonce = self._read_exact(NONCE_SIZE)
+            if self.core.stats is not None:
+                self.stats = self.core.stats.start("decode")
+        else:
+            nonce = head + self._read_exact(NONCE_SIZE - len(head))
+            self._dec = self.core.dcf.decryptor(nonce)
+            self._plain = bytearray()
+            self._ppos = 0
+            self._held = b""
+            self._finalized = False
+            self._remaining = None
+
+    def readable(self):
+        return True
+
+    def _read_exact(self, n):
+        buf = _read_exact(self._fp, n)
+        self.bytes_in += n
+        return buf
+
+    def _decompress(self, payload, field, bs):
+        if len(self._out) < bs:
+            self._out = bytearray(bs)
+            if self.stats is not None:
+                self.stats.alloc(bs)
+        if not field & BLOCK_LINKED:
+            self._history.clear()
+        self._olen = self.core.warp.decode_block_into(
+            payload, field, self._out, 0, bs, self._history
+        )
+        self._opos = 0
+
+        # Last 64 KB of the reset group, for the next linked block
+        with memoryview(self._out) as out:
+            self._history += out[max(0, self._olen - LINK_WINDOW):self._olen]
+        del self._history[:-LINK_WINDOW]
+
+    # ------------------------------------------------------
+    # SEALED container
+    # ------------------------------------------------------
+    def _next_sealed_block(self):
+        stats = self.stats
+        if stats is not None:
+            t0 = time.perf_counter_ns()
+        header = self._read_exact(BLOCK_HEADER.size)
+        bs, clen, field = BLOCK_HEADER.unpack(header)
+        sealed = self._read_exact(clen)
+        if stats is not None:
+            t1 = time.perf_counter_ns()
+            stats.add("frame", t1 - t0)
+        payload = self.core.dcf.open_block(self._nonce, self._index, header, sealed)
+        self._index += 1
+        if stats is not None:
+            t2 = time.perf_counter_ns()
+            stats.add("decrypt", t2 - t1)
+
+        if field & BLOCK_FINAL:
+            if field & BLOCK_INDEX:
+                trailer = self._read_exact(INDEX_TRAILER.size)
+                if INDEX_TRAILER.unpack(trailer)[2] != INDEX_MAGIC:
+                    raise ValueError("Invalid FASTLOG index trailer")
+
+            # Concatenated sealed containers (e.g. `fastlog follow` output)
+            # read as one stream, like gzip members.
+            head = self._fp.read(1)
+            if head:
+                self.bytes_in += 1
+                if head + self._read_exact(len(SEALED_MAGIC) - 1) != SEALED_MAGIC:
+                    raise ValueError("Trailing data after FASTLOG container")
+                self._nonce = self._read_exact(NONCE_SIZE)
+                self._index = 0
+                return True
+
+            self._done = True
+            if stats is not None:
+                stats.bytes_in = self.bytes_in
+                stats.bytes_out = self.bytes_out
+                self.core.stats.finish(stats)
+                self.core.last_stats = stats
+            return False
+
+        self._decompress(payload, field, bs)
+        if stats is not None:
+            stats.add("decompress", time.perf_counter_ns() - t2)
+            stats.block(bs, field_level(field), field & BLOCK_STORED)
+        return True
+
+    # ------------------------------------------------------
+    # Legacy container: ciphertext → plaintext
+    # ------------------------------------------------------
+    def _pump(self):
+        if self._finalized:
+            return False
+
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            if len(self._held) != TAG_SIZE:
+                raise ValueError("Truncated FASTLOG stream")
+            self._plain += self._dec.finalize_with_tag(self._held)
+            self._finalized = True
+            return False
+
+        self.bytes_in += len(chunk)
+
+        # The last TAG_SIZE bytes seen so far may be the GCM tag.
+        data = self._held + chunk
+        self._held = data[-TAG_SIZE:]
+        with memoryview(data) as view:
+            self._plain += self._dec.update(view[:-TAG_SIZE])
+        return True
+
+    def _take(self, n):
+        while len(self._plain) - self._ppos < n:
+            if not self._pump():
+                raise ValueError("Truncated FASTLOG stream")
+        p = self._ppos
+        self._ppos += n
+        return p
+
+    def _finish(self):
+        self._done = True
+        while self._pump():
+            pass
+        if len(self._plain) != self._ppos:
+            raise ValueError("Trailing data after FASTLOG container")
+
+    def _next_legacy_block(self):
+        if self._remaining is None:
+            p = self._take(len(MAGIC) + HEADER_STRUCT.size)
+            if self._plain[p:p+len(MAGIC)] != MAGIC:
+                raise ValueError("Invalid FASTLOGv2 container")
+            (self._remaining,) = HEADER_STRUCT.unpack_from(self._plain, p + len(MAGIC))
+
+        if self._remaining == 0:
+            self._finish()
+            return False
+
+        p = self._take(BLOCK_HEADER.size)
+        bs, clen, level = BLOCK_HEADER.unpack_from(self._plain, p)
+
+        if self._remaining == STREAM_BLOCK_COUNT:
+            if bs == 0 and clen == 0:
+                self._finish()
+                return False
+        else:
+            self._remaining -= 1
+
+        p = self._take(clen)
+        with memoryview(self._plain) as view:
+            self._decompress(view[p:p+clen], level, bs)
+
+        # Drop consumed plaintext so the buffer never exceeds ~one block.
+        del self._plain[:self._ppos]
+        self._ppos = 0
+        return True
+
+    def _next_block(self):
+        if self._done:
+            return False
+        if self._sealed:
+            return self._next_sealed_block()
+        return self._next_legacy_block()
+
+    # ------------------------------------------------------
+    # File API
+    # ------------------------------------------------------
+    def readinto(self, b):
+        while self._opos >= self._olen:
+            if not self._next_block():
+                return 0
+
+        with memoryview(b) as dst:
+            dst = dst.cast("B")
+            n = min(len(dst), self._olen - self._opos)
+            dst[:n] = memoryview(self._out)[self._opos:self._opos+n]
+
+        self._opos += n
+        self.bytes_out += n
+        return n
+
+    def iter_blocks(self):
+        """
+        Yield decoded blocks as memoryviews (valid until the next block).
+        """
+        while True:
+            if self._opos < self._olen:
+                view = memoryview(self._out)[self._opos:self._olen]
+                self.bytes_out += len(view)
+                self._opos = self._olen
+                yield view
+            if not self._next_block():
+                return
+
+    def _read_block(self):
+        # One container step: the block's decoded bytes (b"" for a block
+        # without data, e.g. BLOCK_FINAL), or None at the end. Reads just
+        # that block's bytes from the source (AsyncFastLogCore.decode_stream
+        # relies on it).
+        if not self._next_block():
+            return None
+        with memoryview(self._out) as out:
+            data = bytes(out[self._opos:self._olen])
+        self._opos = self._olen
+        self.bytes_out += len(data)
+        return data
@@ -0,0 +1,100 @@
+import platform
+
+from .bandit import BanditPolicy
+from .benchmark import time_stage, summarize
+from .corpus import CORPUS_TYPES, generate
+from .warp_adapter import WarpAdapter
+
+SWEEP_SIZE = 8 * 1024 * 1024
+# LZ4 fast (acceleration -level) through LZ4 HC max
+SWEEP_LEVELS = (-8, 0, 3, 6, 9, 12)
+SWEEP_BANDITS = ("one", "full", "ucb", "thompson")
+
+def configs(levels=SWEEP_LEVELS, bandits=SWEEP_BANDITS, block_sizes=None):
+    """
+    (bandit, block_size, level) triples to sweep: every fixed block size
+    (bandit off) and every bandit over the adapter's candidates, at each
+    level. A bandit only picks block sizes, so it has no size of its own.
+    """
+    if block_sizes is None:
+        block_sizes = WarpAdapter().candidates
+    modes = [("off", bs) for bs in block_sizes] + [(b, None) for b in bandits if b != "off"]
+    return [(bandit, bs, level) for level in levels for bandit, bs in modes]
+
+def measure(data, bandit, block_size, level, warmup=0, repeats=1):
+    """
+    Encode / decode results of one configuration on `data`. Every run
+    starts from a fresh adapter, like a new process, so bandits pay for
+    their exploration each time.
+    """
+    def encode():
+        warp = WarpAdapter(bandit=bandit, level=level, block_size=block_size)
+        return warp.compress_stream(data)
+
+    container, samples = time_stage(encode, warmup, repeats)
+    row = summarize(samples, len(data), len(container) / len(data))
+
+    warp = WarpAdapter()
+    restored, samples = time_stage(lambda: warp.decompress_stream(container), warmup, repeats)
+    if restored != data:
+        raise RuntimeError("Sweep round trip failed")
+    row["decode_mb_s"] = summarize(samples, len(data), row["ratio"])["mb_s"]
+
+    row.update(bandit=bandit, block_size=block_size, level=level)
+    # Same ratio / speed trade-off the bandits optimise
+    row["score"] = BanditPolicy().reward(len(data), len(container), row["p50_ms"] * 1e6)
+    return row
+
+def recommend(rows, min_mbps=None):
+    """
+    Best configuration among `rows`: the highest score, or with
+    `min_mbps` the best ratio among those encoding at least that fast
+    (the fastest one if none does).
+    """
+    if min_mbps is None:
+        return max(rows, key=lambda r: r["score"])
+    fast = [r for r in rows if r["mb_s"] >= min_mbps]
+    if not fast:
+        return max(rows, key=lambda r: r["mb_s"])
+    return min(fast, key=lambda r: (r["ratio"], -r["mb_s"]))
+
+def run_sweep(kinds=tuple(CORPUS_TYPES), size=SWEEP_SIZE, seed=1, levels=SWEEP_LEVELS,
+              bandits=SWEEP_BANDITS, block_sizes=None, min_mbps=None,
+              warmup=0, repeats=1, progress=None):
+    """
+    Sweep every configuration over a generated corpus of each kind.
+    Returns a JSON-serialisable report with all rows and the recommended
+    configuration per kind. `progress(kind, config)` is called before
+    each measurement.
+    """
+    grid = configs(levels, bandits, block_sizes)
+    results = {}
+    recommended = {}
+    for kind in kinds:
+        data = generate(kind, size, seed)
+        rows = []
+        for bandit, bs, level in grid:
+            if progress is not None:
+                progress(kind, (bandit, bs, level))
+            rows.append(measure(data, bandit, bs, level, warmup, repeats))
+        results[kind] = rows
+        recommended[kind] = recommend(rows, min_mbps)
+
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": size,
+        "seed": seed,
+        "min_mbps": min_mbps,
+        "results": results,
+        "recommended": recommended,
+    }
+
+def config_flags(row):
+    """
+    `fastlog encode` options for a sweep row.
+    """
+    if row["block_size"]:
+        return f"--block-size {row['block_size']} --level {row['level']}"
+    return f"--bandit {row['bandit']} --level {row['level']}"
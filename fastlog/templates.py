@@ -0,0 +1,78 @@
+import re
+from operator import eq
+
+SIM_THRESHOLD = 0.5
+
+_SEPARATOR = re.compile(rb"([ \t]+)")
+
+# ==========================================================
+# Drain-style template mining ("pattern scanner")
+# ==========================================================
+
+class Cluster:
+    """
+    One mined template: the tokens shared by a group of line shapes, None
+    where they differ (a wildcard). `version` grows whenever a token turns
+    into a wildcard, so templates built from an older version stay valid
+    for the shapes that used them.
+    """
+
+    def __init__(self, cid, tokens, separators):
+        self.id = cid
+        self.tokens = tokens
+        self.separators = separators
+        self.version = 0
+        self.shapes = 1
+
+
+class TemplateMiner:
+    """
+    Drain-style clustering of line shapes (lines with their numeric
+    variables masked, see warphybrid.text_split). Shapes are grouped by
+    token count and spacing, like the length layer of Drain's tree (its
+    first-token layer is left out: lines without spaces, e.g. JSON, would
+    get a cluster each). Within a group a shape joins the most similar
+    cluster when at least `sim_threshold` of its tokens match, the
+    differing tokens becoming wildcards, or starts a new cluster.
+
+    Mining runs once per distinct shape, not per line.
+    """
+
+    def __init__(self, sim_threshold=SIM_THRESHOLD):
+        self.sim_threshold = sim_threshold
+        self.clusters = []
+        self._groups = {}
+
+    @staticmethod
+    def tokenize(shape):
+        parts = _SEPARATOR.split(shape)
+        return parts[0::2], parts[1::2]
+
+    def add(self, shape):
+        """
+        Cluster for `shape`, updated to cover it, and the shape's tokens.
+        """
+        tokens, separators = self.tokenize(shape)
+        group = self._groups.setdefault((len(tokens), tuple(separators)), [])
+
+        best, best_sim = None, -1
+        for cluster in group:
+            sim = sum(map(eq, cluster.tokens, tokens))
+            if sim > best_sim:
+                best, best_sim = cluster, sim
+
+        if best is None or best_sim < self.sim_threshold * len(tokens):
+            best = Cluster(len(self.clusters), list(tokens), separators)
+            self.clusters.append(best)
+            group.append(best)
+            return best, tokens
+
+        best.shapes += 1
+        changed = False
+        for i, token in enumerate(tokens):
+            if best.tokens[i] is not None and best.tokens[i] != token:
+                best.tokens[i] = None
+                changed = True
+        if changed:
+            best.version += 1
+        return best, tokens
@@ -1,16 +1,213 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+UPLOAD_CHUNK = 256 * 1024
+
+def iter_file(path, chunk_size=UPLOAD_CHUNK):
+    """
+    Yield the bytes of `path` in chunks (a streaming upload body).
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
 
 class Uploader:
-    def to_splunk(self, blob: bytes, url: str, token: str):
-        headers = {
+    """
+    Ships FASTLOG containers over HTTP.
+
+    One keep-alive requests.Session (connection pool) is kept per endpoint
+    (scheme, host, port). Up to `max_concurrency` uploads run at once on a
+    thread pool; submit_*() blocks once `max_inflight` uploads are queued or
+    running, so a fast producer cannot buffer without limit.
+
+    A body is bytes, an iterable of chunks (sent with chunked transfer
+    encoding, never held whole in memory) or a zero-argument callable
+    returning either. Connection errors and 429 / 5xx replies are retried
+    with jittered exponential backoff; an iterable body can only be sent
+    once, so pass a callable to make streamed uploads retryable.
+    """
+
+    def __init__(self, max_concurrency=4, max_inflight=None, retries=3,
+                 backoff=0.5, max_backoff=30.0, timeout=60.0):
+        self.max_concurrency = max_concurrency
+        self.max_inflight = max_inflight or 2 * max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.attempts = 0
+        self.retried = 0
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._pool = None
+
+    # ------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------
+    def _session(self, url):
+        parts = urlsplit(url)
+        endpoint = (parts.scheme, parts.hostname, parts.port)
+        with self._lock:
+            session = self._sessions.get(endpoint)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[endpoint] = session
+        return session
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="fastlog-upload",
+                )
+            return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------
+    def _delay(self, attempt, response):
+        # Full jitter: uniform in [0, backoff * 2^attempt], capped
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        return delay
+
+    def post(self, url, body, headers=None):
+        """
+        POST `body` to `url` with retries. Returns (status_code, text).
+        """
+        session = self._session(url)
+        attempt = 0
+
+        while True:
+            data = body() if callable(body) else body
+            retryable = callable(body) or isinstance(data, (bytes, bytearray))
+            response = None
+            with self._lock:
+                self.attempts += 1
+            try:
+                response = session.post(url, headers=headers, data=data, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    return response.status_code, response.text
+            except (requests.ConnectionError, requests.Timeout):
+                if not retryable or attempt >= self.retries:
+                    raise
+
+            if not retryable or attempt >= self.retries:
+                return response.status_code, response.text
+
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+            with self._lock:
+                self.retried += 1
+
+    def submit(self, url, body, headers=None):
+        """
+        Queue post() on the upload pool and return its Future. Blocks while
+        `max_inflight` uploads are already queued or running.
+        """
+        self._slots.acquire()
+        try:
+            fut = self._executor().submit(self.post, url, body, headers)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def drain(self, spool, url, headers=None, stop=None, poll=0.5):
+        """
+        Upload the frames of a Spool in order, up to max_concurrency at a
+        time, acknowledging each once the sink accepted it (2xx). Runs until
+        `stop` (a threading.Event) is set, or without one until the spool
+        is empty. A frame that still fails after the retries ends the drain
+        with RuntimeError; unacknowledged frames are delivered again by the
+        next drain.
+        """
+        spool.rewind()
+        pending = set()
+        failed = []
+
+        def done(position, fut):
+            pending.discard(fut)
+            try:
+                status, _ = fut.result()
+            except Exception as e:
+                failed.append(e)
+                return
+            if 200 <= status < 300:
+                spool.ack(position)
+            else:
+                failed.append(RuntimeError(f"Upload rejected with HTTP {status}"))
+
+        while not failed:
+            item = spool.get(timeout=poll if stop is not None else 0)
+            if item is None:
+                if stop is None or stop.is_set():
+                    break
+                continue
+            position, frame = item
+            fut = self.submit(url, frame, headers)
+            pending.add(fut)
+            fut.add_done_callback(lambda f, position=position: done(position, f))
+
+        wait(list(pending))
+        spool.flush()
+        if failed:
+            raise RuntimeError("Spool drain stopped") from failed[0]
+
+    # ------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------
+    def _splunk_headers(self, token):
+        return {
             "Authorization": f"Splunk {token}",
             "Content-Type": "application/octet-stream"
         }
-        r = requests.post(url, headers=headers, data=blob)
-        return r.status_code, r.text
 
-    def to_elk(self, blob: bytes, url: str):
-        headers = {"Content-Type": "application/octet-stream"}
-        r = requests.post(url, headers=headers, data=blob)
-        return r.status_code, r.text
+    def _elk_headers(self):
+        return {"Content-Type": "application/octet-stream"}
+
+    def to_splunk(self, blob, url: str, token: str):
+        return self.post(url, blob, self._splunk_headers(token))
+
+    def to_elk(self, blob, url: str):
+        return self.post(url, blob, self._elk_headers())
+
+    def submit_splunk(self, blob, url: str, token: str):
+        return self.submit(url, blob, self._splunk_headers(token))
 
+    def submit_elk(self, blob, url: str):
+        return self.submit(url, blob, self._elk_headers())
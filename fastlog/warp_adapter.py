@@ -1,98 +1,507 @@
-import struct
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import warphybrid
-from .bandit import OneShotBandit, FullBandit, OffBandit
-from .format import MAGIC, HEADER_STRUCT, BLOCK_HEADER
+from .bandit import make_policy, BanditStore, OffBandit
+from .slo import ThroughputSLO
+from .dictionary import DictionaryStore
+from .format import (
+    MAGIC, HEADER_STRUCT, BLOCK_HEADER, STREAM_BLOCK_COUNT,
+    LEVEL_MASK, BLOCK_STORED, BLOCK_DICT, DICT_ID, BLOCK_LINKED, LINK_WINDOW,
+    field_level,
+)
+
+# Blocks this small are always handed to LZ4: the sampled entropy of a few
+# hundred bytes is too noisy, and the post-compression check covers them.
+ENTROPY_MIN_BLOCK = 1024
+
+# Linked mode: bytes between reset points (independent blocks)
+DEFAULT_RESET_INTERVAL = 8 * 1024 * 1024
 
 class WarpAdapter:
-    def __init__(self, bandit="one", level=9):
-        if bandit == "one":
-            self.policy = OneShotBandit()
-        elif bandit == "full":
-            self.policy = FullBandit()
-        else:
-            self.policy = OffBandit()
+    def __init__(self, bandit="one", level=9, threads=1, entropy_threshold=7.5,
+                 target_mbps=None, latency_budget=None, source=None, state_dir=None,
+                 dictionary=None, dict_dir=None, linked=False,
+                 reset_interval=DEFAULT_RESET_INTERVAL, block_size=None):
+        # A fixed block size replaces the bandit
+        self.policy = OffBandit(block_size) if block_size else make_policy(bandit)
+
+        # Learned arm statistics persist per data source across runs
+        self.source = source
+        self._store = None
+        if source is not None:
+            self._store = BanditStore(state_dir)
+            self._store.load(source, self.policy)
 
         self.level = level
-        self.candidates = [256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+        # Sampled bits/byte at or above which a block is stored raw
+        # (None → always compress)
+        self.entropy_threshold = entropy_threshold
+        self.candidates = [block_size] if block_size else [256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+
+        # threads=1 → compress inline, threads=0/None → one worker per core
+        self.threads = threads or os.cpu_count() or 1
+        self._pool = None
+
+        # Throughput SLO: per-block level choice instead of fixed `level`
+        self.slo = None
+        if target_mbps or latency_budget:
+            self.slo = ThroughputSLO(
+                target_mbps=target_mbps,
+                latency_budget=latency_budget,
+                max_level=level,
+                threads=self.threads,
+            )
+        self._scratch = []
+
+        # Preset dictionary: an ID from the local store, or raw dictionary
+        # bytes (added to the store so decoders on this host find them).
+        self.dicts = DictionaryStore(dict_dir)
+        self.dict_id = None
+        self._dict = None
+        if dictionary is not None:
+            if not isinstance(dictionary, int):
+                dictionary = self.dicts.add(dictionary)
+            self._dict = self.dicts.get(dictionary)
+            self.dict_id = dictionary
+
+        # Linked blocks use the previous 64 KB as history; a reset block
+        # starts every `reset_interval` bytes. Inline encodes stream through
+        # a warphybrid.Linker; threaded ones hand each block its prefix.
+        if linked and self._dict is not None:
+            raise ValueError("Linked blocks and preset dictionaries are exclusive")
+        self.linked = linked
+        self.reset_interval = reset_interval
+
+    def _starts_group(self, group_bytes):
+        # True → the next block is an independent reset point
+        return (not self.linked or group_bytes == 0
+                or group_bytes >= self.reset_interval)
+
+    def block_bound(self, block_len):
+        # Worst-case payload size of one block (dictionary ID included)
+        bound = warphybrid.compress_bound(block_len)
+        return bound + DICT_ID.size if self._dict is not None else bound
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.threads,
+                thread_name_prefix="fastlog-warp",
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def save_state(self):
+        if self._store is not None:
+            self._store.save(self.source, self.policy)
+
+    def _next_level(self):
+        return self.slo.choose() if self.slo is not None else self.level
+
+    def _compress_block(self, block_data, dst, offset, level=None, prefix=None,
+                        linker=None):
+        """
+        Compress (or store) one block at dst[offset:]. Returns
+        (n, field, elapsed_ns); `field` is the header level field.
+
+        `prefix` (the data before the block) makes it a linked block. A
+        sequential caller may pass a warphybrid.Linker instead, which keeps
+        that history itself: prefix None then starts a new reset group and
+        any other prefix only marks the block as linked.
+        """
+        t0 = time.perf_counter_ns()
+
+        if level is None:
+            level = self.level
+
+        n = len(block_data)
+        field = BLOCK_STORED
+
+        if (self.entropy_threshold is None or n < ENTROPY_MIN_BLOCK
+                or warphybrid.entropy(block_data) < self.entropy_threshold):
+            if linker is not None:
+                if prefix is None:
+                    linker.reset()
+                n = linker.compress_into(block_data, dst, offset, level)
+                field = level & LEVEL_MASK
+                if prefix is not None:
+                    field |= BLOCK_LINKED
+            elif prefix is not None:
+                n = warphybrid.compress_into(block_data, dst, offset, level, prefix)
+                field = (level & LEVEL_MASK) | BLOCK_LINKED
+            elif self._dict is None:
+                n = warphybrid.compress_into(block_data, dst, offset, level)
+                field = level & LEVEL_MASK
+            else:
+                DICT_ID.pack_into(dst, offset, self.dict_id)
+                n = DICT_ID.size + warphybrid.compress_into(
+                    block_data, dst, offset + DICT_ID.size, level, self._dict
+                )
+                field = (level & LEVEL_MASK) | BLOCK_DICT
+
+            # LZ4 made it bigger → passthrough after all
+            if n >= len(block_data):
+                n = len(block_data)
+                field = BLOCK_STORED
+                if linker is not None:
+                    linker.reset()
+
+        elif linker is not None:
+            # The stream never saw this block, so it cannot continue past it
+            linker.reset()
+
+        if field & BLOCK_STORED:
+            dst[offset:offset+n] = block_data
+
+        return n, field, max(time.perf_counter_ns() - t0, 1)
+
+    def _record(self, history, bs, result, block_len):
+        n, field, elapsed_ns = result
+
+        if self.slo is not None and not field & BLOCK_STORED:
+            self.slo.update(field_level(field), block_len, elapsed_ns / 1e9)
+
+        # Reward per byte (throughput + space saved), so a short final
+        # block or a bigger block size is not penalised for its length.
+        reward = self.policy.reward(block_len, n, elapsed_ns)
+        self.policy.update_reward(bs, reward)
+
+        if len(history) < len(self.candidates):
+            history.append({
+                "block_size": bs,
+                "ratio": n / block_len,
+                "speed": block_len * 1e9 / elapsed_ns,
+                "reward": reward,
+            })
+
+        return n, field
+
+    # ======================================================
+    # BLOCK DECODE (shared by every container reader)
+    # ======================================================
+    def decode_block_into(self, payload, field, out, offset, bs, prefix=None):
+        """
+        Decode one block payload into out[offset:]. Linked blocks need
+        `prefix`: the decoded data before them, back to their reset point.
+        """
+        if field & BLOCK_STORED:
+            n = len(payload)
+            if n > bs:
+                raise RuntimeError("Block decompress failed")
+            out[offset:offset+n] = payload
+            return n
+        if field & BLOCK_LINKED:
+            if prefix is None:
+                raise ValueError("Linked block decoded without its preceding data")
+            return warphybrid.decompress_into(payload, out, offset, bs, prefix)
+        if field & BLOCK_DICT:
+            (ident,) = DICT_ID.unpack_from(payload)
+            with memoryview(payload) as view:
+                return warphybrid.decompress_into(
+                    view[DICT_ID.size:], out, offset, bs, self.dicts.get(ident)
+                )
+        return warphybrid.decompress_into(payload, out, offset, bs)
+
+    def decode_block(self, payload, field, bs, prefix=None):
+        if field & BLOCK_STORED:
+            return bytes(payload)
+        if field & (BLOCK_DICT | BLOCK_LINKED):
+            out = bytearray(bs)
+            n = self.decode_block_into(payload, field, out, 0, bs, prefix)
+            return bytes(out[:n])
+        return warphybrid.decompress_block(payload, bs)
 
-    def _compress_block(self, block_data):
-        import time
-        t0 = time.time()
+    def _map_groups(self, fields, run):
+        """
+        Call run(i, first) for every block i (first = its reset point):
+        in order within a reset group, groups in parallel. Returns the
+        results in block order.
+        """
+        groups = []
+        for i, field in enumerate(fields):
+            if field & BLOCK_LINKED and groups:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
 
-        out = warphybrid.compress_block(block_data, self.level)
+        def run_group(group):
+            return [run(i, group[0]) for i in group]
 
-        t1 = time.time()
-        ratio = len(out) / len(block_data)
-        speed = 1.0 / (t1 - t0)
+        if self.threads > 1 and len(groups) > 1:
+            results = list(self._executor().map(run_group, groups))
+        else:
+            results = [run_group(g) for g in groups]
+        return [r for group in results for r in group]
+
+    def _reserve(self, blob, need):
+        # Grow geometrically so a block schedule the estimate did not
+        # foresee costs O(log n) reallocations, not one per block.
+        if len(blob) < need:
+            blob.extend(bytes(max(need - len(blob), len(blob) // 2)))
+
+    def _scratch_slot(self, i, block_len):
+        # One reusable output buffer per in-flight block, kept across calls.
+        bound = self.block_bound(block_len)
+        while len(self._scratch) <= i:
+            self._scratch.append(bytearray(0))
+        if len(self._scratch[i]) < bound:
+            self._scratch[i] = bytearray(bound)
+        return self._scratch[i]
 
-        return out, ratio, (t1 - t0), speed
+    def _link_prefix(self, src, offset, group_start):
+        # History for the block at `offset` (None at a reset point). A
+        # stored block is never linked, so decoders start a group there:
+        # callers move group_start past it.
+        if self._starts_group(offset - group_start):
+            return None, offset
+        return src[max(group_start, offset - LINK_WINDOW):offset], group_start
 
     # ======================================================
     # STREAM ENCODER
     # ======================================================
+    def _native(self):
+        # The container loop runs in C unless blocks need per-block
+        # Python state (SLO level choice, linked history, dictionaries).
+        return self.slo is None and not self.linked and self._dict is None
+
+    def _plan(self, remaining, history):
+        # Block sizes for the next native call: enough to cover `remaining`
+        # once the policy has settled on one size, otherwise a single block
+        # so every choice sees the rewards of all blocks before it.
+        sizes = []
+        while remaining > 0:
+            bs = self.policy.choose_block_size(self.candidates, history)
+            sizes.append(bs)
+            remaining -= bs
+            if not self.policy.settled():
+                break
+        return sizes
+
+    def _compress_native(self, src):
+        """
+        compress_stream() with the per-block loop in warphybrid: the bandit
+        plans the block sizes, warphybrid.encode_blocks appends the blocks
+        to the container and reports (n, field, elapsed_ns) for each.
+        """
+        length = len(src)
+        history = []
+        offset = 0
+        count = 0
+        blob = bytearray(len(MAGIC) + HEADER_STRUCT.size)
+
+        while offset < length:
+            sizes = self._plan(length - offset, history)
+            results = warphybrid.encode_blocks(
+                src[offset:], sizes, blob, self.level,
+                self.entropy_threshold, ENTROPY_MIN_BLOCK,
+            )
+            for bs, result in zip(sizes, results):
+                block_len = min(bs, length - offset)
+                self._record(history, bs, result, block_len)
+                offset += block_len
+            count += len(results)
+
+        blob[:len(MAGIC)] = MAGIC
+        HEADER_STRUCT.pack_into(blob, len(MAGIC), count)
+
+        self.save_state()
+        return blob
+
     def compress_stream(self, data: bytes):
+        """
+        Encode any C-contiguous buffer (bytes, memoryview, mmap, numpy
+        array...) into a FASTLOGv2 container. Blocks are compressed from
+        zero-copy views straight into one output buffer, which is returned
+        as a bytearray.
+        """
+        src = memoryview(data).cast("B")
+        if self.threads <= 1 and self._native():
+            return self._compress_native(src)
+
         offset = 0
-        length = len(data)
+        length = len(src)
         history = []
-        blocks = []
+        count = 0
+        group_start = 0
 
-        while offset < length:
-            bs = self.policy.choose_block_size(self.candidates, history)
-            block = data[offset:offset+bs]
-            offset += bs
+        if self.slo is not None:
+            self.slo.start(length)
+
+        head = len(MAGIC) + HEADER_STRUCT.size
+        p = head
+        per_block = BLOCK_HEADER.size + self.block_bound(0)
+        # Sized on demand: reserving the worst case for the whole stream
+        # up front would touch ~len(data) bytes even for 200:1 log data.
+        blob = bytearray(head)
 
-            out, ratio, t, speed = self._compress_block(block)
+        if self.threads <= 1:
+            linker = warphybrid.Linker() if self.linked else None
+            while offset < length:
+                bs = self.policy.choose_block_size(self.candidates, history)
+                prefix, group_start = self._link_prefix(src, offset, group_start)
+                block = src[offset:offset+bs]
+                offset += bs
 
-            if hasattr(self.policy, "update_reward"):
-                self.policy.update_reward(bs, t, ratio)
+                self._reserve(blob, p + per_block + len(block) + len(block) // 255)
+                n, field = self._record(history, bs, self._compress_block(
+                    block, blob, p + BLOCK_HEADER.size, self._next_level(), prefix, linker
+                ), len(block))
 
-            if len(history) < len(self.candidates):
-                history.append({
-                    "block_size": bs,
-                    "ratio": ratio,
-                    "speed": speed
-                })
+                BLOCK_HEADER.pack_into(blob, p, len(block), n, field)
+                p += BLOCK_HEADER.size + n
+                count += 1
+                if field & BLOCK_STORED:
+                    group_start = offset
+        else:
+            # Blocks are submitted in stream order and collected in stream
+            # order, so the container is byte-identical to the inline path.
+            pool = self._executor()
+            window = self.threads * 2
+            pending = deque()
+            submitted = 0
+
+            while offset < length or pending:
+                # While the bandit is still sampling candidates, wait for
+                # each result so it picks the same sizes as the inline path.
+                if self.policy.needs_feedback(self.candidates, history):
+                    limit = 1
+                else:
+                    limit = window
+
+                while offset < length and len(pending) < limit:
+                    bs = self.policy.choose_block_size(self.candidates, history)
+                    start = offset
+                    prefix, group_start = self._link_prefix(src, start, group_start)
+                    block = src[offset:offset+bs]
+                    offset += bs
+
+                    slot = self._scratch_slot(submitted % window, len(block))
+                    submitted += 1
+                    level = self._next_level()
+                    fut = pool.submit(self._compress_block, block, slot, 0, level, prefix)
+                    pending.append([bs, start, block, slot, level, fut])
+
+                bs, start, block, slot, level, fut = pending.popleft()
+                block_len = len(block)
+                n, field = self._record(history, bs, fut.result(), block_len)
 
-            blocks.append((bs, len(out), out))
+                if field & BLOCK_STORED and self.linked:
+                    # Blocks already submitted may reach back past this
+                    # one: redo them against the new reset point.
+                    group_start = start + block_len
+                    for job in pending:
+                        job[5].result()
+                        prefix, group_start = self._link_prefix(src, job[1], group_start)
+                        job[5] = pool.submit(
+                            self._compress_block, job[2], job[3], 0, job[4], prefix
+                        )
 
-        blob = bytearray()
-        blob.extend(MAGIC)
-        blob.extend(HEADER_STRUCT.pack(len(blocks)))
+                self._reserve(blob, p + BLOCK_HEADER.size + n)
+                BLOCK_HEADER.pack_into(blob, p, block_len, n, field)
+                p += BLOCK_HEADER.size
+                blob[p:p+n] = memoryview(slot)[:n]
+                p += n
+                count += 1
 
-        for (orig_bs, clen, cblk) in blocks:
-            blob.extend(BLOCK_HEADER.pack(orig_bs, clen, self.level))
-            blob.extend(cblk)
+        blob[:len(MAGIC)] = MAGIC
+        HEADER_STRUCT.pack_into(blob, len(MAGIC), count)
+        del blob[p:]
 
-        return bytes(blob)
+        self.save_state()
+        return blob
 
     # ======================================================
-    # STREAM DECODER (FIXED)
+    # STREAM DECODER
     # ======================================================
-    def decompress_stream(self, blob: bytes):
+    def _block_table(self, blob):
+        """
+        Walk the block headers without touching any payload.
+        Returns (view, [(src_offset, clen, dst_offset, block_size, field)], total).
+        """
+        view = memoryview(blob)
         p = 0
 
-        if blob[p:p+len(MAGIC)] != MAGIC:
+        if view[p:p+len(MAGIC)] != MAGIC:
             raise ValueError("Invalid FASTLOGv2 container")
         p += len(MAGIC)
 
-        (block_count,) = HEADER_STRUCT.unpack(blob[p:p+HEADER_STRUCT.size])
+        (block_count,) = HEADER_STRUCT.unpack_from(view, p)
         p += HEADER_STRUCT.size
 
-        out = bytearray()
+        streamed = block_count == STREAM_BLOCK_COUNT
+        table = []
+        dst = 0
 
-        for _ in range(block_count):
-            bs, clen, level = BLOCK_HEADER.unpack(blob[p:p+BLOCK_HEADER.size])
+        while streamed or len(table) < block_count:
+            bs, clen, level = BLOCK_HEADER.unpack_from(view, p)
             p += BLOCK_HEADER.size
 
-            cblk = blob[p:p+clen]
+            if streamed and bs == 0 and clen == 0:
+                break
+
+            table.append((p, clen, dst, bs, level))
             p += clen
+            dst += bs
+
+        if p > len(view):
+            raise ValueError("Truncated FASTLOGv2 container")
+
+        return view, table, dst
 
-            # 🔥 FIX: pass original block size `bs`
-            dec = warphybrid.decompress_block(cblk, bs)
-            if dec is None:
+    def _decode_table(self, view, table, out):
+        def run(i, first):
+            src, clen, dst, bs, field = table[i]
+            start = max(table[first][2], dst - LINK_WINDOW)
+            with memoryview(out) as mv:
+                return self.decode_block_into(
+                    view[src:src+clen], field, out, dst, bs, mv[start:dst]
+                )
+
+        written = self._map_groups([entry[4] for entry in table], run)
+
+        # Only the last block may be short (containers written before the
+        # headers carried the exact size record the requested block size).
+        for entry, n in zip(table[:-1], written[:-1]):
+            if n != entry[3]:
                 raise RuntimeError("Block decompress failed")
 
-            out.extend(dec)
+        if not table:
+            return 0
+        return table[-1][2] + written[-1]
+
+    def decompress_stream_into(self, blob, out):
+        """
+        Decode a container straight into `out` (any writable buffer at
+        least as large as the block sizes recorded in the headers).
+        Returns the number of bytes written.
+        """
+        if self.threads <= 1:
+            return warphybrid.decode_container_into(blob, out, self.dicts.get)
+
+        view, table, total = self._block_table(blob)
+        if len(out) < total:
+            raise ValueError("Output buffer too small for container")
+
+        return self._decode_table(view, table, out)
+
+    def decompress_stream(self, blob: bytes):
+        # Inline decode: the whole block loop runs in warphybrid
+        if self.threads <= 1:
+            return warphybrid.decode_container(blob, self.dicts.get)
+
+        view, table, total = self._block_table(blob)
 
-        return bytes(out)
+        # One allocation for the whole output; blocks land at their offsets.
+        out = bytearray(total)
+        n = self._decode_table(view, table, out)
+        if n != total:
+            del out[n:]
 
+        return out
@@ -3,6 +3,10 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
+#include <limits.h>
+#include <math.h>
+#include <stdint.h>
+#include <time.h>
 
 #include "warphybrid.h"
 #include "lz4.h"
@@ -12,33 +16,371 @@
 // Low-Level Hybrid Functions (Primary + Fallback)
 // ===============================================
 
-static int primary_compress(
+static int primary_compress_into(
     const unsigned char* input,
     size_t input_len,
-    unsigned char** out,
+    unsigned char* dst,
+    size_t dst_capacity,
     size_t* out_len,
     int level
 ) {
-    int max_dst = LZ4_compressBound((int)input_len);
-    *out = (unsigned char*)malloc(max_dst);
-    if (!*out) {
+    int written;
+
+    // level > 0 → LZ4 HC at that level
+    // level <= 0 → LZ4 fast with acceleration -level (0 behaves as 1)
+    if (level > 0) {
+        written = LZ4_compress_HC(
+            (const char*)input,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity,
+            level
+        );
+    } else {
+        written = LZ4_compress_fast(
+            (const char*)input,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity,
+            level < 0 ? -level : 1
+        );
+    }
+
+    if (written <= 0) {
+#if WH_DEBUG
+        printf("[PRIMARY] FAILED\n");
+#endif
         return WH_ERR_COMPRESS;
     }
 
-    int written = LZ4_compress_HC(
+    *out_len = (size_t)written;
+    return WH_OK;
+}
+
+static int fallback_compress_into(
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    size_t* out_len
+) {
+    int written = LZ4_compress_default(
         (const char*)input,
-        (char*)*out,
+        (char*)dst,
         (int)input_len,
-        max_dst,
-        level
+        (int)dst_capacity
     );
 
     if (written <= 0) {
 #if WH_DEBUG
-        printf("[PRIMARY] FAILED\n");
+        printf("[FALLBACK] FAILED\n");
+#endif
+        return WH_ERR_FALLBACK;
+    }
+
+    *out_len = (size_t)written;
+    return WH_OK;
+}
+
+// ===============================================
+// Prefix compression (linked blocks)
+// ===============================================
+
+static int primary_compress_prefix_into(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* prefix,
+    size_t prefix_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    size_t* out_len,
+    int level
+) {
+    int written;
+
+    // LZ4 only reaches back 64 KB, so only the tail of the prefix matters.
+    if (prefix_len > WH_DICT_WINDOW) {
+        prefix += prefix_len - WH_DICT_WINDOW;
+        prefix_len = WH_DICT_WINDOW;
+    }
+
+    if (level > 0) {
+        LZ4_streamHC_t* state = LZ4_createStreamHC();
+        if (!state)
+            return WH_ERR_COMPRESS;
+        LZ4_resetStreamHC(state, level);
+        LZ4_loadDictHC(state, (const char*)prefix, (int)prefix_len);
+        written = LZ4_compress_HC_continue(
+            state,
+            (const char*)input,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity
+        );
+        LZ4_freeStreamHC(state);
+    } else {
+        LZ4_stream_t state;
+        LZ4_initStream(&state, sizeof(state));
+        LZ4_loadDict(&state, (const char*)prefix, (int)prefix_len);
+        written = LZ4_compress_fast_continue(
+            &state,
+            (const char*)input,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity,
+            level < 0 ? -level : 1
+        );
+    }
+
+    if (written <= 0) {
+#if WH_DEBUG
+        printf("[PRIMARY PREFIX] FAILED\n");
+#endif
+        return WH_ERR_COMPRESS;
+    }
+
+    *out_len = (size_t)written;
+    return WH_OK;
+}
+
+// ===============================================
+// Linker (streaming linked blocks, one stream per reset group)
+// ===============================================
+
+struct wh_linker {
+    LZ4_streamHC_t* hc;
+    LZ4_stream_t* fast;
+    int level;                          // level of the open stream
+    int open;                           // 0 → next block starts a group
+    unsigned char* ring;                // history + blocks of the group, contiguous
+    size_t cap;
+    size_t used;
+};
+
+wh_linker* wh_linker_create(void) {
+    wh_linker* l = (wh_linker*)calloc(1, sizeof(wh_linker));
+    if (!l)
+        return NULL;
+    l->hc = LZ4_createStreamHC();
+    l->fast = LZ4_createStream();
+    if (!l->hc || !l->fast) {
+        wh_linker_free(l);
+        return NULL;
+    }
+    return l;
+}
+
+void wh_linker_reset(wh_linker* l) {
+    l->open = 0;
+}
+
+void wh_linker_free(wh_linker* l) {
+    if (!l)
+        return;
+    LZ4_freeStreamHC(l->hc);
+    LZ4_freeStream(l->fast);
+    free(l->ring);
+    free(l);
+}
+
+int wh_linker_compress_into(
+    wh_linker* l,
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+) {
+    int written;
+
+    // A level change restarts the stream: the block then simply does not
+    // reference earlier data, which every decoder handles.
+    if (!l->open || l->level != level) {
+        if (level > 0)
+            LZ4_resetStreamHC(l->hc, level);
+        else
+            LZ4_initStream(l->fast, sizeof(LZ4_stream_t));
+        l->level = level;
+        l->open = 1;
+        l->used = 0;
+    }
+
+    // The stream keeps its match state across blocks (no per-block
+    // dictionary load). Blocks are copied into `ring` back to back, so
+    // the stream's prefix spans earlier blocks too, up to 64 KB back;
+    // when the next block does not fit, saveDict moves the last 64 KB to
+    // the start (of a bigger buffer, if needed). The caller's input
+    // buffer may be reused.
+    if (l->used + input_len > l->cap) {
+        size_t need = WH_DICT_WINDOW + input_len;
+        unsigned char* target = l->ring;
+        if (l->cap < need) {
+            target = (unsigned char*)malloc(need);
+            if (!target)
+                return WH_ERR_ALLOC;
+        }
+        int kept = 0;
+        if (l->used)
+            kept = level > 0
+                ? LZ4_saveDictHC(l->hc, (char*)target, WH_DICT_WINDOW)
+                : LZ4_saveDict(l->fast, (char*)target, WH_DICT_WINDOW);
+        if (target != l->ring) {
+            free(l->ring);
+            l->ring = target;
+            l->cap = need;
+        }
+        l->used = (size_t)kept;
+    }
+    unsigned char* block = l->ring + l->used;
+    memcpy(block, input, input_len);
+
+    if (level > 0) {
+        written = LZ4_compress_HC_continue(
+            l->hc,
+            (const char*)block,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity
+        );
+    } else {
+        written = LZ4_compress_fast_continue(
+            l->fast,
+            (const char*)block,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity,
+            level < 0 ? -level : 1
+        );
+    }
+    l->used += input_len;
+
+    if (written <= 0) {
+        l->open = 0;
+        return fallback_compress_into(
+            input, input_len,
+            dst, dst_capacity,
+            out_len
+        );
+    }
+
+    *out_len = (size_t)written;
+    return WH_OK;
+}
+
+// ===============================================
+// Preset dictionaries (prepared once, copied per block)
+// ===============================================
+
+struct wh_dict {
+    unsigned char* data;                        // last <= WH_DICT_WINDOW bytes
+    size_t len;
+    LZ4_stream_t* fast;                         // loaded with LZ4_loadDict
+    LZ4_streamHC_t* hc[LZ4HC_CLEVEL_MAX + 1];   // loaded per HC level on demand
+};
+
+wh_dict* wh_dict_create(const unsigned char* dict, size_t dict_len) {
+    // LZ4 only reaches back 64 KB, so only the dictionary tail matters.
+    if (dict_len > WH_DICT_WINDOW) {
+        dict += dict_len - WH_DICT_WINDOW;
+        dict_len = WH_DICT_WINDOW;
+    }
+
+    wh_dict* d = (wh_dict*)calloc(1, sizeof(wh_dict));
+    if (!d)
+        return NULL;
+
+    d->data = (unsigned char*)malloc(dict_len ? dict_len : 1);
+    d->fast = LZ4_createStream();
+    if (!d->data || !d->fast) {
+        wh_dict_free(d);
+        return NULL;
+    }
+
+    memcpy(d->data, dict, dict_len);
+    d->len = dict_len;
+    LZ4_loadDict(d->fast, (const char*)d->data, (int)d->len);
+    return d;
+}
+
+static int dict_hc_slot(int level) {
+    return level > LZ4HC_CLEVEL_MAX ? LZ4HC_CLEVEL_MAX : level;
+}
+
+int wh_dict_prepare(wh_dict* d, int level) {
+    if (level <= 0)
+        return WH_OK;
+
+    int slot = dict_hc_slot(level);
+    if (d->hc[slot])
+        return WH_OK;
+
+    LZ4_streamHC_t* state = LZ4_createStreamHC();
+    if (!state)
+        return WH_ERR_COMPRESS;
+    LZ4_resetStreamHC(state, slot);
+    LZ4_loadDictHC(state, (const char*)d->data, (int)d->len);
+    d->hc[slot] = state;
+    return WH_OK;
+}
+
+void wh_dict_free(wh_dict* d) {
+    if (!d)
+        return;
+    for (int i = 0; i <= LZ4HC_CLEVEL_MAX; i++)
+        LZ4_freeStreamHC(d->hc[i]);
+    LZ4_freeStream(d->fast);
+    free(d->data);
+    free(d);
+}
+
+static int primary_compress_dict_into(
+    const unsigned char* input,
+    size_t input_len,
+    const wh_dict* dict,
+    unsigned char* dst,
+    size_t dst_capacity,
+    size_t* out_len,
+    int level
+) {
+    int written;
+
+    // Copying a loaded stream is ~10x cheaper than loading the dictionary
+    // again, and leaves the shared prepared state untouched for other threads.
+    if (level > 0) {
+        const LZ4_streamHC_t* prepared = dict->hc[dict_hc_slot(level)];
+        if (!prepared)
+            return WH_ERR_COMPRESS;
+
+        LZ4_streamHC_t* state = (LZ4_streamHC_t*)malloc(sizeof(LZ4_streamHC_t));
+        if (!state)
+            return WH_ERR_COMPRESS;
+        memcpy(state, prepared, sizeof(LZ4_streamHC_t));
+        written = LZ4_compress_HC_continue(
+            state,
+            (const char*)input,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity
+        );
+        free(state);
+    } else {
+        LZ4_stream_t state;
+        memcpy(&state, dict->fast, sizeof(LZ4_stream_t));
+        written = LZ4_compress_fast_continue(
+            &state,
+            (const char*)input,
+            (char*)dst,
+            (int)input_len,
+            (int)dst_capacity,
+            level < 0 ? -level : 1
+        );
+    }
+
+    if (written <= 0) {
+#if WH_DEBUG
+        printf("[PRIMARY DICT] FAILED\n");
 #endif
-        free(*out);
-        *out = NULL;
         return WH_ERR_COMPRESS;
     }
 
@@ -46,6 +388,30 @@ static int primary_compress(
     return WH_OK;
 }
 
+static int primary_compress(
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char** out,
+    size_t* out_len,
+    int level
+) {
+    int max_dst = LZ4_compressBound((int)input_len);
+    *out = (unsigned char*)malloc(max_dst);
+    if (!*out) {
+        return WH_ERR_COMPRESS;
+    }
+
+    int status = primary_compress_into(
+        input, input_len, *out, (size_t)max_dst, out_len, level
+    );
+
+    if (status != WH_OK) {
+        free(*out);
+        *out = NULL;
+    }
+    return status;
+}
+
 static int fallback_compress(
     const unsigned char* input,
     size_t input_len,
@@ -58,24 +424,15 @@ static int fallback_compress(
         return WH_ERR_FALLBACK;
     }
 
-    int written = LZ4_compress_default(
-        (const char*)input,
-        (char*)*out,
-        (int)input_len,
-        max_dst
+    int status = fallback_compress_into(
+        input, input_len, *out, (size_t)max_dst, out_len
     );
 
-    if (written <= 0) {
-#if WH_DEBUG
-        printf("[FALLBACK] FAILED\n");
-#endif
+    if (status != WH_OK) {
         free(*out);
         *out = NULL;
-        return WH_ERR_FALLBACK;
     }
-
-    *out_len = (size_t)written;
-    return WH_OK;
+    return status;
 }
 
 
@@ -177,6 +534,84 @@ unsigned char* wh_compress_block(
     return out;
 }
 
+int wh_compress_block_into(
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+) {
+    int status = primary_compress_into(
+        input, input_len,
+        dst, dst_capacity,
+        out_len, level
+    );
+
+    if (status == WH_OK)
+        return status;
+
+    return fallback_compress_into(
+        input, input_len,
+        dst, dst_capacity,
+        out_len
+    );
+}
+
+int wh_compress_block_dict_into(
+    const unsigned char* input,
+    size_t input_len,
+    const wh_dict* dict,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+) {
+    int status = primary_compress_dict_into(
+        input, input_len,
+        dict,
+        dst, dst_capacity,
+        out_len, level
+    );
+
+    if (status == WH_OK)
+        return status;
+
+    // A dictionary-free block is still valid input for the dict decoder.
+    return fallback_compress_into(
+        input, input_len,
+        dst, dst_capacity,
+        out_len
+    );
+}
+
+int wh_compress_block_prefix_into(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* prefix,
+    size_t prefix_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+) {
+    int status = primary_compress_prefix_into(
+        input, input_len,
+        prefix, prefix_len,
+        dst, dst_capacity,
+        out_len, level
+    );
+
+    if (status == WH_OK)
+        return status;
+
+    return fallback_compress_into(
+        input, input_len,
+        dst, dst_capacity,
+        out_len
+    );
+}
+
 unsigned char* wh_decompress_block(
     const unsigned char* input,
     size_t input_len,
@@ -209,63 +644,702 @@ unsigned char* wh_decompress_block(
     return out;
 }
 
+int wh_decompress_block_into(
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t expected_size,
+    size_t* out_len
+) {
+    // Same as wh_decompress_block, but the caller owns the output memory
+    // (e.g. the block's slot inside one preallocated container buffer).
+    int written = LZ4_decompress_safe(
+        (const char*)input,
+        (char*)dst,
+        (int)input_len,
+        (int)expected_size
+    );
 
-// ===============================================
-// Helper: Convert C buffer → Python bytes
-// ===============================================
+    if (written < 0) {
+        return WH_ERR_DECOMPRESS;
+    }
 
-static PyObject* py_bytes_from_buf(unsigned char* buf, size_t len) {
-    PyObject* obj = PyBytes_FromStringAndSize((const char*)buf, len);
-    free(buf);
-    return obj;
+    *out_len = (size_t)written;
+    return WH_OK;
 }
 
+int wh_decompress_block_prefix_into(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* prefix,
+    size_t prefix_len,
+    unsigned char* dst,
+    size_t expected_size,
+    size_t* out_len
+) {
+    if (prefix_len > WH_DICT_WINDOW) {
+        prefix += prefix_len - WH_DICT_WINDOW;
+        prefix_len = WH_DICT_WINDOW;
+    }
 
-// ===============================================
-// Python bindings for OLD API
-// ===============================================
-
-static PyObject* py_wh_compress(PyObject* self, PyObject* args) {
-    const unsigned char* input;
-    Py_ssize_t input_len;
-    int level, threads, block_size;
-
-    if (!PyArg_ParseTuple(args, "y#iii",
-        &input, &input_len,
-        &level, &threads, &block_size))
-        return NULL;
-
-    size_t out_len = 0;
-    int status = 0;
-
-    unsigned char* out = warphybrid_compress(
-        input, (size_t)input_len,
-        level, threads, block_size,
-        &out_len, &status
+    // A prefix that ends right where dst starts (the previous block in
+    // the same output buffer) takes LZ4's faster in-place history path.
+    int written = LZ4_decompress_safe_usingDict(
+        (const char*)input,
+        (char*)dst,
+        (int)input_len,
+        (int)expected_size,
+        (const char*)prefix,
+        (int)prefix_len
     );
 
-    if (!out || status != WH_OK) {
-        PyErr_SetString(PyExc_RuntimeError, "Hybrid compress failed");
-        return NULL;
+    if (written < 0) {
+        return WH_ERR_DECOMPRESS;
     }
 
-    return py_bytes_from_buf(out, out_len);
+    *out_len = (size_t)written;
+    return WH_OK;
 }
 
-static PyObject* py_wh_decompress(PyObject* self, PyObject* args) {
-    const unsigned char* input;
-    Py_ssize_t input_len;
-
-    if (!PyArg_ParseTuple(args, "y#", &input, &input_len))
-        return NULL;
-
-    size_t out_len = 0;
-    int status = 0;
-
-    unsigned char* out = warphybrid_decompress(
+int wh_decompress_block_dict_into(
+    const unsigned char* input,
+    size_t input_len,
+    const wh_dict* dict,
+    unsigned char* dst,
+    size_t expected_size,
+    size_t* out_len
+) {
+    return wh_decompress_block_prefix_into(
+        input, input_len,
+        dict->data, dict->len,
+        dst, expected_size,
+        out_len
+    );
+}
+
+
+// ===============================================
+// Random / incompressible data detector
+// ===============================================
+
+double wh_sample_entropy(
+    const unsigned char* input,
+    size_t input_len
+) {
+    // Shannon entropy (bits/byte) of a byte histogram taken over
+    // WH_SAMPLE_WINDOWS windows spread evenly across the block, so the
+    // cost is fixed (~4 KB touched) whatever the block size.
+    size_t hist[256] = {0};
+    size_t total = 0;
+
+    if (input_len == 0)
+        return 0.0;
+
+    if (input_len <= WH_SAMPLE_WINDOWS * WH_SAMPLE_WINDOW) {
+        for (size_t i = 0; i < input_len; i++)
+            hist[input[i]]++;
+        total = input_len;
+    } else {
+        size_t stride = input_len / WH_SAMPLE_WINDOWS;
+        for (size_t w = 0; w < WH_SAMPLE_WINDOWS; w++) {
+            const unsigned char* p = input + w * stride;
+            for (size_t i = 0; i < WH_SAMPLE_WINDOW; i++)
+                hist[p[i]]++;
+        }
+        total = WH_SAMPLE_WINDOWS * WH_SAMPLE_WINDOW;
+    }
+
+    double h = 0.0;
+    for (int b = 0; b < 256; b++) {
+        if (hist[b]) {
+            double prob = (double)hist[b] / (double)total;
+            h -= prob * log2(prob);
+        }
+    }
+    return h;
+}
+
+
+// ===============================================
+// Token Bloom filters
+// ===============================================
+
+static int is_token_byte(unsigned char c) {
+    return (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z') ||
+           (c >= '0' && c <= '9') || c == '_';
+}
+
+uint64_t wh_token_hash(const unsigned char* p, size_t n, uint64_t h) {
+    for (size_t i = 0; i < n; i++) {
+        unsigned char c = p[i];
+        if (c >= 'A' && c <= 'Z')
+            c += 'a' - 'A';
+        h = (h ^ c) * 1099511628211ULL;
+    }
+    return h;
+}
+
+static void bloom_set(unsigned char* bits, uint64_t mask, uint64_t h, unsigned int hashes) {
+    uint64_t step = (h >> 32) | 1;
+    for (unsigned int i = 0; i < hashes; i++) {
+        uint64_t bit = (h + i * step) & mask;
+        bits[bit >> 3] |= (unsigned char)(1u << (bit & 7));
+    }
+}
+
+int wh_bloom_contains(
+    const unsigned char* filter,
+    size_t filter_len,
+    uint64_t h,
+    unsigned int hashes
+) {
+    if (filter_len == 0)
+        return 0;
+    uint64_t mask = (uint64_t)filter_len * 8 - 1;
+    uint64_t step = (h >> 32) | 1;
+    for (unsigned int i = 0; i < hashes; i++) {
+        uint64_t bit = (h + i * step) & mask;
+        if (!(filter[bit >> 3] & (1u << (bit & 7))))
+            return 0;
+    }
+    return 1;
+}
+
+// Open-addressing set of token hashes (0 = empty slot), grown to keep
+// it at most half full: log blocks repeat a few thousand tokens, so
+// sizing it for the worst case (input_len / 2) would waste megabytes.
+#define WH_TOKEN_SET_MIN 1024
+
+static size_t token_slot(const uint64_t* set, size_t slots, uint64_t h) {
+    size_t slot = (size_t)(h ^ (h >> 29)) & (slots - 1);
+    while (set[slot] && set[slot] != h)
+        slot = (slot + 1) & (slots - 1);
+    return slot;
+}
+
+static uint64_t* token_set_grow(uint64_t* set, size_t* slots) {
+    size_t grown = *slots * 2;
+    uint64_t* bigger = calloc(grown, sizeof(uint64_t));
+    if (!bigger)
+        return NULL;
+    for (size_t s = 0; s < *slots; s++) {
+        if (set[s])
+            bigger[token_slot(bigger, grown, set[s])] = set[s];
+    }
+    free(set);
+    *slots = grown;
+    return bigger;
+}
+
+int wh_bloom_build(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* lead,
+    size_t lead_len,
+    unsigned int bits_per_token,
+    unsigned int hashes,
+    unsigned char** out,
+    size_t* out_len
+) {
+    size_t slots = WH_TOKEN_SET_MIN;
+    uint64_t* set = calloc(slots, sizeof(uint64_t));
+    if (!set)
+        return WH_ERR_ALLOC;
+
+    size_t distinct = 0;
+    size_t i = 0;
+    while (i < input_len) {
+        if (!is_token_byte(input[i]) && !(i == 0 && lead_len)) {
+            i++;
+            continue;
+        }
+        size_t start = i;
+        while (i < input_len && is_token_byte(input[i]))
+            i++;
+
+        uint64_t h = WH_FNV_OFFSET;
+        if (start == 0)
+            h = wh_token_hash(lead, lead_len, h);
+        h = wh_token_hash(input + start, i - start, h);
+        if (h == 0)
+            h = 1;
+
+        size_t slot = token_slot(set, slots, h);
+        if (!set[slot]) {
+            set[slot] = h;
+            if (++distinct * 2 > slots) {
+                uint64_t* grown = token_set_grow(set, &slots);
+                if (!grown) {
+                    free(set);
+                    return WH_ERR_ALLOC;
+                }
+                set = grown;
+            }
+        }
+        if (i == start)
+            i++;        // lead alone, input starts with a separator
+    }
+
+    uint64_t nbits = 64;
+    while (nbits < (uint64_t)distinct * bits_per_token)
+        nbits <<= 1;
+
+    unsigned char* bits = calloc((size_t)(nbits / 8), 1);
+    if (!bits) {
+        free(set);
+        return WH_ERR_ALLOC;
+    }
+    for (size_t s = 0; s < slots; s++) {
+        if (set[s])
+            bloom_set(bits, nbits - 1, set[s], hashes);
+    }
+    free(set);
+
+    *out = bits;
+    *out_len = (size_t)(nbits / 8);
+    return WH_OK;
+}
+
+
+// ===============================================
+// JSON line shapes
+// ===============================================
+
+// End of the string starting at line[i] == '"' (one past the closing
+// quote), or 0 if it is not terminated on this line.
+static size_t json_string_end(const unsigned char* line, size_t len, size_t i) {
+    for (i++; i < len; i++) {
+        if (line[i] == '\\')
+            i++;
+        else if (line[i] == '"')
+            return i + 1;
+    }
+    return 0;
+}
+
+static int is_scalar_byte(unsigned char c) {
+    return (c >= '0' && c <= '9') || c == '.' || c == 'e' || c == 'E' || c == '+' || c == '-';
+}
+
+size_t wh_json_shape(
+    const unsigned char* line,
+    size_t len,
+    unsigned char* shape,
+    size_t* shape_len,
+    size_t* spans
+) {
+    size_t i = 0, o = 0, nvalues = 0;
+
+    while (i < len) {
+        unsigned char c = line[i];
+        size_t end = 0;
+
+        if (c == '"') {
+            end = json_string_end(line, len, i);
+            if (end) {
+                size_t k = end;
+                while (k < len && (line[k] == ' ' || line[k] == '\t' || line[k] == '\r'))
+                    k++;
+                if (k < len && line[k] == ':') {
+                    // Key: stays in the shape with its colon
+                    memcpy(shape + o, line + i, k + 1 - i);
+                    o += k + 1 - i;
+                    i = k + 1;
+                    continue;
+                }
+            }
+        } else if ((c >= '0' && c <= '9') ||
+                   (c == '-' && i + 1 < len && line[i + 1] >= '0' && line[i + 1] <= '9')) {
+            end = i + 1;
+            while (end < len && is_scalar_byte(line[end]))
+                end++;
+        } else if (c == 't' && len - i >= 4 && memcmp(line + i, "true", 4) == 0) {
+            end = i + 4;
+        } else if (c == 'f' && len - i >= 5 && memcmp(line + i, "false", 5) == 0) {
+            end = i + 5;
+        } else if (c == 'n' && len - i >= 4 && memcmp(line + i, "null", 4) == 0) {
+            end = i + 4;
+        }
+
+        if (end) {
+            spans[2 * nvalues] = i;
+            spans[2 * nvalues + 1] = end - i;
+            nvalues++;
+            shape[o++] = '\n';
+            i = end;
+        } else {
+            shape[o++] = c;
+            i++;
+        }
+    }
+
+    *shape_len = o;
+    return nvalues;
+}
+
+
+size_t wh_text_shape(
+    const unsigned char* line,
+    size_t len,
+    unsigned char* shape,
+    size_t* shape_len,
+    size_t* spans
+) {
+    size_t i = 0, o = 0, nvalues = 0;
+
+    while (i < len) {
+        if (!is_token_byte(line[i])) {
+            shape[o++] = line[i++];
+            continue;
+        }
+        size_t start = i;
+        int digits = 0;
+        while (i < len && is_token_byte(line[i])) {
+            digits |= line[i] >= '0' && line[i] <= '9';
+            i++;
+        }
+        if (digits) {
+            spans[2 * nvalues] = start;
+            spans[2 * nvalues + 1] = i - start;
+            nvalues++;
+            shape[o++] = '\n';
+        } else {
+            memcpy(shape + o, line + start, i - start);
+            o += i - start;
+        }
+    }
+
+    *shape_len = o;
+    return nvalues;
+}
+
+
+// ===============================================
+// Content-defined chunking
+// ===============================================
+
+static uint64_t wh_gear[256];             // filled once by PyInit_warphybrid
+
+static void gear_init(void) {
+    uint64_t x = 0x46415354474C4F47ULL;        // "FASTLOG"
+    for (int i = 0; i < 256; i++) {
+        uint64_t z = (x += 0x9E3779B97F4A7C15ULL);
+        z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+        z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+        wh_gear[i] = z ^ (z >> 31);
+    }
+}
+
+size_t wh_cdc_cut(
+    const unsigned char* data,
+    size_t len,
+    size_t min_size,
+    size_t avg_size,
+    size_t max_size
+) {
+    if (len <= min_size)
+        return len;
+    if (len > max_size)
+        len = max_size;
+
+    unsigned int bits = 0;
+    while (((size_t)2 << bits) <= avg_size)
+        bits++;
+    uint64_t strict = ~0ULL << (64 - (bits + 2));
+    uint64_t loose = ~0ULL << (64 - (bits > 2 ? bits - 2 : 1));
+    size_t normal = avg_size < len ? avg_size : len;
+
+    uint64_t h = 0;
+    size_t i = min_size;
+    for (; i < normal; i++) {
+        h = (h << 1) + wh_gear[data[i]];
+        if (!(h & strict))
+            return i + 1;
+    }
+    for (; i < len; i++) {
+        h = (h << 1) + wh_gear[data[i]];
+        if (!(h & loose))
+            return i + 1;
+    }
+    return len;
+}
+
+
+// ===============================================
+// FASTLOGv2 container loops
+// ===============================================
+
+static void put_u32le(unsigned char* p, uint32_t v) {
+    p[0] = (unsigned char)v;
+    p[1] = (unsigned char)(v >> 8);
+    p[2] = (unsigned char)(v >> 16);
+    p[3] = (unsigned char)(v >> 24);
+}
+
+static uint32_t get_u32le(const unsigned char* p) {
+    return (uint32_t)p[0] | ((uint32_t)p[1] << 8) |
+           ((uint32_t)p[2] << 16) | ((uint32_t)p[3] << 24);
+}
+
+static uint64_t get_u64le(const unsigned char* p) {
+    return (uint64_t)get_u32le(p) | ((uint64_t)get_u32le(p + 4) << 32);
+}
+
+static unsigned long long now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (unsigned long long)ts.tv_sec * 1000000000ull + (unsigned long long)ts.tv_nsec;
+}
+
+size_t wh_encode_bound(size_t input_len, const size_t* sizes, size_t count) {
+    size_t bound = 0;
+    for (size_t i = 0; i < count && input_len > 0; i++) {
+        size_t n = sizes[i] < input_len ? sizes[i] : input_len;
+        bound += WH_BLOCK_HEADER + (size_t)LZ4_compressBound((int)n);
+        input_len -= n;
+    }
+    return bound;
+}
+
+int wh_encode_blocks(
+    const unsigned char* input,
+    size_t input_len,
+    const size_t* sizes,
+    size_t count,
+    int level,
+    double entropy_threshold,
+    size_t entropy_min,
+    unsigned char* dst,
+    size_t dst_capacity,
+    wh_block_result* results,
+    size_t* blocks,
+    size_t* out_len
+) {
+    size_t src = 0;
+    size_t p = 0;
+    size_t i = 0;
+
+    for (; i < count && src < input_len; i++) {
+        unsigned long long t0 = now_ns();
+        const unsigned char* block = input + src;
+        size_t n = input_len - src;
+        if (sizes[i] < n)
+            n = sizes[i];
+        if (n > LZ4_MAX_INPUT_SIZE || dst_capacity - p < WH_BLOCK_HEADER + n)
+            return WH_ERR_COMPRESS;
+
+        unsigned char* payload = dst + p + WH_BLOCK_HEADER;
+        size_t capacity = dst_capacity - p - WH_BLOCK_HEADER;
+        if (capacity > INT_MAX)
+            capacity = INT_MAX;
+
+        size_t clen = n;
+        unsigned int field = WH_BLOCK_STORED;
+
+        if (entropy_threshold < 0 || n < entropy_min ||
+            wh_sample_entropy(block, n) < entropy_threshold) {
+            size_t written = 0;
+            if (wh_compress_block_into(block, n, payload, capacity, level, &written) != WH_OK)
+                return WH_ERR_COMPRESS;
+            // LZ4 made it bigger → passthrough after all
+            if (written < n) {
+                clen = written;
+                field = (unsigned int)level & WH_LEVEL_MASK;
+            }
+        }
+
+        if (field & WH_BLOCK_STORED)
+            memcpy(payload, block, n);
+
+        put_u32le(dst + p, (uint32_t)n);
+        put_u32le(dst + p + 4, (uint32_t)clen);
+        put_u32le(dst + p + 8, field);
+
+        unsigned long long elapsed = now_ns() - t0;
+        results[i].compressed = clen;
+        results[i].field = field;
+        results[i].elapsed_ns = elapsed ? elapsed : 1;
+
+        src += n;
+        p += WH_BLOCK_HEADER + clen;
+    }
+
+    *blocks = i;
+    *out_len = p;
+    return WH_OK;
+}
+
+int wh_container_size(
+    const unsigned char* input,
+    size_t input_len,
+    size_t* blocks,
+    size_t* total
+) {
+    if (input_len < WH_HEAD_LEN || memcmp(input, WH_MAGIC, WH_MAGIC_LEN) != 0)
+        return WH_ERR_FORMAT;
+
+    uint64_t count = get_u64le(input + WH_MAGIC_LEN);
+    int streamed = count == WH_STREAM_COUNT;
+    size_t p = WH_HEAD_LEN;
+    size_t n = 0;
+    size_t sum = 0;
+
+    while (streamed || n < count) {
+        if (input_len - p < WH_BLOCK_HEADER)
+            return WH_ERR_TRUNCATED;
+        uint32_t bs = get_u32le(input + p);
+        uint32_t clen = get_u32le(input + p + 4);
+        p += WH_BLOCK_HEADER;
+
+        if (streamed && bs == 0 && clen == 0)
+            break;
+        if (input_len - p < clen)
+            return WH_ERR_TRUNCATED;
+
+        p += clen;
+        sum += bs;
+        n++;
+    }
+
+    *blocks = n;
+    *total = sum;
+    return WH_OK;
+}
+
+void wh_decode_init(wh_decode_state* st) {
+    memset(st, 0, sizeof(*st));
+    st->src = WH_HEAD_LEN;
+}
+
+int wh_decode_blocks(
+    const unsigned char* input,
+    size_t input_len,
+    size_t blocks,
+    unsigned char* dst,
+    size_t dst_capacity,
+    const wh_dict* dict,
+    wh_decode_state* st
+) {
+    // Headers were validated by wh_container_size.
+    for (; st->block < blocks; st->block++) {
+        const unsigned char* h = input + st->src;
+        size_t bs = get_u32le(h);
+        size_t clen = get_u32le(h + 4);
+        unsigned int field = get_u32le(h + 8);
+        const unsigned char* payload = h + WH_BLOCK_HEADER;
+        unsigned char* out = dst + st->dst;
+        size_t n = 0;
+        int status = WH_OK;
+
+        if (bs > dst_capacity - st->dst || clen > INT_MAX)
+            return WH_ERR_DECOMPRESS;
+
+        if (field & WH_BLOCK_STORED) {
+            if (clen > bs)
+                return WH_ERR_DECOMPRESS;
+            memcpy(out, payload, clen);
+            n = clen;
+        } else if (field & WH_BLOCK_LINKED) {
+            size_t start = st->dst > st->group + WH_DICT_WINDOW
+                ? st->dst - WH_DICT_WINDOW : st->group;
+            status = wh_decompress_block_prefix_into(
+                payload, clen, dst + start, st->dst - start, out, bs, &n
+            );
+        } else if (field & WH_BLOCK_DICT) {
+            if (clen < WH_DICT_ID_LEN)
+                return WH_ERR_DECOMPRESS;
+            if (!dict) {
+                st->dict_id = get_u32le(payload);
+                return WH_NEED_DICT;
+            }
+            status = wh_decompress_block_dict_into(
+                payload + WH_DICT_ID_LEN, clen - WH_DICT_ID_LEN, dict, out, bs, &n
+            );
+            dict = NULL;
+        } else {
+            status = wh_decompress_block_into(payload, clen, out, bs, &n);
+        }
+
+        if (status != WH_OK)
+            return status;
+        // Only the last block may be short (containers written before the
+        // headers carried the exact size record the requested block size).
+        if (n != bs && st->block + 1 < blocks)
+            return WH_ERR_DECOMPRESS;
+
+        if (!(field & WH_BLOCK_LINKED))
+            st->group = st->dst;
+        st->src += WH_BLOCK_HEADER + clen;
+        st->dst += n;
+    }
+    return WH_OK;
+}
+
+
+// ===============================================
+// Helper: Convert C buffer → Python bytes
+// ===============================================
+
+static PyObject* py_bytes_from_buf(unsigned char* buf, size_t len) {
+    PyObject* obj = PyBytes_FromStringAndSize((const char*)buf, len);
+    free(buf);
+    return obj;
+}
+
+
+// ===============================================
+// Python bindings for OLD API
+// ===============================================
+
+static PyObject* py_wh_compress(PyObject* self, PyObject* args) {
+    const unsigned char* input;
+    Py_ssize_t input_len;
+    int level, threads, block_size;
+
+    if (!PyArg_ParseTuple(args, "y#iii",
+        &input, &input_len,
+        &level, &threads, &block_size))
+        return NULL;
+
+    size_t out_len = 0;
+    int status = 0;
+
+    unsigned char* out;
+
+    Py_BEGIN_ALLOW_THREADS
+    out = warphybrid_compress(
+        input, (size_t)input_len,
+        level, threads, block_size,
+        &out_len, &status
+    );
+    Py_END_ALLOW_THREADS
+
+    if (!out || status != WH_OK) {
+        PyErr_SetString(PyExc_RuntimeError, "Hybrid compress failed");
+        return NULL;
+    }
+
+    return py_bytes_from_buf(out, out_len);
+}
+
+static PyObject* py_wh_decompress(PyObject* self, PyObject* args) {
+    const unsigned char* input;
+    Py_ssize_t input_len;
+
+    if (!PyArg_ParseTuple(args, "y#", &input, &input_len))
+        return NULL;
+
+    size_t out_len = 0;
+    int status = 0;
+
+    unsigned char* out;
+
+    Py_BEGIN_ALLOW_THREADS
+    out = warphybrid_decompress(
         input, (size_t)input_len,
         &out_len, &status
     );
+    Py_END_ALLOW_THREADS
 
     if (!out || status != WH_OK) {
         PyErr_SetString(PyExc_RuntimeError, "Hybrid decompress failed");
@@ -292,11 +1366,17 @@ static PyObject* py_wh_compress_block(PyObject* self, PyObject* args) {
     size_t out_len = 0;
     int status = 0;
 
-    unsigned char* out = wh_compress_block(
+    unsigned char* out;
+
+    // The input is a bytes object kept alive by `args`, so LZ4 can run
+    // without the GIL and several blocks can be compressed at once.
+    Py_BEGIN_ALLOW_THREADS
+    out = wh_compress_block(
         input, (size_t)input_len,
         level,
         &out_len, &status
     );
+    Py_END_ALLOW_THREADS
 
     if (!out || status != WH_OK) {
         PyErr_SetString(PyExc_RuntimeError, "Block compress failed");
@@ -318,11 +1398,15 @@ static PyObject* py_wh_decompress_block(PyObject* self, PyObject* args) {
     size_t out_len = 0;
     int status = 0;
 
-    unsigned char* out = wh_decompress_block(
+    unsigned char* out;
+
+    Py_BEGIN_ALLOW_THREADS
+    out = wh_decompress_block(
         input, (size_t)input_len,
         (size_t)expected,
         &out_len, &status
     );
+    Py_END_ALLOW_THREADS
 
     if (!out || status != WH_OK) {
         PyErr_SetString(PyExc_RuntimeError, "Block decompress failed");
@@ -333,6 +1417,1063 @@ static PyObject* py_wh_decompress_block(PyObject* self, PyObject* args) {
 }
 
 
+// ===============================================
+// warphybrid.Dictionary
+// ===============================================
+
+typedef struct {
+    PyObject_HEAD
+    wh_dict* dict;
+} WHDictionary;
+
+static PyObject* WHDictionary_new(PyTypeObject* type, PyObject* args, PyObject* kwds) {
+    Py_buffer data;
+
+    if (!PyArg_ParseTuple(args, "y*", &data))
+        return NULL;
+
+    WHDictionary* self = (WHDictionary*)type->tp_alloc(type, 0);
+    if (!self) {
+        PyBuffer_Release(&data);
+        return NULL;
+    }
+
+    self->dict = wh_dict_create((const unsigned char*)data.buf, (size_t)data.len);
+    PyBuffer_Release(&data);
+
+    if (!self->dict) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+    return (PyObject*)self;
+}
+
+static void WHDictionary_dealloc(WHDictionary* self) {
+    wh_dict_free(self->dict);
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static PyTypeObject WHDictionaryType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "warphybrid.Dictionary",
+    .tp_doc = "Preset LZ4 dictionary, prepared once for every block that uses it",
+    .tp_basicsize = sizeof(WHDictionary),
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_new = WHDictionary_new,
+    .tp_dealloc = (destructor)WHDictionary_dealloc,
+};
+
+static int history_arg(PyObject* obj, wh_dict** dict, Py_buffer* prefix) {
+    // None → independent block; warphybrid.Dictionary → preset dictionary;
+    // any other buffer → raw history (e.g. the preceding 64 KB of input).
+    *dict = NULL;
+    prefix->buf = NULL;
+    prefix->obj = NULL;
+
+    if (obj == Py_None)
+        return 1;
+    if (PyObject_TypeCheck(obj, &WHDictionaryType)) {
+        *dict = ((WHDictionary*)obj)->dict;
+        return 1;
+    }
+    if (PyObject_GetBuffer(obj, prefix, PyBUF_SIMPLE) < 0) {
+        PyErr_SetString(PyExc_TypeError,
+            "history must be a warphybrid.Dictionary, a bytes-like object or None");
+        return 0;
+    }
+    return 1;
+}
+
+// ===============================================
+// warphybrid.Linker
+// ===============================================
+
+typedef struct {
+    PyObject_HEAD
+    wh_linker* linker;
+    int busy;
+} WHLinker;
+
+static PyObject* WHLinker_new(PyTypeObject* type, PyObject* args, PyObject* kwds) {
+    if (!PyArg_ParseTuple(args, ""))
+        return NULL;
+
+    WHLinker* self = (WHLinker*)type->tp_alloc(type, 0);
+    if (!self)
+        return NULL;
+
+    self->linker = wh_linker_create();
+    if (!self->linker) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+    return (PyObject*)self;
+}
+
+static void WHLinker_dealloc(WHLinker* self) {
+    wh_linker_free(self->linker);
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static PyObject* WHLinker_reset(WHLinker* self, PyObject* noargs) {
+    wh_linker_reset(self->linker);
+    Py_RETURN_NONE;
+}
+
+static PyObject* WHLinker_compress_into(WHLinker* self, PyObject* args) {
+    Py_buffer src;
+    Py_buffer dst;
+    Py_ssize_t dst_offset;
+    int level;
+
+    if (!PyArg_ParseTuple(args, "y*w*ni",
+        &src, &dst, &dst_offset, &level))
+        return NULL;
+
+    if (dst_offset < 0 || dst_offset > dst.len ||
+        src.len > LZ4_MAX_INPUT_SIZE) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        PyErr_SetString(PyExc_ValueError, "Block does not fit output buffer");
+        return NULL;
+    }
+
+    // The stream is sequential by nature; the GIL is released below, so
+    // refuse overlapping calls instead of corrupting its state.
+    if (self->busy) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        PyErr_SetString(PyExc_RuntimeError, "Linker used from two threads at once");
+        return NULL;
+    }
+    self->busy = 1;
+
+    size_t capacity = (size_t)(dst.len - dst_offset);
+    if (capacity > INT_MAX)
+        capacity = INT_MAX;
+
+    size_t out_len = 0;
+    int status;
+
+    Py_BEGIN_ALLOW_THREADS
+    status = wh_linker_compress_into(
+        self->linker,
+        (const unsigned char*)src.buf, (size_t)src.len,
+        (unsigned char*)dst.buf + dst_offset, capacity,
+        level,
+        &out_len
+    );
+    Py_END_ALLOW_THREADS
+
+    self->busy = 0;
+    PyBuffer_Release(&src);
+    PyBuffer_Release(&dst);
+
+    if (status == WH_ERR_ALLOC)
+        return PyErr_NoMemory();
+    if (status != WH_OK) {
+        PyErr_SetString(PyExc_RuntimeError, "Block compress failed");
+        return NULL;
+    }
+
+    return PyLong_FromSize_t(out_len);
+}
+
+static PyMethodDef WHLinker_methods[] = {
+    {"reset", (PyCFunction)WHLinker_reset, METH_NOARGS,
+     "Start a new reset group: the next block references no earlier data"},
+    {"compress_into", (PyCFunction)WHLinker_compress_into, METH_VARARGS,
+     "Compress the next block of the group into a writable buffer at an offset"},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyTypeObject WHLinkerType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "warphybrid.Linker",
+    .tp_doc = "LZ4 / LZ4 HC stream for linked blocks (each block may reference the previous 64 KB)",
+    .tp_basicsize = sizeof(WHLinker),
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_new = WHLinker_new,
+    .tp_dealloc = (destructor)WHLinker_dealloc,
+    .tp_methods = WHLinker_methods,
+};
+
+static PyObject* py_wh_compress_bound(PyObject* self, PyObject* args) {
+    Py_ssize_t input_len;
+
+    if (!PyArg_ParseTuple(args, "n", &input_len))
+        return NULL;
+
+    if (input_len < 0 || input_len > LZ4_MAX_INPUT_SIZE) {
+        PyErr_SetString(PyExc_ValueError, "Block too large");
+        return NULL;
+    }
+
+    return PyLong_FromLong(LZ4_compressBound((int)input_len));
+}
+
+static PyObject* py_wh_compress_into(PyObject* self, PyObject* args) {
+    Py_buffer src;
+    Py_buffer dst;
+    PyObject* history = Py_None;
+    wh_dict* dict = NULL;
+    Py_buffer prefix;
+    Py_ssize_t dst_offset;
+    int level;
+
+    if (!PyArg_ParseTuple(args, "y*w*ni|O",
+        &src, &dst, &dst_offset, &level, &history))
+        return NULL;
+
+    if (!history_arg(history, &dict, &prefix)) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        return NULL;
+    }
+
+    if (dict && wh_dict_prepare(dict, level) != WH_OK) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        return PyErr_NoMemory();
+    }
+
+    if (dst_offset < 0 || dst_offset > dst.len ||
+        src.len > LZ4_MAX_INPUT_SIZE) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        PyBuffer_Release(&prefix);
+        PyErr_SetString(PyExc_ValueError, "Block does not fit output buffer");
+        return NULL;
+    }
+
+    size_t capacity = (size_t)(dst.len - dst_offset);
+    if (capacity > INT_MAX)
+        capacity = INT_MAX;
+
+    size_t out_len = 0;
+    int status;
+
+    Py_BEGIN_ALLOW_THREADS
+    if (dict) {
+        status = wh_compress_block_dict_into(
+            (const unsigned char*)src.buf, (size_t)src.len,
+            dict,
+            (unsigned char*)dst.buf + dst_offset, capacity,
+            level,
+            &out_len
+        );
+    } else if (prefix.obj && prefix.len > 0) {
+        status = wh_compress_block_prefix_into(
+            (const unsigned char*)src.buf, (size_t)src.len,
+            (const unsigned char*)prefix.buf, (size_t)prefix.len,
+            (unsigned char*)dst.buf + dst_offset, capacity,
+            level,
+            &out_len
+        );
+    } else {
+        status = wh_compress_block_into(
+            (const unsigned char*)src.buf, (size_t)src.len,
+            (unsigned char*)dst.buf + dst_offset, capacity,
+            level,
+            &out_len
+        );
+    }
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&src);
+    PyBuffer_Release(&dst);
+    PyBuffer_Release(&prefix);
+
+    if (status != WH_OK) {
+        PyErr_SetString(PyExc_RuntimeError, "Block compress failed");
+        return NULL;
+    }
+
+    return PyLong_FromSize_t(out_len);
+}
+
+static PyObject* py_wh_entropy(PyObject* self, PyObject* args) {
+    Py_buffer input;
+
+    if (!PyArg_ParseTuple(args, "y*", &input))
+        return NULL;
+
+    double h = wh_sample_entropy(
+        (const unsigned char*)input.buf, (size_t)input.len
+    );
+
+    PyBuffer_Release(&input);
+    return PyFloat_FromDouble(h);
+}
+
+static PyObject* py_wh_bloom_build(PyObject* self, PyObject* args) {
+    Py_buffer input;
+    Py_buffer lead;
+    unsigned int bits_per_token;
+    unsigned int hashes;
+
+    if (!PyArg_ParseTuple(args, "y*y*II", &input, &lead, &bits_per_token, &hashes))
+        return NULL;
+
+    unsigned char* bits = NULL;
+    size_t nbytes = 0;
+    int rc;
+
+    Py_BEGIN_ALLOW_THREADS
+    rc = wh_bloom_build(
+        (const unsigned char*)input.buf, (size_t)input.len,
+        (const unsigned char*)lead.buf, (size_t)lead.len,
+        bits_per_token, hashes, &bits, &nbytes
+    );
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&input);
+    PyBuffer_Release(&lead);
+    if (rc != WH_OK)
+        return PyErr_NoMemory();
+
+    PyObject* result = PyBytes_FromStringAndSize((const char*)bits, (Py_ssize_t)nbytes);
+    free(bits);
+    return result;
+}
+
+static PyObject* py_wh_bloom_contains(PyObject* self, PyObject* args) {
+    Py_buffer filter;
+    Py_buffer token;
+    unsigned int hashes;
+
+    if (!PyArg_ParseTuple(args, "y*y*I", &filter, &token, &hashes))
+        return NULL;
+
+    uint64_t h = wh_token_hash((const unsigned char*)token.buf, (size_t)token.len, WH_FNV_OFFSET);
+    if (h == 0)
+        h = 1;
+    int found = wh_bloom_contains(
+        (const unsigned char*)filter.buf, (size_t)filter.len, h, hashes
+    );
+
+    PyBuffer_Release(&filter);
+    PyBuffer_Release(&token);
+    return PyBool_FromLong(found);
+}
+
+static PyObject* py_wh_cdc_chunks(PyObject* self, PyObject* args) {
+    Py_buffer input;
+    Py_ssize_t min_size, avg_size, max_size;
+
+    if (!PyArg_ParseTuple(args, "y*nnn", &input, &min_size, &avg_size, &max_size))
+        return NULL;
+    if (min_size < 0 || avg_size < min_size || max_size < avg_size || max_size < 1) {
+        PyBuffer_Release(&input);
+        PyErr_SetString(PyExc_ValueError, "need 0 <= min_size <= avg_size <= max_size, max_size >= 1");
+        return NULL;
+    }
+
+    const unsigned char* data = (const unsigned char*)input.buf;
+    size_t len = (size_t)input.len;
+    size_t cap = len / (size_t)(min_size ? min_size : 1) + 2;
+    size_t* ends = malloc(cap * sizeof(size_t));
+    if (!ends) {
+        PyBuffer_Release(&input);
+        return PyErr_NoMemory();
+    }
+
+    size_t count = 0;
+    Py_BEGIN_ALLOW_THREADS
+    size_t pos = 0;
+    while (pos < len) {
+        pos += wh_cdc_cut(data + pos, len - pos, (size_t)min_size, (size_t)avg_size, (size_t)max_size);
+        ends[count++] = pos;
+    }
+    Py_END_ALLOW_THREADS
+    PyBuffer_Release(&input);
+
+    PyObject* result = PyList_New((Py_ssize_t)count);
+    if (result) {
+        for (size_t k = 0; k < count; k++) {
+            PyObject* v = PyLong_FromSize_t(ends[k]);
+            if (!v) {
+                Py_CLEAR(result);
+                break;
+            }
+            PyList_SET_ITEM(result, (Py_ssize_t)k, v);
+        }
+    }
+    free(ends);
+    return result;
+}
+
+typedef size_t (*shape_fn)(const unsigned char*, size_t, unsigned char*, size_t*, size_t*);
+
+// (shapes, values) of every line of a buffer. With `objects_only`, lines
+// not starting with '{' get shape None and are one value, whole.
+static PyObject* split_lines(PyObject* args, shape_fn fn, int objects_only) {
+    Py_buffer input;
+
+    if (!PyArg_ParseTuple(args, "y*", &input))
+        return NULL;
+
+    const unsigned char* data = (const unsigned char*)input.buf;
+    size_t len = (size_t)input.len;
+
+    // Scratch sized for the longest line
+    size_t longest = 0;
+    for (size_t i = 0; i < len;) {
+        const unsigned char* nl = memchr(data + i, '\n', len - i);
+        size_t end = nl ? (size_t)(nl - data) : len;
+        if (end - i > longest)
+            longest = end - i;
+        i = end + 1;
+    }
+    unsigned char* shape = malloc(longest + 1);
+    size_t* spans = malloc((2 * longest + 2) * sizeof(size_t));
+    PyObject* shapes = PyList_New(0);
+    PyObject* values = PyList_New(0);
+    if (!shape || !spans || !shapes || !values)
+        goto fail;
+
+    for (size_t i = 0; i < len;) {
+        const unsigned char* nl = memchr(data + i, '\n', len - i);
+        size_t end = nl ? (size_t)(nl - data) : len;
+        const unsigned char* line = data + i;
+        size_t n = end - i;
+        i = end + 1;
+
+        if (objects_only && (n == 0 || line[0] != '{')) {
+            // Not an object: kept whole, no shape
+            PyObject* raw = PyBytes_FromStringAndSize((const char*)line, (Py_ssize_t)n);
+            if (!raw || PyList_Append(values, raw) < 0 || PyList_Append(shapes, Py_None) < 0) {
+                Py_XDECREF(raw);
+                goto fail;
+            }
+            Py_DECREF(raw);
+            continue;
+        }
+
+        size_t shape_len;
+        size_t nvalues = fn(line, n, shape, &shape_len, spans);
+        PyObject* s = PyBytes_FromStringAndSize((const char*)shape, (Py_ssize_t)shape_len);
+        if (!s || PyList_Append(shapes, s) < 0) {
+            Py_XDECREF(s);
+            goto fail;
+        }
+        Py_DECREF(s);
+        for (size_t v = 0; v < nvalues; v++) {
+            PyObject* value = PyBytes_FromStringAndSize(
+                (const char*)line + spans[2 * v], (Py_ssize_t)spans[2 * v + 1]
+            );
+            if (!value || PyList_Append(values, value) < 0) {
+                Py_XDECREF(value);
+                goto fail;
+            }
+            Py_DECREF(value);
+        }
+    }
+
+    free(shape);
+    free(spans);
+    PyBuffer_Release(&input);
+    return Py_BuildValue("(NN)", shapes, values);
+
+fail:
+    free(shape);
+    free(spans);
+    Py_XDECREF(shapes);
+    Py_XDECREF(values);
+    PyBuffer_Release(&input);
+    if (!PyErr_Occurred())
+        PyErr_NoMemory();
+    return NULL;
+}
+
+// split_lines() with the lines grouped by shape, so callers work per
+// distinct shape instead of per line: (shapes, counts, rows, values) with
+// the distinct shapes in first-seen order (None: lines kept whole), the
+// number of lines of each, `rows` the shape index of every line (native
+// uint32) and values[s] the values of shape s's lines, line after line.
+static PyObject* group_lines(PyObject* args, shape_fn fn, int objects_only) {
+    Py_buffer input;
+
+    if (!PyArg_ParseTuple(args, "y*", &input))
+        return NULL;
+
+    const unsigned char* data = (const unsigned char*)input.buf;
+    size_t len = (size_t)input.len;
+
+    size_t longest = 0, nlines = 0;
+    for (size_t i = 0; i < len;) {
+        const unsigned char* nl = memchr(data + i, '\n', len - i);
+        size_t end = nl ? (size_t)(nl - data) : len;
+        if (end - i > longest)
+            longest = end - i;
+        nlines++;
+        i = end + 1;
+    }
+    unsigned char* shape = malloc(longest + 1);
+    size_t* spans = malloc((2 * longest + 2) * sizeof(size_t));
+    uint32_t* rows = malloc((nlines + 1) * sizeof(uint32_t));
+    size_t* tally = calloc(nlines + 1, sizeof(size_t));     // lines per shape
+    PyObject* index = PyDict_New();            // shape (or None) → position
+    PyObject* shapes = PyList_New(0);
+    PyObject* values = PyList_New(0);
+    PyObject* counts = NULL;
+    PyObject* key = NULL;
+    if (!shape || !spans || !rows || !tally || !index || !shapes || !values)
+        goto fail;
+
+    size_t line_no = 0;
+    for (size_t i = 0; i < len;) {
+        const unsigned char* nl = memchr(data + i, '\n', len - i);
+        size_t end = nl ? (size_t)(nl - data) : len;
+        const unsigned char* line = data + i;
+        size_t n = end - i;
+        i = end + 1;
+
+        size_t nvalues = 0;
+        if (objects_only && (n == 0 || line[0] != '{')) {
+            // Not an object: kept whole, shape None
+            key = Py_None;
+            Py_INCREF(key);
+            spans[0] = 0;
+            spans[1] = n;
+            nvalues = 1;
+        } else {
+            size_t shape_len;
+            nvalues = fn(line, n, shape, &shape_len, spans);
+            key = PyBytes_FromStringAndSize((const char*)shape, (Py_ssize_t)shape_len);
+            if (!key)
+                goto fail;
+        }
+
+        PyObject* pos = PyDict_GetItemWithError(index, key);
+        Py_ssize_t s;
+        if (pos) {
+            s = PyLong_AsSsize_t(pos);
+        } else {
+            if (PyErr_Occurred())
+                goto fail;
+            s = PyList_GET_SIZE(shapes);
+            PyObject* at = PyLong_FromSsize_t(s);
+            PyObject* list = PyList_New(0);
+            int err = !at || !list
+                || PyDict_SetItem(index, key, at) < 0
+                || PyList_Append(shapes, key) < 0
+                || PyList_Append(values, list) < 0;
+            Py_XDECREF(at);
+            Py_XDECREF(list);
+            if (err)
+                goto fail;
+        }
+        Py_CLEAR(key);
+        rows[line_no++] = (uint32_t)s;
+        tally[s]++;
+
+        PyObject* list = PyList_GET_ITEM(values, s);
+        for (size_t v = 0; v < nvalues; v++) {
+            PyObject* value = PyBytes_FromStringAndSize(
+                (const char*)line + spans[2 * v], (Py_ssize_t)spans[2 * v + 1]
+            );
+            if (!value || PyList_Append(list, value) < 0) {
+                Py_XDECREF(value);
+                goto fail;
+            }
+            Py_DECREF(value);
+        }
+    }
+
+    counts = PyList_New(PyList_GET_SIZE(shapes));
+    if (!counts)
+        goto fail;
+    for (Py_ssize_t s = 0; s < PyList_GET_SIZE(shapes); s++) {
+        PyObject* count = PyLong_FromSize_t(tally[s]);
+        if (!count)
+            goto fail;
+        PyList_SET_ITEM(counts, s, count);
+    }
+    PyObject* packed = PyBytes_FromStringAndSize((const char*)rows, (Py_ssize_t)(line_no * sizeof(uint32_t)));
+    if (!packed)
+        goto fail;
+    free(shape);
+    free(spans);
+    free(rows);
+    free(tally);
+    Py_DECREF(index);
+    PyBuffer_Release(&input);
+    return Py_BuildValue("(NNNN)", shapes, counts, packed, values);
+
+fail:
+    free(shape);
+    free(spans);
+    free(rows);
+    free(tally);
+    Py_XDECREF(key);
+    Py_XDECREF(index);
+    Py_XDECREF(shapes);
+    Py_XDECREF(counts);
+    Py_XDECREF(values);
+    PyBuffer_Release(&input);
+    if (!PyErr_Occurred())
+        PyErr_NoMemory();
+    return NULL;
+}
+
+// Merge of per-shape columns back into line order: item k is the next
+// unused item of columns[order[k]] (order: native uint32).
+static PyObject* py_wh_interleave(PyObject* self, PyObject* args) {
+    Py_buffer order;
+    PyObject* columns;
+
+    if (!PyArg_ParseTuple(args, "y*O!", &order, &PyList_Type, &columns))
+        return NULL;
+
+    const uint32_t* picks = (const uint32_t*)order.buf;
+    Py_ssize_t n = order.len / (Py_ssize_t)sizeof(uint32_t);
+    Py_ssize_t ncolumns = PyList_GET_SIZE(columns);
+    for (Py_ssize_t c = 0; c < ncolumns; c++) {
+        if (!PyList_Check(PyList_GET_ITEM(columns, c))) {
+            PyBuffer_Release(&order);
+            PyErr_SetString(PyExc_TypeError, "interleave: columns must be lists");
+            return NULL;
+        }
+    }
+
+    Py_ssize_t* next = calloc((size_t)ncolumns + 1, sizeof(Py_ssize_t));
+    PyObject* result = PyList_New(n);
+    if (!next || !result)
+        goto fail;
+    for (Py_ssize_t k = 0; k < n; k++) {
+        uint32_t c = picks[k];
+        if ((Py_ssize_t)c >= ncolumns) {
+            PyErr_SetString(PyExc_ValueError, "interleave: column index out of range");
+            goto fail;
+        }
+        PyObject* column = PyList_GET_ITEM(columns, c);
+        if (next[c] >= PyList_GET_SIZE(column)) {
+            PyErr_SetString(PyExc_ValueError, "interleave: column exhausted");
+            goto fail;
+        }
+        PyObject* item = PyList_GET_ITEM(column, next[c]++);
+        Py_INCREF(item);
+        PyList_SET_ITEM(result, k, item);
+    }
+    free(next);
+    PyBuffer_Release(&order);
+    return result;
+
+fail:
+    free(next);
+    Py_XDECREF(result);
+    PyBuffer_Release(&order);
+    if (!PyErr_Occurred())
+        PyErr_NoMemory();
+    return NULL;
+}
+
+// A column of digit runs as little-endian integers: (data, struct code,
+// width, fixed) with `fixed` when every value has the same width (leading
+// zeros restored from it), else None when a value is not a run of 1 to
+// max_digits digits or would lose a leading zero.
+static PyObject* py_wh_digit_column(PyObject* self, PyObject* args) {
+    PyObject* values;
+    int max_digits;
+
+    if (!PyArg_ParseTuple(args, "O!i", &PyList_Type, &values, &max_digits))
+        return NULL;
+    if (max_digits < 1 || max_digits > 19) {
+        PyErr_SetString(PyExc_ValueError, "max_digits must be 1..19");
+        return NULL;
+    }
+
+    Py_ssize_t n = PyList_GET_SIZE(values);
+    if (n == 0)
+        Py_RETURN_NONE;
+    uint64_t* ints = malloc((size_t)n * sizeof(uint64_t));
+    if (!ints)
+        return PyErr_NoMemory();
+
+    uint64_t top = 0;
+    Py_ssize_t shortest = max_digits, longest = 0;
+    int zeros = 0;
+    for (Py_ssize_t k = 0; k < n; k++) {
+        PyObject* value = PyList_GET_ITEM(values, k);
+        if (!PyBytes_Check(value))
+            goto text;
+        const unsigned char* p = (const unsigned char*)PyBytes_AS_STRING(value);
+        Py_ssize_t len = PyBytes_GET_SIZE(value);
+        if (len == 0 || len > max_digits)
+            goto text;
+        uint64_t v = 0;
+        for (Py_ssize_t i = 0; i < len; i++) {
+            if (p[i] < '0' || p[i] > '9')
+                goto text;
+            v = v * 10 + (p[i] - '0');
+        }
+        if (len > 1 && p[0] == '0')
+            zeros = 1;
+        if (len < shortest)
+            shortest = len;
+        if (len > longest)
+            longest = len;
+        if (v > top)
+            top = v;
+        ints[k] = v;
+    }
+    int fixed = shortest == longest;
+    if (zeros && !fixed)
+        goto text;
+
+    const char* code;
+    size_t size;
+    if (top < ((uint64_t)1 << 8)) {
+        code = "B";
+        size = 1;
+    } else if (top < ((uint64_t)1 << 16)) {
+        code = "H";
+        size = 2;
+    } else if (top < ((uint64_t)1 << 32)) {
+        code = "I";
+        size = 4;
+    } else {
+        code = "Q";
+        size = 8;
+    }
+    PyObject* data = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)(n * size));
+    if (!data) {
+        free(ints);
+        return NULL;
+    }
+    unsigned char* out = (unsigned char*)PyBytes_AS_STRING(data);
+    for (Py_ssize_t k = 0; k < n; k++) {
+        for (size_t b = 0; b < size; b++)
+            *out++ = (unsigned char)(ints[k] >> (8 * b));
+    }
+    free(ints);
+    return Py_BuildValue("(NsnO)", data, code, longest, fixed ? Py_True : Py_False);
+
+text:
+    free(ints);
+    Py_RETURN_NONE;
+}
+
+static PyObject* py_wh_json_group(PyObject* self, PyObject* args) {
+    return group_lines(args, wh_json_shape, 1);
+}
+
+static PyObject* py_wh_text_group(PyObject* self, PyObject* args) {
+    return group_lines(args, wh_text_shape, 0);
+}
+
+static PyObject* py_wh_json_split(PyObject* self, PyObject* args) {
+    return split_lines(args, wh_json_shape, 1);
+}
+
+static PyObject* py_wh_text_split(PyObject* self, PyObject* args) {
+    return split_lines(args, wh_text_shape, 0);
+}
+
+static PyObject* py_wh_decompress_into(PyObject* self, PyObject* args) {
+    Py_buffer src;
+    Py_buffer dst;
+    PyObject* history = Py_None;
+    wh_dict* dict = NULL;
+    Py_buffer prefix;
+    Py_ssize_t dst_offset;
+    unsigned long long expected;
+
+    if (!PyArg_ParseTuple(args, "y*w*nK|O",
+        &src, &dst, &dst_offset, &expected, &history))
+        return NULL;
+
+    if (!history_arg(history, &dict, &prefix)) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        return NULL;
+    }
+
+    if (dst_offset < 0 || dst_offset > dst.len ||
+        expected > (unsigned long long)(dst.len - dst_offset) ||
+        expected > INT_MAX || src.len > INT_MAX) {
+        PyBuffer_Release(&src);
+        PyBuffer_Release(&dst);
+        PyBuffer_Release(&prefix);
+        PyErr_SetString(PyExc_ValueError, "Block does not fit output buffer");
+        return NULL;
+    }
+
+    size_t out_len = 0;
+    int status;
+
+    Py_BEGIN_ALLOW_THREADS
+    if (dict) {
+        status = wh_decompress_block_dict_into(
+            (const unsigned char*)src.buf, (size_t)src.len,
+            dict,
+            (unsigned char*)dst.buf + dst_offset,
+            (size_t)expected,
+            &out_len
+        );
+    } else if (prefix.obj && prefix.len > 0) {
+        status = wh_decompress_block_prefix_into(
+            (const unsigned char*)src.buf, (size_t)src.len,
+            (const unsigned char*)prefix.buf, (size_t)prefix.len,
+            (unsigned char*)dst.buf + dst_offset,
+            (size_t)expected,
+            &out_len
+        );
+    } else {
+        status = wh_decompress_block_into(
+            (const unsigned char*)src.buf, (size_t)src.len,
+            (unsigned char*)dst.buf + dst_offset,
+            (size_t)expected,
+            &out_len
+        );
+    }
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&src);
+    PyBuffer_Release(&dst);
+    PyBuffer_Release(&prefix);
+
+    if (status != WH_OK) {
+        PyErr_SetString(PyExc_RuntimeError, "Block decompress failed");
+        return NULL;
+    }
+
+    return PyLong_FromSize_t(out_len);
+}
+
+
+// ===============================================
+// FASTLOGv2 container loops (Python)
+// ===============================================
+
+static PyObject* py_wh_encode_blocks(PyObject* self, PyObject* args) {
+    Py_buffer src;
+    PyObject* sizes_arg;
+    PyObject* out;
+    PyObject* threshold_arg;
+    Py_ssize_t entropy_min;
+    int level;
+
+    if (!PyArg_ParseTuple(args, "y*OYiOn",
+        &src, &sizes_arg, &out, &level, &threshold_arg, &entropy_min))
+        return NULL;
+
+    double threshold = -1.0;
+    if (threshold_arg != Py_None) {
+        threshold = PyFloat_AsDouble(threshold_arg);
+        if (threshold == -1.0 && PyErr_Occurred()) {
+            PyBuffer_Release(&src);
+            return NULL;
+        }
+    }
+
+    PyObject* seq = PySequence_Fast(sizes_arg, "block sizes must be a sequence");
+    if (!seq) {
+        PyBuffer_Release(&src);
+        return NULL;
+    }
+
+    Py_ssize_t count = PySequence_Fast_GET_SIZE(seq);
+    size_t* sizes = (size_t*)PyMem_Malloc((count ? count : 1) * sizeof(size_t));
+    wh_block_result* results = (wh_block_result*)PyMem_Malloc(
+        (count ? count : 1) * sizeof(wh_block_result));
+    PyObject* list = NULL;
+    Py_buffer dst;
+    dst.obj = NULL;
+
+    if (!sizes || !results) {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    for (Py_ssize_t i = 0; i < count; i++) {
+        Py_ssize_t bs = PyLong_AsSsize_t(PySequence_Fast_GET_ITEM(seq, i));
+        if (bs == -1 && PyErr_Occurred())
+            goto done;
+        if (bs <= 0 || bs > LZ4_MAX_INPUT_SIZE) {
+            PyErr_SetString(PyExc_ValueError, "Block size out of range");
+            goto done;
+        }
+        sizes[i] = (size_t)bs;
+    }
+
+    // Grow `out` once by the worst case (realloc, not zero-filled) and
+    // trim it back afterwards; the buffer export keeps it from being
+    // resized while the GIL is released.
+    Py_ssize_t base = PyByteArray_GET_SIZE(out);
+    size_t bound = wh_encode_bound((size_t)src.len, sizes, (size_t)count);
+    if (bound > (size_t)(PY_SSIZE_T_MAX - base)) {
+        PyErr_NoMemory();
+        goto done;
+    }
+    if (PyByteArray_Resize(out, base + (Py_ssize_t)bound) < 0)
+        goto done;
+    if (PyObject_GetBuffer(out, &dst, PyBUF_WRITABLE) < 0)
+        goto done;
+
+    size_t blocks = 0;
+    size_t written = 0;
+    int status;
+
+    Py_BEGIN_ALLOW_THREADS
+    status = wh_encode_blocks(
+        (const unsigned char*)src.buf, (size_t)src.len,
+        sizes, (size_t)count,
+        level, threshold, (size_t)entropy_min,
+        (unsigned char*)dst.buf + base, bound,
+        results, &blocks, &written
+    );
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&dst);
+    if (status != WH_OK) {
+        PyByteArray_Resize(out, base);
+        PyErr_SetString(PyExc_RuntimeError, "Block compress failed");
+        goto done;
+    }
+    if (PyByteArray_Resize(out, base + (Py_ssize_t)written) < 0)
+        goto done;
+
+    list = PyList_New((Py_ssize_t)blocks);
+    if (!list)
+        goto done;
+    for (size_t i = 0; i < blocks; i++) {
+        PyObject* item = Py_BuildValue("(nIK)",
+            (Py_ssize_t)results[i].compressed, results[i].field, results[i].elapsed_ns);
+        if (!item) {
+            Py_CLEAR(list);
+            goto done;
+        }
+        PyList_SET_ITEM(list, (Py_ssize_t)i, item);
+    }
+
+done:
+    PyMem_Free(sizes);
+    PyMem_Free(results);
+    Py_DECREF(seq);
+    PyBuffer_Release(&src);
+    return list;
+}
+
+static int container_size(Py_buffer* src, size_t* blocks, size_t* total) {
+    int status = wh_container_size(
+        (const unsigned char*)src->buf, (size_t)src->len, blocks, total
+    );
+    if (status == WH_ERR_FORMAT) {
+        PyErr_SetString(PyExc_ValueError, "Invalid FASTLOGv2 container");
+        return 0;
+    }
+    if (status != WH_OK) {
+        PyErr_SetString(PyExc_ValueError, "Truncated FASTLOGv2 container");
+        return 0;
+    }
+    return 1;
+}
+
+static int decode_container(Py_buffer* src, size_t blocks, unsigned char* dst,
+                            size_t capacity, PyObject* resolve, size_t* out_len) {
+    wh_decode_state st;
+    const wh_dict* dict = NULL;
+    PyObject* held = NULL;
+    int status;
+
+    wh_decode_init(&st);
+
+    // Runs without the GIL; stops (and takes it back) only to look up the
+    // dictionary of a BLOCK_DICT block through resolve(dict_id).
+    for (;;) {
+        Py_BEGIN_ALLOW_THREADS
+        status = wh_decode_blocks(
+            (const unsigned char*)src->buf, (size_t)src->len,
+            blocks, dst, capacity, dict, &st
+        );
+        Py_END_ALLOW_THREADS
+
+        Py_CLEAR(held);
+        dict = NULL;
+        if (status != WH_NEED_DICT)
+            break;
+
+        if (resolve == Py_None) {
+            PyErr_Format(PyExc_KeyError, "Unknown FASTLOG dictionary %08x", st.dict_id);
+            return 0;
+        }
+        held = PyObject_CallFunction(resolve, "I", st.dict_id);
+        if (!held)
+            return 0;
+        if (!PyObject_TypeCheck(held, &WHDictionaryType)) {
+            Py_DECREF(held);
+            PyErr_SetString(PyExc_TypeError, "resolve() must return a warphybrid.Dictionary");
+            return 0;
+        }
+        dict = ((WHDictionary*)held)->dict;
+    }
+
+    if (status != WH_OK) {
+        PyErr_SetString(PyExc_RuntimeError, "Block decompress failed");
+        return 0;
+    }
+    *out_len = st.dst;
+    return 1;
+}
+
+static PyObject* py_wh_decode_container(PyObject* self, PyObject* args) {
+    Py_buffer src;
+    PyObject* resolve = Py_None;
+    size_t blocks, total, n = 0;
+
+    if (!PyArg_ParseTuple(args, "y*|O", &src, &resolve))
+        return NULL;
+
+    if (!container_size(&src, &blocks, &total)) {
+        PyBuffer_Release(&src);
+        return NULL;
+    }
+
+    // One allocation for the whole output; nothing else references it
+    // until it is returned.
+    PyObject* out = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)total);
+    if (!out) {
+        PyBuffer_Release(&src);
+        return NULL;
+    }
+
+    int ok = decode_container(
+        &src, blocks, (unsigned char*)PyByteArray_AS_STRING(out), total, resolve, &n
+    );
+    PyBuffer_Release(&src);
+
+    if (!ok || (n != total && PyByteArray_Resize(out, (Py_ssize_t)n) < 0)) {
+        Py_DECREF(out);
+        return NULL;
+    }
+    return out;
+}
+
+static PyObject* py_wh_decode_container_into(PyObject* self, PyObject* args) {
+    Py_buffer src;
+    Py_buffer dst;
+    PyObject* resolve = Py_None;
+    size_t blocks, total, n = 0;
+
+    if (!PyArg_ParseTuple(args, "y*w*|O", &src, &dst, &resolve))
+        return NULL;
+
+    int ok = container_size(&src, &blocks, &total);
+    if (ok && total > (size_t)dst.len) {
+        PyErr_SetString(PyExc_ValueError, "Output buffer too small for container");
+        ok = 0;
+    }
+    if (ok)
+        ok = decode_container(&src, blocks, (unsigned char*)dst.buf, total, resolve, &n);
+
+    PyBuffer_Release(&src);
+    PyBuffer_Release(&dst);
+    return ok ? PyLong_FromSize_t(n) : NULL;
+}
+
+
 // ===============================================
 // Python Method Table
 // ===============================================
@@ -342,6 +2483,22 @@ static PyMethodDef WHMethods[] = {
     {"decompress", py_wh_decompress, METH_VARARGS, "Hybrid decompress"},
     {"compress_block", py_wh_compress_block, METH_VARARGS, "Block compress"},
     {"decompress_block", py_wh_decompress_block, METH_VARARGS, "Block decompress"},
+    {"compress_bound", py_wh_compress_bound, METH_VARARGS, "Worst-case compressed size of a block"},
+    {"compress_into", py_wh_compress_into, METH_VARARGS, "Block compress into a writable buffer at an offset (optional dictionary / history)"},
+    {"entropy", py_wh_entropy, METH_VARARGS, "Sampled Shannon entropy of a block (bits/byte)"},
+    {"decompress_into", py_wh_decompress_into, METH_VARARGS, "Block decompress into a writable buffer at an offset (optional dictionary / history)"},
+    {"encode_blocks", py_wh_encode_blocks, METH_VARARGS, "Append FASTLOGv2 blocks of the given sizes to a bytearray; returns [(compressed, field, elapsed_ns)]"},
+    {"decode_container", py_wh_decode_container, METH_VARARGS, "Decode a FASTLOGv2 container into a new bytearray (resolve(dict_id) → Dictionary)"},
+    {"decode_container_into", py_wh_decode_container_into, METH_VARARGS, "Decode a FASTLOGv2 container into a writable buffer; returns bytes written"},
+    {"bloom_build", py_wh_bloom_build, METH_VARARGS, "Token Bloom filter of a block: bloom_build(block, lead, bits_per_token, hashes) → bytes"},
+    {"json_split", py_wh_json_split, METH_VARARGS, "Split newline-terminated lines into (shapes, values): shape None = line kept whole as one value"},
+    {"text_split", py_wh_text_split, METH_VARARGS, "Split newline-terminated lines into (shapes, values): values are the word runs holding a digit"},
+    {"json_group", py_wh_json_group, METH_VARARGS, "json_split grouped by shape: (shapes, line counts, uint32 shape index per line, values per shape)"},
+    {"text_group", py_wh_text_group, METH_VARARGS, "text_split grouped by shape: (shapes, line counts, uint32 shape index per line, values per shape)"},
+    {"interleave", py_wh_interleave, METH_VARARGS, "Merge lists by a uint32 pick order: interleave(order, columns) → list"},
+    {"digit_column", py_wh_digit_column, METH_VARARGS, "Digit runs as little-endian integers: digit_column(values, max_digits) → (data, code, width, fixed) or None"},
+    {"cdc_chunks", py_wh_cdc_chunks, METH_VARARGS, "Content-defined chunk end offsets: cdc_chunks(data, min_size, avg_size, max_size) → [end, ...]"},
+    {"bloom_contains", py_wh_bloom_contains, METH_VARARGS, "Whether a token Bloom filter may contain a token: bloom_contains(filter, token, hashes)"},
     {NULL, NULL, 0, NULL}
 };
 
@@ -364,6 +2521,27 @@ static struct PyModuleDef whmodule = {
 // ===============================================
 
 PyMODINIT_FUNC PyInit_warphybrid(void) {
-    return PyModule_Create(&whmodule);
+    if (PyType_Ready(&WHDictionaryType) < 0 || PyType_Ready(&WHLinkerType) < 0)
+        return NULL;
+    gear_init();
+
+    PyObject* m = PyModule_Create(&whmodule);
+    if (!m)
+        return NULL;
+
+    Py_INCREF(&WHDictionaryType);
+    if (PyModule_AddObject(m, "Dictionary", (PyObject*)&WHDictionaryType) < 0) {
+        Py_DECREF(&WHDictionaryType);
+        Py_DECREF(m);
+        return NULL;
+    }
+
+    Py_INCREF(&WHLinkerType);
+    if (PyModule_AddObject(m, "Linker", (PyObject*)&WHLinkerType) < 0) {
+        Py_DECREF(&WHLinkerType);
+        Py_DECREF(m);
+        return NULL;
+    }
+    return m;
 }
 
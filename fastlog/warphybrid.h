@@ -2,11 +2,23 @@
 #define WARPHYBRID_H
 
 #include <stddef.h>
+#include <stdint.h>
 
 #define WH_OK               0
 #define WH_ERR_COMPRESS     1
 #define WH_ERR_FALLBACK     2
 #define WH_ERR_DECOMPRESS   3
+#define WH_ERR_FORMAT       4
+#define WH_ERR_TRUNCATED    5
+#define WH_NEED_DICT        6
+#define WH_ERR_ALLOC        7
+
+// Entropy sampling: WH_SAMPLE_WINDOWS windows of WH_SAMPLE_WINDOW bytes
+#define WH_SAMPLE_WINDOWS   16
+#define WH_SAMPLE_WINDOW    256
+
+// LZ4 match window: only the last WH_DICT_WINDOW dictionary / prefix bytes are used
+#define WH_DICT_WINDOW      (64 * 1024)
 
 // ============================================================
 // OLD API (full-buffer compression)
@@ -34,6 +46,9 @@ unsigned char* warphybrid_decompress(
 // NEW FASTLOGv2 BLOCK API  (CLEAN & SAFE)
 // ============================================================
 //
+// `level` > 0 selects LZ4 HC at that level; `level` <= 0 selects the
+// fast LZ4 compressor with acceleration -level (0 behaves as 1).
+//
 // IMPORTANT:
 // • `expected_size` must be the ORIGINAL block size.
 // • This avoids the old “input_len * 4” heuristic which fails
@@ -58,5 +73,310 @@ unsigned char* wh_decompress_block(
     int* status
 );
 
+// Compress into caller-owned memory; `dst_capacity` should be at least
+// LZ4_compressBound(input_len). Returns WH_OK / WH_ERR_FALLBACK.
+int wh_compress_block_into(
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+);
+
+// Decompress into caller-owned memory; `dst` must hold `expected_size`
+// bytes. Returns WH_OK / WH_ERR_DECOMPRESS. Does not touch Python state.
+int wh_decompress_block_into(
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t expected_size,
+    size_t* out_len
+);
+
+// Linked blocks: compress / decompress with `prefix` (the data preceding
+// the block, only its last WH_DICT_WINDOW bytes are used) as history.
+// Decoding must pass the same preceding bytes the encoder saw.
+int wh_compress_block_prefix_into(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* prefix,
+    size_t prefix_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+);
+
+int wh_decompress_block_prefix_into(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* prefix,
+    size_t prefix_len,
+    unsigned char* dst,
+    size_t expected_size,
+    size_t* out_len
+);
+
+// Streaming alternative for sequential encoders: a wh_linker keeps one
+// LZ4 / LZ4 HC stream open across the blocks of a reset group, so each
+// byte is indexed once instead of reloading 64 KB of prefix per block.
+// Blocks decode with wh_decompress_block_prefix_into as above.
+typedef struct wh_linker wh_linker;
+
+wh_linker* wh_linker_create(void);
+void wh_linker_reset(wh_linker* linker);     // next block starts a group
+void wh_linker_free(wh_linker* linker);
+
+int wh_linker_compress_into(
+    wh_linker* linker,
+    const unsigned char* input,
+    size_t input_len,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+);
+
+// ============================================================
+// PRESET DICTIONARIES
+// ============================================================
+//
+// A wh_dict keeps a private copy of the dictionary tail plus LZ4 streams
+// already loaded with it; each block copies a loaded stream instead of
+// loading the dictionary again. wh_dict_prepare(level) must be called once
+// per HC level before compressing at that level (not thread-safe; the
+// compress/decompress calls themselves are).
+//
+// Blocks must be decoded with the same dictionary they were compressed
+// with.
+//
+// ============================================================
+
+typedef struct wh_dict wh_dict;
+
+wh_dict* wh_dict_create(const unsigned char* dict, size_t dict_len);
+int wh_dict_prepare(wh_dict* dict, int level);
+void wh_dict_free(wh_dict* dict);
+
+int wh_compress_block_dict_into(
+    const unsigned char* input,
+    size_t input_len,
+    const wh_dict* dict,
+    unsigned char* dst,
+    size_t dst_capacity,
+    int level,
+    size_t* out_len
+);
+
+int wh_decompress_block_dict_into(
+    const unsigned char* input,
+    size_t input_len,
+    const wh_dict* dict,
+    unsigned char* dst,
+    size_t expected_size,
+    size_t* out_len
+);
+
+// ============================================================
+// FASTLOGv2 CONTAINER LOOPS
+// ============================================================
+//
+// The whole per-block loop of a plain FASTLOGv2 container in one call
+// (layout and field flags as in fastlog/format.py). Block sizes are
+// chosen by the caller; these functions only carry them out.
+//
+// ============================================================
+
+#define WH_MAGIC            "FASTLOG2"
+#define WH_MAGIC_LEN        8
+#define WH_HEAD_LEN         (WH_MAGIC_LEN + 8)          // magic + block count (u64)
+#define WH_BLOCK_HEADER     12                          // block_size, compressed_size, field (u32 each)
+#define WH_STREAM_COUNT     0xFFFFFFFFFFFFFFFFull      // streamed: ends with a 0 / 0 header
+
+#define WH_LEVEL_MASK       0xFF
+#define WH_BLOCK_STORED     0x400
+#define WH_BLOCK_DICT       0x800
+#define WH_BLOCK_LINKED     0x1000
+#define WH_DICT_ID_LEN      4
+
+typedef struct {
+    size_t compressed;                  // payload bytes after the header
+    unsigned int field;
+    unsigned long long elapsed_ns;
+} wh_block_result;
+
+// Worst-case output of wh_encode_blocks for the same arguments.
+size_t wh_encode_bound(size_t input_len, const size_t* sizes, size_t count);
+
+// Encode consecutive blocks of sizes[0], sizes[1], ... input bytes (the
+// last one may be short) as BLOCK_HEADER + payload each. A block whose
+// sampled entropy is >= entropy_threshold (only checked for blocks of at
+// least entropy_min bytes; threshold < 0 disables it) or that LZ4 cannot
+// shrink is stored. Writes one result per block and returns WH_OK;
+// *blocks / *out_len receive the block count and bytes written.
+int wh_encode_blocks(
+    const unsigned char* input,
+    size_t input_len,
+    const size_t* sizes,
+    size_t count,
+    int level,
+    double entropy_threshold,
+    size_t entropy_min,
+    unsigned char* dst,
+    size_t dst_capacity,
+    wh_block_result* results,
+    size_t* blocks,
+    size_t* out_len
+);
+
+// Walk the block headers of a container without touching any payload:
+// block count and total decoded size (sum of the recorded block sizes).
+// Returns WH_OK / WH_ERR_FORMAT / WH_ERR_TRUNCATED.
+int wh_container_size(
+    const unsigned char* input,
+    size_t input_len,
+    size_t* blocks,
+    size_t* total
+);
+
+// Decode state, kept by the caller across WH_NEED_DICT returns.
+typedef struct {
+    size_t src;             // next block header
+    size_t dst;             // bytes written
+    size_t group;           // output offset of the current reset point
+    size_t block;           // index of the next block
+    unsigned int dict_id;   // set with WH_NEED_DICT
+} wh_decode_state;
+
+void wh_decode_init(wh_decode_state* st);
+
+// Decode the `blocks` blocks counted by wh_container_size into dst.
+// Linked blocks reference the output itself. At a dictionary block it
+// returns WH_NEED_DICT (st->dict_id set); call again with that
+// dictionary, which is used for that one block. Only the last block may
+// decode short; anything else is WH_ERR_DECOMPRESS.
+int wh_decode_blocks(
+    const unsigned char* input,
+    size_t input_len,
+    size_t blocks,
+    unsigned char* dst,
+    size_t dst_capacity,
+    const wh_dict* dict,
+    wh_decode_state* st
+);
+
+// ============================================================
+// RANDOM DATA DETECTOR
+// ============================================================
+//
+// Sampled Shannon entropy in bits/byte (0.0 – 8.0). Random, encrypted
+// or already-compressed data scores ~7.9+; text logs score 4–6.
+//
+// ============================================================
+
+double wh_sample_entropy(
+    const unsigned char* input,
+    size_t input_len
+);
+
+// ============================================================
+// TOKEN BLOOM FILTERS
+// ============================================================
+//
+// Tokens are runs of [A-Za-z0-9_], hashed ASCII-lowercased with 64-bit
+// FNV-1a. A filter is a power-of-two number of bits (at least 64) with
+// about bits_per_token bits per distinct token; token hash h sets bits
+// (h + i * ((h >> 32) | 1)) mod m for i < hashes.
+//
+// ============================================================
+
+#define WH_FNV_OFFSET 1469598103934665603ULL
+
+// FNV-1a of n lowercased bytes, continuing from h (WH_FNV_OFFSET to start)
+uint64_t wh_token_hash(const unsigned char* p, size_t n, uint64_t h);
+
+// Filter over the distinct tokens of input. `lead` is the end of the
+// token the previous block ended in (may be empty): it is joined with
+// the token input starts with, so a token cut by the block boundary is
+// in this block's filter. *out is malloc'ed (free() it); returns WH_OK
+// or WH_ERR_ALLOC.
+int wh_bloom_build(
+    const unsigned char* input,
+    size_t input_len,
+    const unsigned char* lead,
+    size_t lead_len,
+    unsigned int bits_per_token,
+    unsigned int hashes,
+    unsigned char** out,
+    size_t* out_len
+);
+
+// 1 if the filter may contain the token with hash h, 0 if it cannot.
+int wh_bloom_contains(
+    const unsigned char* filter,
+    size_t filter_len,
+    uint64_t h,
+    unsigned int hashes
+);
+
+// ============================================================
+// LINE SHAPES
+// ============================================================
+//
+// A line's shape is the line with every value replaced by one '\n' byte;
+// everything else stays. Substituting the values back in order gives the
+// line again, whatever it holds, so a split never loses bytes.
+//
+// JSON: values are strings not followed by a colon, numbers and true /
+// false / null (no JSON validation). Text: values are the runs of
+// [A-Za-z0-9_] that contain a digit (numbers, IPs, hex IDs, times).
+//
+// ============================================================
+
+// Shape of line[0:len] into shape (len bytes of room), value spans as
+// (offset, length) pairs into spans (len + 1 pairs of room). Returns the
+// number of values.
+size_t wh_json_shape(
+    const unsigned char* line,
+    size_t len,
+    unsigned char* shape,
+    size_t* shape_len,
+    size_t* spans
+);
+
+// Same for a free-text line
+size_t wh_text_shape(
+    const unsigned char* line,
+    size_t len,
+    unsigned char* shape,
+    size_t* shape_len,
+    size_t* spans
+);
+
+// ============================================================
+// CONTENT-DEFINED CHUNKING
+// ============================================================
+//
+// FastCDC-style cut points: a gear hash h = (h << 1) + GEAR[byte] rolls
+// over the data (its top bits cover the last 64 bytes), and a chunk ends
+// after the first byte where its top bits are all zero. Chunks are at
+// least min_size and at most max_size bytes; the condition takes two
+// more bits before avg_size and two fewer after it, which keeps sizes
+// close to avg_size. GEAR is fixed (splitmix64), so equal content gets
+// equal cut points in every file.
+//
+// ============================================================
+
+// Length of the chunk starting at data[0] (len if no cut point is found
+// before max_size and len <= max_size).
+size_t wh_cdc_cut(
+    const unsigned char* data,
+    size_t len,
+    size_t min_size,
+    size_t avg_size,
+    size_t max_size
+);
+
 #endif // WARPHYBRID_H
 
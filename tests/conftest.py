@@ -0,0 +1,10 @@
+import pytest
+
+def _sample(size):
+    line = b"May 01 12:00:00 web-1 nginx: GET /api/v1/items 200 512\n"
+    return (line * (size // len(line) + 1))[:size]
+
+@pytest.fixture
+def sample():
+    # sample(size): `size` bytes of one repeated line (very compressible)
+    return _sample
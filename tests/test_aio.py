@@ -0,0 +1,82 @@
+import asyncio
+import os
+
+from fastlog.aio import AsyncFastLogCore
+from fastlog.core import FastLogCore
+
+def sample(size, seed=0):
+    line = f"May 01 12:00:{seed % 60:02d} web-1 nginx: GET /api/v1/items 200 512\n".encode()
+    return (line * (size // len(line) + 1))[:size]
+
+def test_async_round_trip_with_backpressure():
+    async def main():
+        async with AsyncFastLogCore(max_workers=2, max_inflight=3) as acore:
+            payloads = [sample(50_000 + i * 1000, i) for i in range(12)]
+            peak = {"inflight": 0, "queued": 0}
+
+            async def watch():
+                while True:
+                    peak["inflight"] = max(peak["inflight"], acore.inflight)
+                    peak["queued"] = max(peak["queued"], acore.metrics()["queue_depth"])
+                    await asyncio.sleep(0)
+
+            watcher = asyncio.create_task(watch())
+            blobs = await asyncio.gather(*(acore.encode(p) for p in payloads))
+            decoded = await asyncio.gather(*(acore.decode(b) for b in blobs))
+            watcher.cancel()
+
+            assert decoded == payloads
+            assert FastLogCore(key=acore.key).decode(blobs[0]) == payloads[0]
+            assert 0 < peak["inflight"] <= 3
+            assert peak["queued"] > 0
+
+            m = acore.metrics()
+            assert m["completed"] == 24 and m["failed"] == 0
+            assert m["inflight"] == 0 and m["queue_depth"] == 0
+            assert m["latency_p99"] >= m["latency_p50"] > 0
+
+    asyncio.run(main())
+
+def test_async_streams():
+    data = sample(3 * 1024 * 1024) + os.urandom(100_000)
+
+    async def chunks(blob, size):
+        for i in range(0, len(blob), size):
+            await asyncio.sleep(0)
+            yield blob[i:i+size]
+
+    async def main():
+        async with AsyncFastLogCore(max_workers=2) as acore:
+            encoded = b"".join([c async for c in acore.encode_stream(chunks(data, 300_000))])
+            assert await acore.decode(encoded) == data
+
+            decoded = b"".join([c async for c in acore.decode_stream(chunks(encoded, 70_000))])
+            assert decoded == data
+
+            # Plain iterables work too
+            parts = [c async for c in acore.decode_stream([encoded[:10], encoded[10:]])]
+            assert b"".join(parts) == data
+
+    asyncio.run(main())
+
+def test_stream_decode_does_not_hold_a_worker_for_input():
+    data = sample(2 * 1024 * 1024) + os.urandom(100_000)
+
+    async def main():
+        for workers, inflight in ((1, None), (2, 1)):
+            async with AsyncFastLogCore(max_workers=workers, max_inflight=inflight) as acore:
+                pieces = acore.decode_stream(acore.encode_stream([data[:700_000], data[700_000:]], index=True))
+                decoded = await asyncio.wait_for(_join(pieces), 15)
+                assert decoded == data
+
+            # Back-to-back containers, fed a few bytes at a time
+            core = FastLogCore(key=acore.key)
+            blob = core.encode(data[:5000]) + core.encode(data[5000:9000])
+            async with AsyncFastLogCore(key=acore.key, max_workers=1) as acore:
+                chunks = [blob[i:i+7] for i in range(0, len(blob), 7)]
+                assert await _join(acore.decode_stream(chunks)) == data[:9000]
+
+    asyncio.run(main())
+
+async def _join(pieces):
+    return b"".join([p async for p in pieces])
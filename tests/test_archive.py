@@ -0,0 +1,79 @@
+import io
+import random
+
+import pytest
+
+from fastlog.archive import FastLogArchive
+from fastlog.core import FastLogCore
+from fastlog.stream import FastLogReader
+
+def sample(size):
+    line = b"2024-05-01T12:00:00Z api-7 audit: user=%d action=read path=/v1/items\n"
+    out = b"".join(line % i for i in range(size // 60 + 1))
+    return out[:size]
+
+def write_archive(path, data, index):
+    core = FastLogCore(bandit="off")
+    core.warp.policy.default = 16 * 1024
+    path.write_bytes(core.encode(data, index=index))
+    return core
+
+def test_indexed_range_reads(tmp_path):
+    data = sample(500_000)
+    path = tmp_path / "a.fastlog"
+    core = write_archive(path, data, index=True)
+
+    # Footer is part of the container: full decodes still work
+    blob = path.read_bytes()
+    assert core.decode(blob) == data
+    assert FastLogReader(io.BytesIO(blob), core=core).read() == data
+
+    rng = random.Random(7)
+    with FastLogArchive(path, core=core, cache_bytes=64 * 1024) as arc:
+        assert arc.size == len(data)
+        assert arc.block_count == len(data) // (16 * 1024) + 1
+        for _ in range(50):
+            off = rng.randrange(len(data))
+            n = rng.randrange(1, 40_000)
+            assert arc.read(off, n) == data[off:off+n]
+
+        assert arc.read(len(data) - 5, 100) == data[-5:]
+        assert arc.read(len(data), 10) == b""
+        assert arc.cache.used <= 64 * 1024
+
+        hits = arc.cache.hits
+        arc.read(100, 10)
+        arc.read(120, 10)
+        assert arc.cache.hits > hits
+
+def test_unindexed_archive_is_scanned(tmp_path):
+    data = sample(100_000)
+    path = tmp_path / "b.fastlog"
+    core = write_archive(path, data, index=False)
+
+    with FastLogArchive(path, core=core) as arc:
+        assert arc.size == len(data)
+        assert arc.read(50_000, 1000) == data[50_000:51_000]
+
+def test_concatenated_containers(tmp_path):
+    data = sample(300_000)
+    parts = [data[:1000], data[1000:120_000], b"", data[120_000:]]
+    core = FastLogCore(bandit="off", linked=True)
+    core.warp.policy.default = 16 * 1024
+
+    for index, bloom in ((False, False), (True, False), (True, True)):
+        path = tmp_path / f"{index}{bloom}.fastlog"
+        path.write_bytes(b"".join(core.encode(p, index=index, bloom=bloom) for p in parts))
+        with FastLogArchive(path, core=core) as arc:
+            assert arc.size == len(data)
+            assert arc.read(0, len(data)) == data
+            assert arc.read(990, 30) == data[990:1020]
+            assert (arc.filters is not None) == bloom
+
+    # A member that was not fully written is not silently skipped
+    path.write_bytes(path.read_bytes()[:-5])
+    with pytest.raises(ValueError):
+        FastLogArchive(path, core=core)
+    path.write_bytes(core.encode(data) + b"junk")
+    with pytest.raises(ValueError):
+        FastLogArchive(path, core=core)
@@ -0,0 +1,45 @@
+from fastlog.bandit import OneShotBandit, UCBBandit, ThompsonBandit
+from fastlog.core import FastLogCore
+
+CANDIDATES = [256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+
+def test_reward_is_per_byte():
+    policy = OneShotBandit()
+    # Same throughput and ratio → same reward whatever the block size
+    small = policy.reward(1000, 100, 1000)
+    large = policy.reward(1_000_000, 100_000, 1_000_000)
+    assert abs(small - large) < 1e-12
+    assert policy.reward(1000, 100, 1000) > policy.reward(1000, 500, 1000)
+    assert policy.reward(1000, 100, 1000) > policy.reward(1000, 100, 100_000)
+
+def test_one_shot_samples_every_candidate():
+    policy = OneShotBandit()
+    history = []
+    for reward in (0.5, 0.9, 0.1):
+        bs = policy.choose_block_size(CANDIDATES, history)
+        history.append({"block_size": bs, "reward": reward})
+    assert sorted(h["block_size"] for h in history) == CANDIDATES
+    assert policy.choose_block_size(CANDIDATES, history) == history[1]["block_size"]
+
+def test_ucb_and_thompson_converge():
+    rewards = {CANDIDATES[0]: 0.2, CANDIDATES[1]: 0.8, CANDIDATES[2]: 0.4}
+    for policy in (UCBBandit(c=0.1), ThompsonBandit()):
+        picks = []
+        for _ in range(300):
+            bs = policy.choose_block_size(CANDIDATES, [])
+            policy.update_reward(bs, rewards[bs])
+            picks.append(bs)
+        assert picks[-100:].count(CANDIDATES[1]) > 80
+
+def test_bandit_state_persists_per_source(tmp_path):
+    data = b"May 01 12:00:00 web-1 nginx: GET /api 200\n" * 200_000
+
+    core = FastLogCore(bandit="ucb", source="nginx", state_dir=str(tmp_path))
+    core.encode(data)
+    learned = dict(core.warp.policy.counts)
+    assert learned
+
+    again = FastLogCore(bandit="ucb", source="nginx", state_dir=str(tmp_path))
+    assert again.warp.policy.counts == learned
+    other = FastLogCore(bandit="ucb", source="syslog", state_dir=str(tmp_path))
+    assert other.warp.policy.counts == {}
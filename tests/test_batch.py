@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from fastlog.core import FastLogCore
+from fastlog.batch import EventBatcher, decode_events
+
+def event(i):
+    return f"2024-05-01T12:00:00Z web-1 app[{i}]: request {i} done\n".encode()
+
+def test_batcher_flushes_on_count_and_bytes():
+    core = FastLogCore()
+    frames = []
+    events = [event(i) for i in range(250)]
+
+    with EventBatcher(frames.append, core=core, max_events=100, background=False) as b:
+        for ev in events:
+            b.add(ev)
+        assert len(frames) == 2
+    assert len(frames) == 3
+
+    decoded = [decode_events(f, core) for f in frames]
+    assert [len(d) for d in decoded] == [100, 100, 50]
+    assert [bytes(e) for d in decoded for e in d] == events
+    assert all(isinstance(e, memoryview) for e in decoded[0])
+
+    frames.clear()
+    with EventBatcher(frames.append, core=core, max_bytes=1000, background=False) as b:
+        for ev in events[:100]:
+            b.add(ev)
+        assert all(len(decode_events(f, core)) * len(ev) >= 1000 for f in frames)
+
+def test_batcher_deadline():
+    now = [0.0]
+    frames = []
+    b = EventBatcher(frames.append, max_delay=0.5, background=False, clock=lambda: now[0])
+    b.add(event(1))
+    b.poll()
+    assert not frames
+    now[0] = 0.6
+    b.poll()
+    assert len(frames) == 1
+    assert [bytes(e) for e in decode_events(frames[0], b.core)] == [event(1)]
+    b.close()
+
+    # Background thread flushes without further add() / poll() calls
+    done = threading.Event()
+    frames = []
+    b = EventBatcher(lambda f: (frames.append(f), done.set()), max_delay=0.05)
+    b.add(event(2))
+    assert done.wait(5)
+    assert [bytes(e) for e in decode_events(frames[0], b.core)] == [event(2)]
+    b.close()
+
+def test_failed_sink_keeps_events_and_backs_off():
+    now = [0.0]
+    calls = []
+    fail = [True]
+    def sink(frame):
+        calls.append(frame)
+        if fail[0]:
+            raise OSError("collector down")
+
+    b = EventBatcher(sink, max_events=2, max_delay=1.0, max_buffer=2000,
+                     background=False, clock=lambda: now[0])
+    b.add(event(1))
+    with pytest.raises(OSError):
+        b.add(event(2))
+    # No re-encode per add() until the retry deadline
+    for i in range(3, 20):
+        b.add(event(i))
+    assert len(calls) == 1 and b.sink_errors == 1
+    assert isinstance(b.last_error, OSError)
+    with pytest.raises(BufferError):
+        for i in range(20, 100):
+            b.add(event(i))
+
+    fail[0] = False
+    now[0] = 1.5
+    b.poll()
+    assert len(calls) == 2 and b.frames == 1
+    events = [bytes(e) for e in decode_events(calls[1], b.core)]
+    assert events[:19] == [event(i) for i in range(1, 20)]
+    b.close()
+
+    # The background thread survives a failing sink and retries
+    done = threading.Event()
+    fail[0] = True
+    calls.clear()
+    def flaky(frame):
+        sink(frame)
+        done.set()
+    b = EventBatcher(flaky, max_delay=0.05)
+    b.add(event(100))
+    deadline = time.monotonic() + 5
+    while not b.sink_errors and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert b.sink_errors >= 1
+    fail[0] = False
+    assert done.wait(5)
+    assert [bytes(e) for e in decode_events(calls[-1], b.core)] == [event(100)]
+    b.close()
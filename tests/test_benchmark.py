@@ -0,0 +1,43 @@
+import copy
+import json
+import subprocess
+import sys
+
+from fastlog import benchmark
+
+def test_report_schema_and_regression_gate(tmp_path):
+    report = benchmark.run_benchmarks(size=64 * 1024, warmup=0, repeats=3)
+    (name, stages), = report["results"].items()
+    assert set(stages) == set(benchmark.STAGES)
+    for r in stages.values():
+        assert r["runs"] == 3
+        assert 0 < r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
+        assert r["mb_s"] > 0
+    assert stages["compress"]["ratio"] < 0.5
+
+    path = tmp_path / "baseline.json"
+    benchmark.save_report(report, path)
+    baseline = benchmark.load_report(path)
+    assert benchmark.compare(report, baseline) == []
+
+    faster = copy.deepcopy(baseline)
+    faster["results"][name]["decode"]["mb_s"] *= 2
+    smaller = copy.deepcopy(baseline)
+    smaller["results"][name]["frame"]["ratio"] /= 2
+    assert [r.split(":")[0] for r in benchmark.compare(report, faster)] == [f"{name} decode"]
+    assert "ratio" in benchmark.compare(report, smaller)[0]
+
+def test_cli_bench_fails_on_regression(tmp_path):
+    out = tmp_path / "run.json"
+    cmd = [sys.executable, "-m", "fastlog.cli", "bench", "--size", "65536",
+           "--warmup", "0", "--repeats", "2", "--json", str(out)]
+    assert subprocess.run(cmd, capture_output=True).returncode == 0
+
+    baseline = json.loads(out.read_text())
+    for stages in baseline["results"].values():
+        stages["compress"]["mb_s"] *= 1000
+    (tmp_path / "base.json").write_text(json.dumps(baseline))
+    done = subprocess.run(cmd + ["--baseline", str(tmp_path / "base.json")],
+                          capture_output=True, text=True)
+    assert done.returncode == 1
+    assert "REGRESSION" in done.stdout
@@ -0,0 +1,22 @@
+import mmap
+
+import warphybrid
+
+from fastlog.warp_adapter import WarpAdapter
+
+def test_compress_into_accepts_buffers(tmp_path, sample):
+    data = sample(200_000)
+    path = tmp_path / "in.log"
+    path.write_bytes(data)
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dst = bytearray(16 + warphybrid.compress_bound(len(data)))
+        n = warphybrid.compress_into(mm, dst, 16, 9)
+        out = bytearray(len(data))
+        assert warphybrid.decompress_into(memoryview(dst)[16:16+n], out, 0, len(data)) == len(data)
+        assert out == data
+
+        warp = WarpAdapter(bandit="off")
+        assert warp.decompress_stream(warp.compress_stream(mm)) == data
+        mm.close()
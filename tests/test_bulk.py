@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from fastlog import bulk
+from fastlog.corpus import generate
+
+KEY = bytes(range(32))
+
+def test_encode_dir_verify_and_decode(tmp_path):
+    src = tmp_path / "logs"
+    (src / "old").mkdir(parents=True)
+    files = {"app.log": 300_000, "old/app.log.1": 900_000, "old/app.log.2": 50_000}
+    for i, (name, size) in enumerate(files.items()):
+        (src / name).write_bytes(generate("syslog", size, seed=i))
+
+    jobs = bulk.plan(bulk.collect([str(src)]), str(tmp_path / "out"))
+    assert [size for _, _, size in jobs] == [900_000, 300_000, 50_000]
+
+    results = list(bulk.run_jobs("encode", jobs, key=KEY, workers=2))
+    summary = bulk.summarize(results, 1.0)
+    assert (summary["files"], summary["failed"], summary["bytes_in"]) == (3, 0, 1_250_000)
+    out = tmp_path / "out"
+    assert sorted(str(p.relative_to(out)) for p in out.rglob("*") if p.is_file()) == [
+        "app.log.fastlog", "old/app.log.1.fastlog", "old/app.log.2.fastlog",
+    ]
+
+    encoded = bulk.collect([str(out)], "*" + bulk.SUFFIX)
+    verified = list(bulk.run_jobs("verify", bulk.plan(encoded, None, decode=True), key=KEY))
+    assert sum(r["bytes_out"] for r in verified) == 1_250_000
+    assert all(r["error"] is None and r["dst"] is None for r in verified)
+
+    back = tmp_path / "back"
+    list(bulk.run_jobs("decode", bulk.plan(encoded, str(back), decode=True), key=KEY))
+    for name in files:
+        assert (back / name).read_bytes() == (src / name).read_bytes()
+
+def test_bulk_failures_are_per_file(tmp_path):
+    good = tmp_path / "good.log.fastlog"
+    bad = tmp_path / "bad.log.fastlog"
+    (tmp_path / "in.log").write_bytes(generate("json", 200_000))
+    list(bulk.run_jobs("encode", [(str(tmp_path / "in.log"), str(good), 0)], key=KEY))
+    blob = bytearray(good.read_bytes())
+    blob[len(blob) // 2] ^= 1
+    bad.write_bytes(blob)
+
+    out = tmp_path / "out"
+    jobs = bulk.plan(bulk.collect([str(tmp_path / "*.fastlog")]), str(out), decode=True)
+    results = {os.path.basename(r["src"]): r for r in bulk.run_jobs("decode", jobs, key=KEY)}
+    assert results["good.log.fastlog"]["error"] is None
+    assert "InvalidTag" in results["bad.log.fastlog"]["error"]
+    # Outputs only appear complete: no partial or temporary file for the bad one
+    assert os.listdir(out) == ["good.log"]
+
+def test_colliding_outputs_are_refused(tmp_path):
+    for d in ("a", "b"):
+        (tmp_path / d).mkdir()
+        (tmp_path / d / "app.log").write_bytes(generate("syslog", 10_000, seed=len(d)))
+    out = str(tmp_path / "out")
+    for inputs in ([str(tmp_path / "*" / "app.log")], [str(tmp_path / "a"), str(tmp_path / "b")]):
+        with pytest.raises(ValueError, match="app.log.fastlog"):
+            bulk.plan(bulk.collect(inputs), out)
+    # Verify-only runs write nothing, so names may repeat
+    assert len(bulk.plan(bulk.collect([str(tmp_path / "*" / "app.log")]), None)) == 2
@@ -0,0 +1,63 @@
+import io
+import json
+
+import pytest
+
+from fastlog.columnar import ColumnarReader, ColumnarWriter, encode_columnar
+from fastlog.core import FastLogCore
+from fastlog.corpus import generate
+
+def test_round_trip_is_byte_exact():
+    core = FastLogCore(threads=2)
+    data = generate("json", 300_000, seed=4)
+    odd = (
+        b'{"a": 1, "b" :[1,-2,{"c":"x%s\\"y"}], "n":null}\n'
+        b'\n'
+        b'plain text line 42 true\n'
+        b'{"a":"unterminated\n'
+        b'{"ts":1}\r\n'
+        b'  {"indented": false}\n'
+        b'{"a":2}'                          # no final newline
+    )
+    for sample in (data, data + odd, odd, b"", b"\n", b"x", b"{}\n{}"):
+        blob = encode_columnar(sample, core, row_group_bytes=64 * 1024)
+        assert ColumnarReader(blob, core=core).read() == sample
+        assert core.decode(blob) == sample
+
+def test_streamed_writes_and_ratio():
+    core = FastLogCore()
+    data = generate("json", 1_000_000, seed=9)
+    out = io.BytesIO()
+    with ColumnarWriter(out, core=core) as writer:
+        for i in range(0, len(data), 7777):
+            writer.write(data[i:i+7777])
+    blob = out.getvalue()
+    assert core.decode(blob) == data
+    # Columns beat the same codec on the interleaved lines
+    assert len(blob) < len(core.encode(data))
+
+def test_projection():
+    core = FastLogCore()
+    data = generate("json", 200_000, seed=3)
+    data = data[:data.rfind(b"\n") + 1]           # whole records only
+    reader = ColumnarReader(encode_columnar(data, core, row_group_bytes=50_000), core=core)
+    assert {"ts", "status", "path", "trace_id"} <= set(reader.fields)
+
+    projected = reader.read(["status", "path"]).splitlines()
+    records = [json.loads(line) for line in data.splitlines()]
+    assert len(projected) == len(records) == reader.rows
+    for line, record in zip(projected, records):
+        assert json.loads(line) == {"status": record["status"], "path": record["path"]}
+
+    nested = b'{"http":{"status":200,"tags":["a","b"]},"msg":"ok"}\n{"msg":"no http"}\n'
+    reader = ColumnarReader(encode_columnar(nested, core), core=core)
+    assert reader.read(["http.status", "http.tags"]) == (
+        b'{"http.status":200,"http.tags":["a","b"]}\n{}\n'
+    )
+
+def test_tampered_column_is_rejected():
+    core = FastLogCore()
+    blob = bytearray(encode_columnar(generate("json", 50_000, seed=1), core))
+    blob[100] ^= 1
+    with pytest.raises(Exception):
+        ColumnarReader(bytes(blob), core=core).read()
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from fastlog import corpus, sweep
+from fastlog.core import FastLogCore
+from fastlog.format import BLOCK_HEADER, MAGIC, HEADER_STRUCT
+
+@pytest.mark.parametrize("kind", list(corpus.CORPUS_TYPES))
+def test_corpus_is_deterministic_and_log_like(kind):
+    data = corpus.generate(kind, 200_000, seed=7)
+    assert len(data) == 200_000
+    assert data == corpus.generate(kind, 200_000, seed=7)
+    assert data != corpus.generate(kind, 200_000, seed=8)
+
+    lines = data.split(b"\n")[:-1]
+    assert len(set(lines)) == len(lines)
+    if kind == "json":
+        assert all(json.loads(line)["status"] for line in lines)
+
+    # Real logs: compressible, but nowhere near a repeated literal
+    ratio = len(FastLogCore(bandit="off").warp.compress_stream(data)) / len(data)
+    assert 0.03 < ratio < 0.6
+
+def test_fixed_block_size_and_level():
+    data = corpus.generate("syslog", 300_000)
+    core = FastLogCore(bandit="full", level=-4, block_size=64 * 1024)
+    container = bytes(core.warp.compress_stream(data))
+    (count,) = HEADER_STRUCT.unpack_from(container, len(MAGIC))
+    bs, _, level = BLOCK_HEADER.unpack_from(container, len(MAGIC) + HEADER_STRUCT.size)
+    assert (count, bs, level & 0xFF) == (5, 64 * 1024, -4 & 0xFF)
+    assert core.decode(core.encode(data)) == data
+
+def test_sweep_recommends_per_corpus():
+    report = sweep.run_sweep(["nginx", "cef"], size=128 * 1024, levels=(0, 9),
+                             bandits=("one",), block_sizes=(16 * 1024, 64 * 1024))
+    for kind in ("nginx", "cef"):
+        rows = report["results"][kind]
+        assert {(r["bandit"], r["block_size"], r["level"]) for r in rows} == {
+            (b, bs, level) for level in (0, 9)
+            for b, bs in (("off", 16 * 1024), ("off", 64 * 1024), ("one", None))
+        }
+        assert report["recommended"][kind] == max(rows, key=lambda r: r["score"])
+
+        smallest = sweep.recommend(rows, min_mbps=0)
+        assert smallest["ratio"] == min(r["ratio"] for r in rows)
+        assert sweep.recommend(rows, min_mbps=1e12) == max(rows, key=lambda r: r["mb_s"])
+    json.dumps(report)
@@ -0,0 +1,99 @@
+import io
+import os
+import random
+
+import pytest
+import warphybrid
+
+from fastlog.core import FastLogCore
+from fastlog.corpus import generate
+from fastlog.dedup import ChunkStore, DedupWriter, decode_dedup, decode_dedup_file, encode_dedup
+
+def with_dumps(seed, size=1_000_000):
+    # Log text with the same 200 KB "crash dumps" far apart: out of LZ4's
+    # reach, so only dedup can store them once.
+    rnd = random.Random(seed)
+    dumps = [rnd.randbytes(200_000) for _ in range(2)]
+    log = generate("syslog", size, seed=seed)
+    parts = []
+    for i in range(0, len(log), 100_000):
+        parts += [log[i:i+100_000], dumps[rnd.randrange(2)]]
+    return b"".join(parts)
+
+def test_round_trip_and_ratio():
+    core = FastLogCore()
+    data = with_dumps(1)
+    out = io.BytesIO()
+    with DedupWriter(out, core=core) as writer:
+        for i in range(0, len(data), 9999):
+            writer.write(data[i:i+9999])
+    blob = out.getvalue()
+    assert core.decode(blob) == data
+    assert writer.duplicate_bytes > 7 * 200_000
+    assert len(blob) < 0.5 * len(core.encode(data))
+
+    for sample in (b"", b"x", os.urandom(100_000), b"a" * 300_000):
+        assert decode_dedup(encode_dedup(sample, core), core) == sample
+
+def test_fingerprint_table_is_capped():
+    core = FastLogCore()
+    data = with_dumps(2)
+    out = io.BytesIO()
+    with DedupWriter(out, core=core, max_index_bytes=192 * 50) as writer:
+        writer.write(data)
+    assert len(writer._table) == 50 and writer.evictions > 0
+    assert core.decode(out.getvalue()) == data
+
+def test_shared_chunk_store(tmp_path):
+    core = FastLogCore()
+    store = ChunkStore(str(tmp_path / "chunks"), core)
+    data = with_dumps(3)
+    first = encode_dedup(data, core, store=store)
+    rotated = data[500_000:] + generate("syslog", 100_000, seed=9)
+    second = encode_dedup(rotated, core, store=store)
+    assert len(second) < 0.2 * len(core.encode(rotated))
+
+    assert core.decode(first) == data            # self-contained
+    assert decode_dedup(second, core, store) == rotated
+    with pytest.raises(KeyError):
+        decode_dedup(second, core, ChunkStore(str(tmp_path / "empty"), core))
+
+    # Another key neither matches nor opens the stored chunks
+    other = FastLogCore()
+    blob = encode_dedup(rotated, other, store=ChunkStore(store.chunk_dir, other))
+    assert len(blob) > len(second)
+
+def test_cut_points_resync_after_an_insertion():
+    data = random.Random(4).randbytes(500_000)
+    ends = warphybrid.cdc_chunks(data, 1024, 4096, 32768)
+    assert ends[-1] == len(data)
+    assert all(1024 <= b - a <= 32768 for a, b in zip([0] + ends, ends[:-1]))
+    shifted = warphybrid.cdc_chunks(b"inserted" + data, 1024, 4096, 32768)
+    common = set(ends) & {end - 8 for end in shifted}
+    assert len(common) > 0.9 * len(ends)
+
+class Unseekable(io.RawIOBase):
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+def test_streaming_decode_reads_copies_back(tmp_path):
+    core = FastLogCore()
+    data = with_dumps(5)
+    path = tmp_path / "blob"
+    path.write_bytes(encode_dedup(data, core))
+
+    with open(path, "rb") as src, open(tmp_path / "out", "w+b") as dst:
+        assert decode_dedup_file(src, dst, core) == len(data)
+    assert (tmp_path / "out").read_bytes() == data
+
+    pipe = Unseekable()
+    with open(path, "rb") as src:
+        assert decode_dedup_file(src, pipe, core) == len(data)
+    assert pipe.data == data
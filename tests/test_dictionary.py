@@ -0,0 +1,82 @@
+import io
+import random
+import subprocess
+import sys
+
+import pytest
+import warphybrid
+from fastlog.core import FastLogCore
+from fastlog.archive import FastLogArchive
+from fastlog.dictionary import DictionaryStore, train_dictionary, dict_id
+from fastlog.stream import FastLogWriter, FastLogReader
+
+def events(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        (f'{{"ts":"2024-05-01T12:{i % 60:02d}:{rng.randint(0, 59):02d}Z","host":"web-{rng.randint(1, 9)}",'
+         f'"method":"GET","path":"/api/v1/items/{rng.randint(1, 99999)}","status":200,'
+         f'"bytes":{rng.randint(100, 9999)},"agent":"Mozilla/5.0"}}\n').encode()
+        for i in range(n)
+    ]
+
+def test_dictionary_shrinks_small_events():
+    sample = events(2000)
+    trained = train_dictionary(sample, dict_size=16 * 1024)
+    assert 0 < len(trained) <= 16 * 1024
+
+    d = warphybrid.Dictionary(trained)
+    plain = with_dict = 0
+    for ev in events(200, seed=99):
+        dst = bytearray(warphybrid.compress_bound(len(ev)))
+        plain += warphybrid.compress_into(ev, dst, 0, 9)
+        n = warphybrid.compress_into(ev, dst, 0, 9, d)
+        with_dict += n
+
+        out = bytearray(len(ev))
+        assert warphybrid.decompress_into(bytes(dst[:n]), out, 0, len(ev), d) == len(ev)
+        assert out == ev
+    assert with_dict < plain * 0.6
+
+def test_container_records_dictionary_id(tmp_path):
+    store = str(tmp_path / "dicts")
+    trained = train_dictionary(events(2000))
+
+    core = FastLogCore(bandit="off", dictionary=trained, dict_dir=store)
+    core.warp.policy.default = 4096
+    assert core.warp.dict_id == dict_id(trained)
+    assert DictionaryStore(store).load(core.warp.dict_id) == trained
+
+    data = b"".join(events(500, seed=3))
+    blob = core.encode(data, index=True)
+
+    # A fresh decoder finds the dictionary through the store
+    reader = FastLogCore(key=core.dcf.key, dict_dir=store)
+    assert reader.decode(blob) == data
+    assert FastLogReader(io.BytesIO(blob), core=reader).read() == data
+
+    path = tmp_path / "events.fastlog"
+    path.write_bytes(blob)
+    with FastLogArchive(str(path), core=reader) as archive:
+        assert archive.read(5000, 3000) == data[5000:8000]
+
+    with pytest.raises(KeyError):
+        FastLogCore(key=core.dcf.key, dict_dir=str(tmp_path / "empty")).decode(blob)
+
+def test_cli_train(tmp_path):
+    samples = tmp_path / "samples.log"
+    samples.write_bytes(b"".join(events(1000)))
+    store = tmp_path / "dicts"
+
+    subprocess.run(
+        [sys.executable, "-m", "fastlog.cli", "train", str(samples), "--dict-dir", str(store)],
+        capture_output=True, check=True,
+    )
+    (path,) = store.glob("*.dict")
+    ident = int(path.stem, 16)
+    assert dict_id(path.read_bytes()) == ident
+
+    core = FastLogCore(dictionary=ident, dict_dir=str(store))
+    out = io.BytesIO()
+    with FastLogWriter(out, core=core) as w:
+        w.write(b"".join(events(10, seed=5)))
+    assert core.decode(out.getvalue()) == b"".join(events(10, seed=5))
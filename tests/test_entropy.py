@@ -0,0 +1,22 @@
+import os
+
+from fastlog.format import BLOCK_STORED
+from fastlog.warp_adapter import WarpAdapter
+
+def test_random_blocks_are_stored(sample):
+    warp = WarpAdapter(bandit="off")
+    warp.policy.default = 64 * 1024
+    noise = os.urandom(64 * 1024)
+    data = sample(64 * 1024) + noise + sample(1000)
+    blob = warp.compress_stream(data)
+
+    fields = [entry[4] for entry in warp._block_table(blob)[1]]
+    assert [bool(f & BLOCK_STORED) for f in fields] == [False, True, False]
+    assert warp.decompress_stream(blob) == data
+
+    # Disabled detector still never expands a block beyond a raw copy
+    warp.entropy_threshold = None
+    blob = warp.compress_stream(noise)
+    [(_, clen, _, _, field)] = warp._block_table(blob)[1]
+    assert field & BLOCK_STORED and clen == len(noise)
+    assert warp.decompress_stream(blob) == noise
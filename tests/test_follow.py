@@ -0,0 +1,94 @@
+import io
+
+from fastlog.core import FastLogCore
+from fastlog.follow import Follower
+from fastlog.stream import FastLogReader
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def decode_all(frames, core):
+    return FastLogReader(io.BytesIO(b"".join(frames)), core=core).read()
+
+def test_follow_delay_size_and_truncation(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_bytes(b"")
+    core = FastLogCore()
+    frames, clock = [], Clock()
+    f = Follower(str(log), frames.append, core=core, max_bytes=1000, max_delay=1.0, clock=clock)
+
+    with open(log, "ab", buffering=0) as w:
+        w.write(b"first line\n")
+        assert f.poll() == 0
+        clock.now = 1.5                     # oldest byte waited max_delay
+        assert f.poll() == 1
+
+        w.write(b"".join(b"line %04d\n" % i for i in range(250)))
+        f.poll()
+        # Size-triggered frames end on a newline
+        assert len(frames) == 3
+        assert all(core.decode(fr).endswith(b"\n") for fr in frames)
+
+    log.write_bytes(b"rewritten\n")         # copytruncate-style
+    clock.now = 5.0
+    f.poll()
+    f.close()
+    assert f.truncations == 1
+    assert decode_all(frames, core) == (
+        b"first line\n" + b"".join(b"line %04d\n" % i for i in range(250)) + b"rewritten\n"
+    )
+
+def test_follow_rotation_and_checkpoint_resume(tmp_path):
+    log, checkpoint = tmp_path / "app.log", str(tmp_path / "follow.ckpt")
+    core = FastLogCore()
+    frames = []
+    log.write_bytes(b"a\n" * 1000)
+
+    with Follower(str(log), frames.append, core=core, checkpoint=checkpoint) as f:
+        f.poll()
+        with open(log, "ab") as w:
+            w.write(b"b\n" * 10)
+        log.rename(tmp_path / "app.log.1")
+        log.write_bytes(b"c\n" * 10)
+        f.poll()
+        assert f.rotations == 1
+
+    # Appended, then rotated again while no Follower ran
+    with open(log, "ab") as w:
+        w.write(b"d\n" * 10)
+    log.rename(tmp_path / "app.log.2")
+    log.write_bytes(b"e\n" * 10)
+
+    with Follower(str(log), frames.append, core=core, checkpoint=checkpoint) as f:
+        f.poll()
+        assert (f.rotations, f.bytes_in) == (1, 40)
+
+    # Nothing encoded twice, nothing lost
+    assert decode_all(frames, core) == b"a\n" * 1000 + b"b\n" * 10 + b"c\n" * 10 + b"d\n" * 10 + b"e\n" * 10
+
+def test_follow_reads_old_file_written_just_before_rotation(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_bytes(b"a\n")
+    core = FastLogCore()
+    frames = []
+    f = Follower(str(log), frames.append, core=core)
+    f.poll()
+
+    # The writer appends and rotates between poll()'s read and its stat
+    read = f._read_available
+    def read_then_rotate():
+        read()
+        f._read_available = read
+        with open(log, "ab") as w:
+            w.write(b"late\n")
+        log.rename(tmp_path / "app.log.1")
+        log.write_bytes(b"new\n")
+    f._read_available = read_then_rotate
+    f.poll()
+    f.close()
+    assert f.rotations == 1
+    assert decode_all(frames, core) == b"a\nlate\nnew\n"
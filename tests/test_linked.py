@@ -0,0 +1,82 @@
+import io
+import random
+
+from fastlog.archive import FastLogArchive
+from fastlog.core import FastLogCore
+from fastlog.format import BLOCK_LINKED
+from fastlog.stream import FastLogReader
+from fastlog.warp_adapter import WarpAdapter
+
+def test_linked_blocks_with_reset_points(tmp_path):
+    rng = random.Random(3)
+    lines = [b"web-%d GET /api/v1/items/%d 200 %d\n" % (i % 9, i * 7919, i * 31) for i in range(400)]
+    data = b"".join(rng.choice(lines) for _ in range(20_000))
+
+    plain = WarpAdapter(bandit="off")
+    warp = WarpAdapter(bandit="off", linked=True, reset_interval=64 * 1024)
+    plain.policy.default = warp.policy.default = 4096
+
+    blob = warp.compress_stream(data)
+    fields = [e[4] for e in warp._block_table(blob)[1]]
+    resets = [i for i, f in enumerate(fields) if not f & BLOCK_LINKED]
+    assert resets == list(range(0, len(fields), 16))
+    assert len(blob) < len(plain.compress_stream(data)) * 0.8
+    assert warp.decompress_stream(blob) == data
+
+    threaded = WarpAdapter(bandit="off", threads=3)
+    assert threaded.decompress_stream(blob) == data
+    threaded.close()
+
+    # Sealed containers: threaded writer, streaming reader, random access
+    core = FastLogCore(bandit="off", threads=2, linked=True, reset_interval=64 * 1024)
+    core.warp.policy.default = 4096
+    sealed = core.encode(data, index=True)
+    assert core.decode(sealed) == data
+    assert FastLogReader(io.BytesIO(sealed), core=core).read() == data
+
+    path = tmp_path / "linked.fastlog"
+    path.write_bytes(sealed)
+    with FastLogArchive(str(path), core=core, cache_bytes=32 * 1024) as arc:
+        for _ in range(30):
+            off = rng.randrange(len(data))
+            assert arc.read(off, 9000) == data[off:off+9000]
+
+def test_stored_blocks_reset_the_group(tmp_path):
+    # A stored block (entropy detector, or LZ4 expansion for base64) is
+    # not linked, so the encoder must not let the next block reach past it.
+    import base64
+    import os
+
+    text = b"".join(b"web-%d GET /api/v1/items/%d 200\n" % (i % 9, i * 7919) for i in range(4000))
+    head = text[:4096 * 10]
+    for noise in (os.urandom(4096), base64.b64encode(os.urandom(3072))):
+        data = head + noise + text[len(head):]
+        for threads in (1, 4):
+            warp = WarpAdapter(bandit="off", linked=True, block_size=4096, threads=threads)
+            blob = warp.compress_stream(data)
+            assert warp.decompress_stream(blob) == data
+            warp.close()
+
+            core = FastLogCore(bandit="off", linked=True, block_size=4096, threads=threads)
+            sealed = core.encode(data, index=True)
+            assert core.decode(sealed) == data
+            assert FastLogReader(io.BytesIO(sealed), core=core).read() == data
+            path = tmp_path / "stored.fastlog"
+            path.write_bytes(sealed)
+            with FastLogArchive(str(path), core=core) as arc:
+                assert arc.read(4096 * 10, 9000) == data[4096 * 10:4096 * 10 + 9000]
+
+def test_inline_linker_sees_the_whole_window():
+    # The inline Linker (threads=1) and the prefix path (threads>1) both
+    # reach back LINK_WINDOW bytes, so their output is the same size.
+    rng = random.Random(5)
+    lines = [b"web-%d GET /api/v1/items/%d 200 %d\n" % (i % 9, i * 7919, i * 31) for i in range(400)]
+    data = b"".join(rng.choice(lines) for _ in range(20_000))
+    for block_size in (512, 4096):
+        sizes = []
+        for threads in (1, 2):
+            warp = WarpAdapter(bandit="off", linked=True, block_size=block_size,
+                               threads=threads, reset_interval=1 << 30)
+            sizes.append(len(warp.compress_stream(data)))
+            warp.close()
+        assert abs(sizes[0] - sizes[1]) < sizes[1] * 0.01
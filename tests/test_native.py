@@ -0,0 +1,66 @@
+import os
+import random
+
+import pytest
+import warphybrid
+
+from fastlog.dictionary import train_dictionary
+from fastlog.warp_adapter import WarpAdapter
+
+def test_native_container_loop(tmp_path, sample):
+    data = sample(2 * 1024 * 1024 + 77) + os.urandom(300_000) + sample(5000)
+
+    # Same block schedule and bytes as the Python per-block loop, while the
+    # bandit explores one block at a time and after it has settled.
+    native = WarpAdapter(bandit="one")
+    native.candidates = [64 * 1024, 256 * 1024, 1024 * 1024]
+    python = WarpAdapter(bandit="one")
+    python.candidates = native.candidates
+    python._native = lambda: False
+    for _ in range(2):
+        blob = native.compress_stream(data)
+        assert blob == python.compress_stream(data)
+        assert native.decompress_stream(blob) == data
+    assert native.policy.selected == python.policy.selected
+
+    for size in (0, 1, 64, 1024, 16_384):
+        assert native.decompress_stream(native.compress_stream(data[:size])) == data[:size]
+
+    # Dictionary blocks look their dictionary up through the store
+    trained = train_dictionary(sample(50_000).splitlines(True))
+    writer = WarpAdapter(bandit="off", dictionary=trained, dict_dir=str(tmp_path))
+    writer.policy.default = 4096
+    blob = writer.compress_stream(data[:100_000])
+    assert WarpAdapter(dict_dir=str(tmp_path)).decompress_stream(blob) == data[:100_000]
+    with pytest.raises(KeyError):
+        warphybrid.decode_container(blob)
+
+    with pytest.raises(ValueError):
+        native.decompress_stream(b"NOTFASTLOG" + bytes(20))
+    with pytest.raises(ValueError):
+        native.decompress_stream(native.compress_stream(data)[:-10])
+
+@pytest.mark.parametrize("bandit", ["ucb", "full"])
+def test_native_loop_keeps_adaptive_bandits_learning(bandit, sample):
+    data = (sample(1_000_000) + os.urandom(400_000)) * 3
+
+    # Rewards that do not depend on timing, so both loops learn alike
+    def adapter(native):
+        warp = WarpAdapter(bandit=bandit)
+        warp.candidates = [64 * 1024, 256 * 1024, 1024 * 1024]
+        warp.policy.reward = lambda nbytes, n, ns: 1 - n / nbytes
+        if not native:
+            warp._native = lambda: False
+        choose, update = warp.policy.choose_block_size, warp.policy.update_reward
+        warp.calls = []
+        warp.policy.choose_block_size = lambda *a: warp.calls.append("c") or choose(*a)
+        warp.policy.update_reward = lambda *a: warp.calls.append("u") or update(*a)
+        return warp
+
+    native, python = adapter(True), adapter(False)
+    random.seed(3)
+    blob = native.compress_stream(data)
+    random.seed(3)
+    assert blob == python.compress_stream(data)
+    assert native.calls == python.calls == ["c", "u"] * (len(native.calls) // 2)
+    assert native.decompress_stream(blob) == data
@@ -0,0 +1,38 @@
+import os
+
+from fastlog.core import FastLogCore
+from fastlog.warp_adapter import WarpAdapter
+
+def test_parallel_compress_matches_serial(sample):
+    data = sample(3 * 1024 * 1024 + 123) + os.urandom(300_000)
+
+    serial = WarpAdapter(bandit="off").compress_stream(data)
+
+    warp = WarpAdapter(bandit="off", threads=4)
+    warp.candidates = [64 * 1024]
+    warp.policy.default = 64 * 1024
+    parallel = warp.compress_stream(data)
+
+    ref = WarpAdapter(bandit="off")
+    ref.policy.default = 64 * 1024
+    assert parallel == ref.compress_stream(data)
+    assert warp.decompress_stream(parallel) == data
+    assert warp.decompress_stream(serial) == data
+    warp.close()
+
+def test_parallel_core_round_trip(sample):
+    core = FastLogCore(threads=3)
+    data = sample(6 * 1024 * 1024)
+    assert core.decode(core.encode(data)) == data
+
+def test_decompress_into_preallocated_buffer(sample):
+    warp = WarpAdapter(bandit="off", threads=2)
+    warp.policy.default = 100_000
+    data = sample(1_000_000)
+    blob = warp.compress_stream(data)
+
+    out = bytearray(len(data) + 10)
+    assert warp.decompress_stream_into(blob, out) == len(data)
+    assert out[:len(data)] == data
+    assert warp.decompress_stream(blob) == data
+    warp.close()
@@ -0,0 +1,95 @@
+import re
+
+import warphybrid
+
+from fastlog.archive import FastLogArchive
+from fastlog.core import FastLogCore
+from fastlog.corpus import generate
+from fastlog.follow import Follower
+from fastlog.search import Searcher, required_tokens, search
+
+def grep(data, pattern, flags=0):
+    out = []
+    off = 0
+    for line in data.split(b"\n"):
+        if re.search(pattern, line, flags):
+            out.append((off, line))
+        off += len(line) + 1
+    return out
+
+def write_archive(path, data, bloom, block_size=4096):
+    core = FastLogCore(bandit="off", block_size=block_size)
+    path.write_bytes(core.encode(data, bloom=bloom))
+    return core
+
+def test_matches_equal_line_grep(tmp_path):
+    # Small blocks, so many lines cross block boundaries; one line spans
+    # several blocks and the data does not end in a newline.
+    data = generate("syslog", 300_000, seed=5)
+    long_line = b"start " + b"x" * 10_000 + b" needle_long end\n"
+    data = data[:150_000] + b"\n" + long_line + data[150_000:]
+    cases = [
+        (dict(pattern="sshd", fixed=True), rb"sshd", 0),
+        (dict(pattern="web-0[12] CRON", threads=3), rb"web-0[12] CRON", 0),
+        (dict(pattern="failed PASSWORD", ignore_case=True), rb"failed PASSWORD", re.I),
+        (dict(pattern="needle_long", word=True, threads=2), rb"\bneedle_long\b", 0),
+        (dict(pattern="ssh2$"), rb"ssh2$", 0),
+    ]
+    for bloom in (False, True):
+        path = tmp_path / f"{bloom}.fastlog"
+        core = write_archive(path, data, bloom)
+        with FastLogArchive(path, core=core) as arc:
+            assert (arc.filters is not None) == bloom
+            for kwargs, ref, flags in cases:
+                expected = grep(data, ref, flags)
+                assert list(Searcher(arc, **kwargs)) == expected, kwargs
+
+def test_bloom_filters_skip_blocks(tmp_path):
+    lines = [b"%06d host=web-%02d status=ok\n" % (i, i % 7) for i in range(20_000)]
+    lines[12_345] = b"012345 host=web-99 status=rare_failure_token\n"
+    data = b"".join(lines)
+    path = tmp_path / "a.fastlog"
+    core = write_archive(path, data, bloom=True)
+
+    with FastLogArchive(path, core=core) as arc:
+        s = Searcher(arc, "rare_failure_token", word=True, threads=2)
+        assert list(s) == grep(data, rb"rare_failure_token")
+        assert s.skipped > s.blocks * 0.9
+
+        # A token split by a block boundary is still found
+        split = [m.group() for m in re.finditer(rb"\w+", data)
+                 if any(m.start() < b < m.end() for b in arc._starts[1:])]
+        token = split[len(split) // 2]
+        s = Searcher(arc, token.decode(), word=True)
+        assert list(s) == grep(data, rb"\b" + token + rb"\b")
+        assert s.skipped
+
+        s = Searcher(arc, "zzz_absent", word=True)
+        assert list(s) == [] and s.decoded == 0
+
+def test_required_tokens():
+    assert required_tokens("user alice from", fixed=True) == [b"alice"]
+    assert required_tokens("Failed", word=True) == [b"failed"]
+    assert required_tokens("a.b c.d") == []
+    assert required_tokens("a.b c.d", fixed=True) == [b"b", b"c"]
+
+def test_bloom_filter_holds_every_distinct_token():
+    # Far more tokens than the initial token set: it has to grow
+    tokens = [b"tok%d" % i for i in range(50_000)]
+    bits = warphybrid.bloom_build(b" ".join(tokens), b"", 10, 7)
+    assert len(bits) * 8 >= 10 * len(tokens)
+    assert all(warphybrid.bloom_contains(bits, token, 7) for token in tokens)
+
+def test_grep_follower_output(tmp_path):
+    # `fastlog follow -o FILE` appends one sealed container per frame
+    log, out = tmp_path / "app.log", tmp_path / "app.fastlog"
+    log.write_bytes(b"first line\n")
+    core = FastLogCore()
+    with open(out, "ab") as f, Follower(str(log), f.write, core=core) as follower:
+        follower.poll()
+        follower.flush()
+        with open(log, "ab") as w:
+            w.write(b"the needle line\nlast\n")
+        follower.poll()
+    assert follower.frames == 2
+    assert list(search(str(out), "needle", core=core, fixed=True)) == [(11, b"the needle line")]
@@ -0,0 +1,20 @@
+from fastlog.format import field_level
+from fastlog.warp_adapter import WarpAdapter
+
+def test_slo_steps_down_to_fast_levels(sample):
+    data = sample(2 * 1024 * 1024)
+
+    # Unreachable target → one rung faster per block until the fastest
+    warp = WarpAdapter(bandit="off", target_mbps=1e9)
+    warp.policy.default = 64 * 1024
+    blob = warp.compress_stream(data)
+    levels = [field_level(e[4]) for e in warp._block_table(blob)[1]]
+    assert levels[0] == 9
+    assert levels[-1] == warp.slo.ladder[-1] < 0
+    assert warp.decompress_stream(blob) == data
+
+    # Trivial target → stays on the configured HC level
+    warp = WarpAdapter(bandit="off", target_mbps=1e-6)
+    warp.policy.default = 64 * 1024
+    blob = warp.compress_stream(data)
+    assert {field_level(e[4]) for e in warp._block_table(blob)[1]} == {9}
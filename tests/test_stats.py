@@ -0,0 +1,66 @@
+import io
+import json
+
+from fastlog.core import FastLogCore
+from fastlog.corpus import generate
+from fastlog.stats import Stats, size_bucket
+from fastlog.stream import FastLogReader
+
+def test_per_call_and_cumulative_stats():
+    data = generate("syslog", 600_000)
+    calls = []
+    stats = Stats(hooks=[calls.append])
+    core = FastLogCore(bandit="one", stats=stats)
+
+    blob = core.encode(data)
+    enc = core.last_stats
+    assert enc.op == "encode" and calls == [enc]
+    assert (enc.bytes_in, enc.bytes_out) == (len(data), len(blob))
+    assert enc.blocks == sum(enc.block_sizes.values()) == sum(enc.levels.values())
+    assert sum(size * n for size, n in enc.block_sizes.items()) >= len(data)
+    assert all(size & (size - 1) == 0 for size in enc.block_sizes)
+    assert enc.levels == {9: enc.blocks}
+    # One-shot bandit: samples the candidates, then sticks to the winner
+    assert enc.explore >= 1 and enc.explore + enc.exploit == enc.blocks
+    assert all(enc.ns[stage] > 0 for stage in ("compress", "encrypt", "frame", "bandit"))
+    assert enc.alloc_bytes > 0
+
+    assert core.decode(blob) == data
+    dec = core.last_stats
+    assert (dec.op, dec.bytes_in, dec.bytes_out, dec.blocks) == ("decode", len(blob), len(data), enc.blocks)
+    assert FastLogReader(io.BytesIO(blob), core=core).read() == data
+    assert len(calls) == 3 and core.last_stats.blocks == enc.blocks
+
+    # A second core counts into the shared Stats
+    FastLogCore(stats=stats).encode(data)
+    totals = stats.to_dict()
+    assert totals["encode"]["calls"] == 2 and totals["decode"]["calls"] == 2
+    assert totals["encode"]["bytes_in"] == 2 * len(data)
+    assert json.loads(stats.to_json())["decode"]["bytes_out"] == 2 * len(data)
+
+    text = stats.to_prometheus()
+    assert "# TYPE fastlog_stage_seconds_total counter" in text
+    assert 'fastlog_calls_total{op="encode"} 2' in text
+    assert f'fastlog_bytes_in_total{{op="encode"}} {2 * len(data)}' in text
+    assert 'fastlog_bandit_choices_total{kind="explore"}' in text
+
+    stats.reset()
+    assert stats.to_dict()["encode"]["calls"] == 0
+
+def test_stats_are_opt_in():
+    core = FastLogCore()
+    blob = core.encode(b"x" * 100_000)
+    assert core.decode(blob) == b"x" * 100_000
+    assert core.stats is None and core.last_stats is None
+
+    threaded = FastLogCore(threads=2, stats=True)
+    threaded.encode(generate("json", 3_000_000))
+    assert threaded.last_stats.blocks == threaded.stats.to_dict()["encode"]["blocks"] > 1
+
+def test_block_sizes_are_bucketed():
+    assert [size_bucket(n) for n in (0, 1, 2, 3, 1000, 1024, 1025)] == [1, 1, 2, 4, 1024, 1024, 2048]
+    stats = Stats()
+    for block_size in range(60_000, 70_000, 1000):
+        FastLogCore(block_size=block_size, stats=stats).encode(generate("syslog", 200_000))
+    assert set(stats.to_dict()["encode"]["block_sizes"]) <= {2 ** i for i in range(18)}
+    assert stats.to_prometheus().count("fastlog_block_size_blocks_total{") <= 18
@@ -0,0 +1,76 @@
+import io
+import os
+import subprocess
+import sys
+
+from fastlog.core import FastLogCore
+from fastlog.stream import FastLogWriter, FastLogReader
+
+def sample(size):
+    line = b"May 01 12:00:00 web-1 app[77]: request id=%d status=200\n"
+    out = b"".join(line % i for i in range(size // 40 + 1))
+    return out[:size]
+
+def test_writer_reader_round_trip():
+    core = FastLogCore(bandit="off")
+    core.warp.policy.default = 64 * 1024
+    data = sample(1_000_000) + os.urandom(50_000)
+
+    buf = io.BytesIO()
+    with FastLogWriter(buf, core=core) as w:
+        for i in range(0, len(data), 10_000):
+            w.write(data[i:i+10_000])
+
+    # Streamed output is still a regular FastLogCore blob
+    assert core.decode(buf.getvalue()) == data
+
+    r = FastLogReader(io.BytesIO(buf.getvalue()), core=core, chunk_size=4096)
+    assert r.read() == data
+
+def test_reader_accepts_encode_output():
+    core = FastLogCore()
+    data = sample(300_000)
+    r = FastLogReader(io.BytesIO(core.encode(data)), core=core)
+    assert b"".join(bytes(b) for b in r.iter_blocks()) == data
+
+def test_cli_pipes_stdin_stdout(tmp_path):
+    key = tmp_path / "fastlog.key"
+    data = sample(200_000)
+    cli = [sys.executable, "-m", "fastlog.cli"]
+
+    enc = subprocess.run(cli + ["encode", "-", "-", "--key-file", str(key)],
+                         input=data, capture_output=True, check=True)
+    dec = subprocess.run(cli + ["decode", "-", "-", "--key-file", str(key)],
+                         input=enc.stdout, capture_output=True, check=True)
+    assert dec.stdout == data
+
+def test_sealed_blocks_detect_tampering_and_truncation():
+    import pytest
+    from cryptography.exceptions import InvalidTag
+
+    core = FastLogCore(bandit="off", threads=2)
+    core.warp.policy.default = 32 * 1024
+    data = sample(200_000)
+    blob = core.encode(data)
+    assert core.decode(blob) == data
+
+    tampered = bytearray(blob)
+    tampered[len(blob) // 2] ^= 1
+    with pytest.raises(InvalidTag):
+        core.decode(bytes(tampered))
+
+    # Dropping the final block must not decode as a shorter log
+    last = len(blob) - 12 - 16
+    with pytest.raises(ValueError):
+        core.decode(blob[:last])
+    with pytest.raises(ValueError):
+        FastLogReader(io.BytesIO(blob[:last]), core=core).read()
+
+def test_legacy_blob_still_decodes():
+    core = FastLogCore()
+    data = sample(100_000)
+    enc, nonce = core.dcf.encrypt(core.warp.compress_stream(data))
+    legacy = nonce + enc
+
+    assert core.decode(legacy) == data
+    assert FastLogReader(io.BytesIO(legacy), core=core).read() == data
@@ -0,0 +1,82 @@
+import struct
+
+import pytest
+import warphybrid
+
+from fastlog.columnar import ColumnarReader, encode_columnar, _pack_column, _unpack_column
+from fastlog.core import FastLogCore
+from fastlog.corpus import generate
+from fastlog.format import COLUMN_TEXT, COLUMN_INT, COLUMN_FIXED
+from fastlog.templates import TemplateMiner
+
+def test_text_round_trip_is_byte_exact():
+    core = FastLogCore(threads=2)
+    odd = (
+        b"disk 100% full on sda1 at 10:04\n"
+        b"\n"
+        b"   leading spaces 007 and trailing  \n"
+        b"tab\tseparated\t0042\t42\r\n"
+        b"x" * 5000 + b" 123456789012345678901234567890\n"
+        b"id=0 id=00 id=1 id=18446744073709551615 id=18446744073709551616\n"
+        b"no final newline 1"
+    )
+    for kind in ("syslog", "windows", "cef", "json"):
+        data = generate(kind, 200_000, seed=2)
+        blob = encode_columnar(data + odd, core, row_group_bytes=64 * 1024, mode="text")
+        assert core.decode(blob) == data + odd
+    for sample in (odd, b"", b"\n", b"1", b"a b\n"):
+        assert core.decode(encode_columnar(sample, core, mode="text")) == sample
+
+def test_templates_beat_plain_encoding():
+    core = FastLogCore()
+    for kind in ("syslog", "cef"):
+        data = generate(kind, 1_000_000, seed=6)
+        blob = encode_columnar(data, core, mode="text")
+        assert len(blob) < 0.9 * len(core.encode(data))
+        reader = ColumnarReader(blob, core=core)
+        assert reader.mode == "text"
+        assert len(reader._templates) < 100
+
+def test_miner_turns_differing_tokens_into_wildcards():
+    miner = TemplateMiner()
+    a, _ = miner.add(b"Accepted publickey for alice from \n.\n.\n.\n port \n")
+    b, tokens = miner.add(b"Accepted publickey for bob from \n.\n.\n.\n port \n")
+    assert a is b and a.version == 1
+    assert a.tokens == [b"Accepted", b"publickey", b"for", None, b"from", b"\n.\n.\n.\n", b"port", b"\n"]
+    assert tokens[3] == b"bob"
+    c, _ = miner.add(b"session opened for user root")
+    assert c is not a and len(miner.clusters) == 2
+
+    shapes, values = warphybrid.text_split(b"port 22 ssh2 from 10.0.0.1\nplain\n")
+    assert shapes == [b"port \n \n from \n.\n.\n.\n", b"plain"]
+    assert values == [b"22", b"ssh2", b"10", b"0", b"0", b"1"]
+
+def test_integer_columns():
+    for values, kind in (
+        ([b"7", b"1234", b"0"], COLUMN_INT),
+        ([b"0007", b"1234", b"0000"], COLUMN_FIXED),
+        ([b"7", b"007"], COLUMN_TEXT),
+        ([b"1", b"x"], COLUMN_TEXT),
+        ([b"1", b""], COLUMN_TEXT),
+        ([b"9" * 19], COLUMN_TEXT),
+    ):
+        packed = _pack_column(values)
+        assert packed[1] == kind
+        assert _unpack_column(*packed) == values
+    data, _, code, _ = _pack_column([b"70000", b"1"])
+    assert code == "I" and struct.unpack("<2I", data) == (70000, 1)
+
+def test_lines_grouped_by_shape():
+    data = b"port 22 ssh2 from 10.0.0.1\nplain\nport 23 ssh2 from 10.0.0.2\nplain"
+    shapes, counts, rows, values = warphybrid.text_group(data)
+    assert shapes == [b"port \n \n from \n.\n.\n.\n", b"plain"]
+    assert counts == [2, 2]
+    assert list(memoryview(rows).cast("I")) == [0, 1, 0, 1]
+    assert values[0][6:] == [b"23", b"ssh2", b"10", b"0", b"0", b"2"] and values[1] == []
+    assert warphybrid.text_group(b"") == ([], [], b"", [])
+
+    # Shapes sharing a template: their columns merged back in line order
+    order = struct.pack("=5I", 1, 0, 1, 1, 0)
+    assert warphybrid.interleave(order, [[b"a", b"b"], [1, 2, 3]]) == [1, b"a", 2, 3, b"b"]
+    with pytest.raises(ValueError):
+        warphybrid.interleave(order, [[b"a"], [1, 2, 3]])
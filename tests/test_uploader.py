@@ -0,0 +1,49 @@
+import pytest
+
+from fastlog.benchmark_upload import StandInServer
+from fastlog.core import FastLogCore
+from fastlog.stream import iter_encode
+from fastlog.uploader import Uploader
+
+@pytest.fixture
+def server():
+    s = StandInServer()
+    yield s
+    s.close()
+
+def lines(n):
+    return [f"2024-05-01T12:00:00Z web-1 app: request {i} done\n".encode() for i in range(n)]
+
+def test_pooled_concurrent_uploads(server):
+    core = FastLogCore()
+    blobs = [core.encode(b"".join(lines(i + 1))) for i in range(20)]
+
+    with Uploader(max_concurrency=3, max_inflight=4) as up:
+        for blob in blobs[:5]:
+            assert up.to_splunk(blob, server.url, "token")[0] == 200
+        assert len(server.connections) == 1     # keep-alive
+
+        server.delay = 0.01
+        futures = [up.submit_elk(blob, server.url) for blob in blobs[5:]]
+        assert all(f.result()[0] == 200 for f in futures)
+
+    assert 1 < len(server.connections) <= 3
+    assert sorted(server.bodies, key=len) == blobs
+
+def test_streamed_upload_with_retry(server):
+    core = FastLogCore()
+    data = lines(50_000)
+    server.fail_next = 2
+
+    with Uploader(backoff=0.01) as up:
+        status, _ = up.to_splunk(lambda: iter_encode(iter(data), core), server.url, "token")
+    assert status == 200
+    assert up.attempts == 3 and up.retried == 2
+    assert server.chunked == 1
+    assert core.decode(server.bodies[0]) == b"".join(data)
+
+    # A bare generator is sent once: no retry on 503
+    server.fail_next = 1
+    with Uploader(backoff=0.01) as up:
+        assert up.to_elk(iter_encode(iter(data[:10]), core), server.url)[0] == 503
+    assert up.attempts == 1